@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Measure RadioDNS resolution throughput, with and without caching, using zone
+files instead of the live DNS.
+"""
+
+import argparse
+import glob
+import os.path
+import time
+
+from lib.dns_backend import ZoneFileDnsBackend
+from lib.dns_resolver import DnsResolver
+from lib.fleet_resolver import FleetResolver
+from lib.radio_station_list import RadioStationList
+from lib.radiodns_domain import RadioDnsDomainList
+from lib.radiodns_service import RadioDnsServiceList
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description = __doc__)
+
+    parser.add_argument("--config-dir",
+                        default = "conf",
+                        help = "directory containing the config files (default: %(default)s)")
+
+    parser.add_argument("--zone-file",
+                        metavar = "FILENAME",
+                        action = "append",
+                        help = "zone file to answer queries from (default: all zone files in CONFIG_DIR/zones)")
+
+    parser.add_argument("--latency",
+                        type = float,
+                        default = 0.02,
+                        help = "simulated time taken by each DNS query, in seconds (default: %(default)s)")
+
+    parser.add_argument("--failure-rate",
+                        type = float,
+                        default = 0.0,
+                        help = "proportion of DNS queries that time out (default: %(default)s)")
+
+    parser.add_argument("--timeout",
+                        type = float,
+                        default = 1.0,
+                        help = "time limit for each DNS query, in seconds (default: %(default)s)")
+
+    parser.add_argument("--concurrency",
+                        type = int,
+                        default = 16,
+                        help = "number of stations to resolve at once (default: %(default)s)")
+
+    parser.add_argument("--rounds",
+                        type = int,
+                        default = 3,
+                        help = "number of times to resolve all stations (default: %(default)s)")
+
+    return parser.parse_args()
+
+def run(name, args, radio_stations, radiodns_domains, radiodns_services, cache_size):
+    zone_filenames = args.zone_file
+
+    if not zone_filenames:
+        zone_filenames = sorted(glob.glob(os.path.join(args.config_dir, "zones", "*.zone")))
+
+    dns_backend = ZoneFileDnsBackend(zone_filenames,
+                                     latency = args.latency,
+                                     failure_rate = args.failure_rate,
+                                     seed = 1)
+
+    dns_resolver = DnsResolver(cache_size = cache_size,
+                               negative_cache_size = cache_size,
+                               lifetime = args.timeout,
+                               backend = dns_backend)
+
+    fleet_resolver = FleetResolver(dns_resolver,
+                                   radiodns_services,
+                                   concurrency = args.concurrency)
+
+    for i in range(args.rounds):
+        start_time = time.time()
+
+        count = 0
+
+        for result in fleet_resolver.resolve(radio_stations, radiodns_domains):
+            count += 1
+
+        elapsed_time = time.time() - start_time
+
+        cache = dns_resolver.get_cache()
+        negative_cache = dns_resolver.get_negative_cache()
+
+        print("%-8s round %d: %4d hostnames in %6.3f s (%7.1f/s), cache hits %d, misses %d, negative hits %d" %
+              (name,
+               i + 1,
+               count,
+               elapsed_time,
+               count / elapsed_time,
+               cache.get_hits(),
+               cache.get_misses(),
+               negative_cache.get_hits()))
+
+def main():
+    args = parse_args()
+
+    radio_stations = RadioStationList(
+        os.path.join(args.config_dir, "radio_stations.xml"))
+
+    radiodns_domains = RadioDnsDomainList(
+        os.path.join(args.config_dir, "radiodns_domains.xml"))
+
+    radiodns_services = RadioDnsServiceList(
+        os.path.join(args.config_dir, "radiodns_services.xml"))
+
+    run("No cache", args, radio_stations, radiodns_domains, radiodns_services, cache_size = 0)
+    run("Cache", args, radio_stations, radiodns_domains, radiodns_services, cache_size = 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Measure the time taken to parse RadioVIS message bodies, comparing the
+single-pass parser with the regular expressions previously used by
+RadioVisClient.
+"""
+
+import argparse
+import re
+import time
+
+from lib.radiovis_parser import ShowMessage, TextMessage, parse_message
+
+
+FRAMES = [
+    ("TEXT", {"destination": "/topic/fm/ce1/c586/09580/text"},
+     "TEXT Now playing: The Beatles - Here Comes the Sun"),
+
+    ("SHOW NOW", {"destination": "/topic/fm/ce1/c586/09580/image",
+                  "link": "http://www.example.com/",
+                  "trigger-time": "NOW"},
+     "SHOW http://www.example.com/images/slide-0001.png"),
+
+    ("SHOW at time", {"destination": "/topic/fm/ce1/c586/09580/image",
+                      "link": "http://www.example.com/",
+                      "trigger-time": "2026-10-17T09:30:00Z"},
+     "SHOW http://www.example.com/images/slide-0002.png"),
+
+    ("Multi-line", {"destination": "/topic/fm/ce1/c586/09580/text"},
+     "TEXT Now playing: The Beatles - Here Comes the Sun\n"
+     "  TEXT  Next: Traffic and travel  \r\n"
+     "\n"
+     "UNKNOWN line\n"),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description = __doc__)
+
+    parser.add_argument("--iterations",
+                        type = int,
+                        default = 100000,
+                        help = "number of times to parse each frame in each round (default: %(default)s)")
+
+    parser.add_argument("--rounds",
+                        type = int,
+                        default = 10,
+                        help = "number of rounds, of which the fastest is reported (default: %(default)s)")
+
+    return parser.parse_args()
+
+
+# The regular expressions used by RadioVisClient before the single-pass
+# parser.
+TEXT_REGEX = re.compile(r"^TEXT\s+(.*)", re.IGNORECASE)
+SHOW_REGEX = re.compile(r"^SHOW\s+(.*)", re.IGNORECASE)
+
+def parse_message_regex(body, headers):
+    """
+    Parse a message body the way RadioVisClient.on_message did before the
+    single-pass parser, for comparison. Like that code, and the parser, this
+    doesn't parse the trigger-time header.
+    """
+    messages = []
+
+    for line in body.split('\n'):
+        line = line.strip()
+
+        match = TEXT_REGEX.match(line)
+
+        if match:
+            messages.append(TextMessage(match.group(1)))
+        else:
+            match = SHOW_REGEX.match(line)
+
+            if match:
+                if 'link' in headers:
+                    link = headers['link']
+                else:
+                    link = None
+
+                if 'trigger-time' in headers:
+                    date_time = headers['trigger-time']
+                else:
+                    date_time = None
+
+                messages.append(ShowMessage(match.group(1), link, date_time))
+
+    return messages
+
+def measure(parsers, body, headers, iterations, rounds):
+    """
+    Return a list of the mean time taken by each parser to parse the body,
+    in microseconds, from the fastest of several rounds. The parsers take
+    turns in each round, so that they are equally affected by other load
+    on the machine.
+    """
+    best_times = [None] * len(parsers)
+
+    for i in range(rounds):
+        for index, parse in enumerate(parsers):
+            start_time = time.perf_counter()
+
+            for j in range(iterations):
+                parse(body, headers)
+
+            elapsed_time = time.perf_counter() - start_time
+
+            if best_times[index] is None or elapsed_time < best_times[index]:
+                best_times[index] = elapsed_time
+
+    return [best_time / iterations * 1e6 for best_time in best_times]
+
+def main():
+    args = parse_args()
+
+    print("%-14s %12s %12s %8s" % ("Frame", "Regex (us)", "Parser (us)", "Speedup"))
+
+    for name, headers, body in FRAMES:
+        regex_time, parser_time = measure([parse_message_regex, parse_message],
+                                          body,
+                                          headers,
+                                          args.iterations,
+                                          args.rounds)
+
+        print("%-14s %12.2f %12.2f %7.1fx" % (name, regex_time, parser_time, regex_time / parser_time))
+
+
+if __name__ == '__main__':
+    main()
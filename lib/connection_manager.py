@@ -12,36 +12,157 @@
 # implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
+import concurrent.futures
 import logging
 import socks
+import threading
+import time
 import urllib
 from urllib import request
 
-from .async_http_client import HttpClientThread
-from .dns_resolver import DnsResolver
+from .http_client import HttpClientThread
+from .image_cache import ImageCache
+from .connection_racer import ConnectionRacer
+from .disk_image_cache import DiskImageCache
+from .dns_resolver import DnsPrefetcher, DnsResolver, order_services
 from .proxy_settings import ProxySettings
-from .radiovis_client import RadioVisClient
+from .radiovis_connection_pool import RadioVisConnectionPool
+from .scheduler import Scheduler
+
+
+class ScheduledShow:
+    """
+    A SHOW message whose image is to be shown at a future trigger time.
+    """
+    def __init__(self, image_url, link_url, date_time, image_topic):
+        self.image_url = image_url
+        self.link_url = link_url
+        self.date_time = date_time
+        self.image_topic = image_topic
+        self.image_data = None
+        self.prefetch_event = None
+        self.show_event = None
+
+
+class StationMessageHandler:
+    """
+    Receives the TEXT and SHOW messages from a station's topics, and passes
+    them to the ConnectionManager along with the station's image topic, so
+    that messages still arriving for a previous station can be told apart.
+    """
+    def __init__(self, connection_manager, image_topic):
+        self._connection_manager = connection_manager
+        self._image_topic = image_topic
+
+    def radiovis_text(self, text):
+        self._connection_manager.radiovis_text(text, self._image_topic)
+
+    def radiovis_show(self, image_url, link_url, date_time):
+        self._connection_manager.radiovis_show(image_url, link_url, date_time, self._image_topic)
 
 
 class ConnectionManager(object):
     """
     Manages the RadioVIS (Stomp) connection and HTTP connection for retrieving
     images.
+
+    SHOW messages with a future trigger time are held until that time. The
+    image is downloaded shortly beforehand, so that it can be shown at the
+    trigger time without waiting for the download.
     """
-    def __init__(self, radiodns_services):
+    # How long before the trigger time to download an image, in seconds.
+    PREFETCH_TIME = 30.0
+
+    def __init__(self,
+                 radiodns_services,
+                 dns_cache_filename = None,
+                 dns_backend = None,
+                 dns_metrics_filename = None,
+                 image_cache_dirname = None,
+                 image_cache_size = 100 * 1024 * 1024):
+        """
+        @param radiodns_services: The RadioDNS services to look up
+        (L{RadioDnsService} objects).
+
+        @param dns_cache_filename: The name of a file in which to keep DNS
+        answers between runs, or None to disable.
+
+        @param dns_backend: The L{DnsBackend} used to make DNS queries, or
+        None to use the system's name servers.
+
+        @param dns_metrics_filename: The name of a file to write DNS query
+        timings and outcomes to on shutdown, or None to disable.
+
+        @param image_cache_dirname: The name of a directory in which to keep
+        images between runs, or None to disable.
+
+        @param image_cache_size: The maximum total size of the images kept in
+        image_cache_dirname, in bytes.
+        """
         self._radiodns_services = radiodns_services
-        self._dns = DnsResolver()
+        self._dns = DnsResolver(backend = dns_backend)
+        self._dns_cache_filename = dns_cache_filename
+        self._dns_metrics_filename = dns_metrics_filename
+
+        if self._dns_cache_filename is not None:
+            self._dns.load_cache(self._dns_cache_filename)
+
+        # Refresh DNS answers for frequently used stations before they expire.
+        self._dns_prefetcher = DnsPrefetcher(self._dns)
+        self._dns_prefetcher.start()
+
+        # Thread pool for making SRV queries for each of the RadioDNS
+        # services concurrently.
+        self._dns_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers = max(1, len(radiodns_services)),
+            thread_name_prefix = "dns")
 
         self._proxy_settings = None
         self._use_http_proxy = False
 
         self._radiovis_client = None
 
-        self._http_client = HttpClientThread(self)
+        # Allows connect_radiovis() and connect_radiovis_auto() to be called
+        # from worker threads, one connection at a time.
+        self._connect_lock = threading.Lock()
+
+        # The topics subscribed to for the current station. The image topic
+        # also identifies the station whose images are being downloaded. The
+        # lock ensures that no images are requested for a station once
+        # another has been selected.
+        self._text_topic = None
+        self._image_topic = None
+        self._station_lock = threading.Lock()
+
+        # Keep recently shown images, as broadcasters often cycle through
+        # the same few slides. The disk cache allows recent images to be
+        # shown straight away after a restart.
+        disk_image_cache = None
+
+        if image_cache_dirname is not None:
+            disk_image_cache = DiskImageCache(image_cache_dirname, image_cache_size)
+
+        self._image_cache = ImageCache(disk_cache = disk_image_cache)
+
+        self._http_client = HttpClientThread(self, image_cache = self._image_cache)
         self._http_client.start()
 
+        # Shows images at their trigger times.
+        self._scheduler = Scheduler()
+        self._scheduler.start()
+        self._scheduled_shows = []
+        self._scheduled_shows_lock = threading.Lock()
+
+        # Keep RadioVIS connections open after changing station, so that
+        # changing to another station on the same server is quicker.
+        self._radiovis_pool = RadioVisConnectionPool(scheduler = self._scheduler)
+
         self._listeners = []
 
+        # Objects to pass Stomp frames to, for logging. The list is replaced
+        # rather than modified, as it is used on the Stomp receiver thread.
+        self._frame_listeners = []
+
         # Get system proxy server settings (from http_proxy environment variable
         # or web browser settings).
         proxies = urllib.request.getproxies()
@@ -57,11 +178,20 @@ class ConnectionManager(object):
             self._proxy_settings = None
 
     def shutdown(self):
-        if self._radiovis_client is not None:
-            self._radiovis_client.stop()
-            self._radiovis_client.remove_listener(self)
+        self._release_radiovis_client()
+        self._radiovis_pool.close_all()
 
+        self._scheduler.stop()
         self._http_client.stop()
+        self._image_cache.flush()
+        self._dns_prefetcher.stop()
+        self._dns_executor.shutdown()
+
+        if self._dns_cache_filename is not None:
+            self._dns.save_cache(self._dns_cache_filename)
+
+        if self._dns_metrics_filename is not None:
+            self._dns.get_metrics().save(self._dns_metrics_filename)
 
     def add_listener(self, listener):
         self._listeners.append(listener)
@@ -69,6 +199,25 @@ class ConnectionManager(object):
     def remove_listener(self, listener):
         self._listeners.remove(listener)
 
+    def add_frame_listener(self, listener):
+        """
+        Register an object whose stomp_frame() method is called with a
+        L{FrameEvent} for each Stomp frame received. Frames are only passed
+        on from the RadioVisClient while there are frame listeners.
+        """
+        self._frame_listeners = self._frame_listeners + [listener]
+
+        if len(self._frame_listeners) == 1 and self._radiovis_client is not None:
+            self._radiovis_client.add_frame_listener(self)
+
+    def remove_frame_listener(self, listener):
+        frame_listeners = list(self._frame_listeners)
+        frame_listeners.remove(listener)
+        self._frame_listeners = frame_listeners
+
+        if len(self._frame_listeners) == 0 and self._radiovis_client is not None:
+            self._radiovis_client.remove_frame_listener(self)
+
     def get_cname(self, station):
         """
         Return the CNAME DNS record for the given radio station.
@@ -81,18 +230,32 @@ class ConnectionManager(object):
         """
         Return a list of the RadioDNS services available on the cname domain.
         Each entry in the list is a ServiceRecord object.
+
+        The SRV queries for each service are made concurrently, and the results
+        are returned in the order the services are listed in the config file.
         """
-        services = []
+        futures = []
 
         for service in self._radiodns_services:
-            dns_services = self._dns.get_services(service.get_record(),
-                                                  cname,
-                                                  service.get_name())
+            future = self._dns_executor.submit(self._dns.get_services,
+                                               service.get_record(),
+                                               cname,
+                                               service.get_name())
+            futures.append(future)
 
-            services.extend(dns_services)
+        services = []
+
+        for future in futures:
+            services.extend(future.result())
 
         return services
 
+    def get_dns_metrics(self):
+        """
+        Return the L{DnsMetrics} object holding DNS query timings and outcomes.
+        """
+        return self._dns.get_metrics()
+
     def enable_http_proxy(self, enable):
         self._use_http_proxy = enable
 
@@ -100,52 +263,249 @@ class ConnectionManager(object):
         """
         Establish a RadioVIS Stomp connection at the specified host and port,
         and optionally route the connection through the proxy server.
+
+        If there is already a connection to the server, from this or an
+        earlier station, it is reused, and only the station's topics are
+        subscribed to. If the server can't be reached, the connection is
+        retried in the background, and the topics are subscribed to once it
+        connects.
         """
-        # Dispose of the old RadioVisClient object.
-        if self._radiovis_client is not None:
-            self._radiovis_client.stop()
-            self._radiovis_client.remove_listener(self)
-            self._radiovis_client = None
+        proxy_settings = self._get_stomp_proxy_settings(use_proxy_server)
+
+        with self._connect_lock:
+            # Connect before releasing the old station's connection, so that
+            # it is reused if the new station is on the same server.
+            radiovis_client = self._radiovis_pool.acquire(host, port, proxy_settings)
 
+            self._use_radiovis_client(radiovis_client, station)
+
+    def _get_stomp_proxy_settings(self, use_proxy_server):
         if use_proxy_server:
-            proxy_settings = self._proxy_settings
+            return self._proxy_settings
         else:
-            proxy_settings = None
+            return None
+
+    def _use_radiovis_client(self, radiovis_client, station):
+        """
+        Change to a new station, using a connected client from the pool.
+        """
+        self._release_radiovis_client()
 
-        self._radiovis_client = RadioVisClient(host, port, proxy_settings)
+        with self._station_lock:
+            # Don't show any images still being downloaded or waiting for
+            # their trigger time for the old station.
+            self._http_client.cancel(self._image_topic)
+            self._cancel_scheduled_shows()
+            self._text_topic = station.get_text_topic()
+            self._image_topic = station.get_image_topic()
 
-        self._radiovis_client.add_listener(self)
-        self._radiovis_client.start(text_topic = station.get_text_topic(),
-                                    image_topic = station.get_image_topic())
+        self._radiovis_client = radiovis_client
 
-    def stomp_message(self, message):
-        for listener in self._listeners:
-            listener.stomp_message(message)
+        if len(self._frame_listeners) > 0:
+            self._radiovis_client.add_frame_listener(self)
 
-    def radiovis_text(self, text):
+        handler = StationMessageHandler(self, self._image_topic)
+        self._radiovis_client.subscribe(self._text_topic, handler)
+        self._radiovis_client.subscribe(self._image_topic, handler)
+
+    def _release_radiovis_client(self):
         """
-        Called from RadioVisClient object when a TEXT message is received.
+        Unsubscribe from the current station's topics, and return its
+        connection to the pool.
         """
-        for listener in self._listeners:
-            listener.radiovis_text(text)
+        if self._radiovis_client is None:
+            return
 
-    def radiovis_show(self, image_url, link_url, date_time):
+        self._radiovis_client.unsubscribe(self._text_topic)
+        self._radiovis_client.unsubscribe(self._image_topic)
+
+        if len(self._frame_listeners) > 0:
+            self._radiovis_client.remove_frame_listener(self)
+
+        self._radiovis_pool.release(self._radiovis_client)
+        self._radiovis_client = None
+
+    def connect_radiovis_auto(self, services, station, use_proxy_server):
+        """
+        Establish a RadioVIS Stomp connection to one of the given RadioVIS
+        services (ServiceRecord objects). Servers are tried in the order given
+        by their SRV priority and weight, moving on to the next server if one
+        fails or does not accept a connection quickly. The first Stomp
+        connection made is used.
+
+        This can take several seconds, so shouldn't be called on the GUI
+        thread. Returns False if none of the servers are available, in which
+        case the connection to the first server is retried in the background.
+        """
+        targets = [(service.target, service.port) for service in order_services(services)]
+
+        if len(targets) == 0:
+            return False
+
+        proxy_settings = self._get_stomp_proxy_settings(use_proxy_server)
+
+        def connect(target, timeout):
+            host, port = target
+            return self._radiovis_pool.acquire(host, port, proxy_settings, retry = False)
+
+        with self._connect_lock:
+            # Connections made after the winner's are returned to the pool.
+            racer = ConnectionRacer(connect = connect, close = self._radiovis_pool.release)
+            target, radiovis_client = racer.race(targets)
+
+            if target is None:
+                self.log("No RadioVIS server available")
+                host, port = targets[0]
+                radiovis_client = self._radiovis_pool.acquire(host, port, proxy_settings)
+                self._use_radiovis_client(radiovis_client, station)
+                return False
+
+            self.log("Selected RadioVIS server: %s port %d" % target)
+
+            self._use_radiovis_client(radiovis_client, station)
+            return True
+
+    def stomp_frame(self, frame_event):
+        """
+        Called from RadioVisClient object when a frame is received, while
+        there are frame listeners.
+        """
+        for listener in self._frame_listeners:
+            listener.stomp_frame(frame_event)
+
+    def radiovis_text(self, text, image_topic):
+        """
+        Called from a StationMessageHandler object when a TEXT message is
+        received.
+
+        @param image_topic: The image topic of the station the message is
+        for.
+        """
+        with self._station_lock:
+            if image_topic != self._image_topic:
+                return # For a previous station.
+
+            for listener in self._listeners:
+                listener.radiovis_text(text)
+
+    def radiovis_show(self, image_url, link_url, date_time, image_topic):
+        """
+        Called from a StationMessageHandler object when a SHOW message is
+        received.
+
+        @param date_time: The trigger time, as a datetime object, or None to
+        show the image immediately.
+
+        @param image_topic: The image topic of the station the message is
+        for.
         """
-        Called from RadioVisClient object when a SHOW message is received.
+        with self._station_lock:
+            if image_topic != self._image_topic:
+                self.log("Ignoring SHOW message for previous station: %s" % image_url)
+                return
+
+            if date_time is not None and date_time.timestamp() > time.time():
+                self._schedule_show(image_url, link_url, date_time, image_topic)
+                return
+
+            for listener in self._listeners:
+                listener.radiovis_show(image_url, link_url, date_time)
+
+            if image_url is not None:
+                self._request_image(image_url, image_topic)
+
+    def _schedule_show(self, image_url, link_url, date_time, image_topic):
+        self.log("Scheduling image for %s: %s" % (date_time.isoformat(), image_url))
+
+        show = ScheduledShow(image_url, link_url, date_time, image_topic)
+        trigger_time = date_time.timestamp()
+
+        with self._scheduled_shows_lock:
+            self._scheduled_shows.append(show)
+
+            if image_url is not None:
+                show.prefetch_event = self._scheduler.schedule(trigger_time - self.PREFETCH_TIME,
+                                                               self._prefetch_image,
+                                                               show)
+
+            show.show_event = self._scheduler.schedule(trigger_time, self._show_scheduled, show)
+
+    def _prefetch_image(self, show):
+        """
+        Called from the Scheduler shortly before a SHOW message's trigger time.
         """
-        for listener in self._listeners:
-            listener.radiovis_show(image_url, link_url, date_time)
+        def image_received(image_data):
+            show.image_data = image_data
 
-        if image_url is not None:
-            self._request_image(image_url)
+            # Allow the image to be prepared for display in advance.
+            for listener in self._listeners:
+                listener.radiovis_image_prefetched(image_data)
+
+        self.log("Prefetching image: " + show.image_url)
 
-    def _request_image(self, url):
-        proxy_settings = None
+        # Each scheduled show has its own key, so that the download isn't
+        # superseded by images shown in the meantime.
+        self._http_client.request(show.image_url,
+                                  self._get_http_proxy_settings(),
+                                  key = show,
+                                  callback = image_received)
 
+    def _show_scheduled(self, show):
+        """
+        Called from the Scheduler at a SHOW message's trigger time.
+        """
+        with self._station_lock:
+            with self._scheduled_shows_lock:
+                if show not in self._scheduled_shows:
+                    return # Cancelled.
+
+                self._scheduled_shows.remove(show)
+
+            for listener in self._listeners:
+                listener.radiovis_show(show.image_url, show.link_url, show.date_time)
+
+            if show.image_url is None:
+                return
+
+            image_data = show.image_data
+
+            if image_data is not None:
+                # This image replaces any still being downloaded for the
+                # station.
+                self._http_client.cancel(show.image_topic)
+                self.http_received_data(image_data)
+            else:
+                # The image hasn't been downloaded yet, so show it as soon as
+                # it is. If the prefetch is still in progress, this request
+                # shares it.
+                self._request_image(show.image_url, show.image_topic)
+
+            # The prefetch is no longer needed. This is done after the
+            # request above, so that a download in progress isn't cancelled.
+            self._http_client.cancel(show)
+
+    def _cancel_scheduled_shows(self):
+        with self._scheduled_shows_lock:
+            for show in self._scheduled_shows:
+                if show.prefetch_event is not None:
+                    self._scheduler.cancel(show.prefetch_event)
+
+                self._scheduler.cancel(show.show_event)
+                self._http_client.cancel(show)
+
+            self._scheduled_shows = []
+
+    def _get_http_proxy_settings(self):
         if self._use_http_proxy:
-            proxy_settings = self._proxy_settings
+            return self._proxy_settings
+        else:
+            return None
 
-        self._http_client.request(url, proxy_settings)
+    def _request_image(self, url, image_topic):
+        # A newer image for the station replaces any still being downloaded.
+        self._http_client.request(url,
+                                  self._get_http_proxy_settings(),
+                                  key = image_topic)
 
     def http_received_data(self, data):
         """
@@ -0,0 +1,157 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import logging
+import queue
+import socket
+import threading
+import time
+
+
+def connect_socket(target, timeout):
+    return socket.create_connection(target, timeout)
+
+
+def close_socket(sock):
+    sock.close()
+
+
+class ConnectionRacer:
+    """
+    Connects to the first of a list of servers that accepts a connection.
+    Connection attempts are started in order, with the next attempt started
+    after a short delay or as soon as the previous one fails, so that an
+    unresponsive server doesn't hold up the others (similar to the "Happy
+    Eyeballs" algorithm, RFC 8305). Each ConnectionRacer object should only be
+    used for one race.
+    """
+    def __init__(self,
+                 attempt_delay = 0.25,
+                 timeout = 5.0,
+                 connect = connect_socket,
+                 close = close_socket):
+        """
+        @param attempt_delay: The time to wait for a connection attempt
+        before also trying the next server, in seconds.
+
+        @param timeout: The overall time limit, in seconds.
+
+        @param connect: Function taking a (host, port) tuple and the time
+        remaining, in seconds, and returning a connection to the server, or
+        raising an exception if the server isn't available. By default, a TCP
+        socket is connected.
+
+        @param close: Function to close a connection returned by connect,
+        called for the connections other than the winner's.
+        """
+        self._attempt_delay = attempt_delay
+        self._timeout = timeout
+        self._connect = connect
+        self._close = close
+
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def race(self, targets):
+        """
+        Attempt connections to a list of (host, port) tuples, in order of
+        preference. Return a tuple of the first (host, port) tuple to accept a
+        connection and the connection, which the caller then owns, or
+        (None, None) if none do within the time limit.
+        """
+        deadline = time.monotonic() + self._timeout
+        next_attempt_time = 0
+        next_index = 0
+        active = 0
+        winner = None
+        winning_connection = None
+
+        while winner is None:
+            now = time.monotonic()
+
+            if now >= deadline:
+                break
+
+            if next_index < len(targets) and (active == 0 or now >= next_attempt_time):
+                self._start_attempt(targets[next_index], deadline - now)
+                next_index += 1
+                active += 1
+                next_attempt_time = now + self._attempt_delay
+
+            if active == 0:
+                break # All attempts failed.
+
+            if next_index < len(targets):
+                wait_time = min(next_attempt_time, deadline) - now
+            else:
+                wait_time = deadline - now
+
+            try:
+                target, connection = self._results.get(timeout = max(wait_time, 0))
+            except queue.Empty:
+                continue
+
+            active -= 1
+
+            if connection is not None:
+                winner = target
+                winning_connection = connection
+            else:
+                # Start the next attempt straight away.
+                next_attempt_time = 0
+
+        with self._lock:
+            self._finished = True
+
+        # Close any connections that completed at the same time as the winner.
+        while True:
+            try:
+                target, connection = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if connection is not None:
+                self._close(connection)
+
+        return (winner, winning_connection)
+
+    def _start_attempt(self, target, timeout):
+        self.log("Trying %s port %d" % target)
+
+        thread = threading.Thread(target = self._attempt,
+                                  args = (target, timeout),
+                                  name = "connect",
+                                  daemon = True)
+        thread.start()
+
+    def _attempt(self, target, timeout):
+        try:
+            connection = self._connect(target, timeout)
+        except Exception as e:
+            self.log("Couldn't connect to %s port %d: %s" % (target[0], target[1], e))
+            connection = None
+
+        with self._lock:
+            finished = self._finished
+
+            if not finished:
+                self._results.put((target, connection))
+
+        if finished and connection is not None:
+            # Too late: the race is over.
+            self._close(connection)
+
+    def log(self, message):
+        logging.info(message)
@@ -0,0 +1,89 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import hashlib
+import threading
+
+
+def get_image_key(image_data, width, height):
+    """
+    Return the cache key for an image decoded and scaled to the given size:
+    a hash of the image data, with the size.
+    """
+    return (hashlib.sha256(image_data).digest(), width, height)
+
+
+def get_scaled_size(width, height, max_width, max_height):
+    """
+    Return the (width, height) of an image scaled to fit within the given
+    area, keeping its aspect ratio.
+    """
+    scale = min(max_width / width, max_height / height)
+
+    return (max(1, round(width * scale)), max(1, round(height * scale)))
+
+
+class DecodedImageCache:
+    """
+    A least-recently-used cache of decoded images, keyed by a hash of the
+    original image data and the size they were scaled to. Repeated slides can
+    then be shown without being decoded and scaled again.
+    """
+    def __init__(self, max_entries = 32):
+        """
+        @param max_entries: The maximum number of images to hold. At the
+        default display size, each image takes up to 300 KB.
+        """
+        self._max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        """
+        Return the decoded image for the given key, or None if not cached.
+        """
+        with self._lock:
+            decoded_image = self._entries.get(key)
+
+            if decoded_image is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return decoded_image
+
+    def put(self, key, decoded_image):
+        with self._lock:
+            self._entries[key] = decoded_image
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last = False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_hits(self):
+        return self._hits
+
+    def get_misses(self):
+        return self._misses
+
+    def __len__(self):
+        return len(self._entries)
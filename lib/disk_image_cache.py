@@ -0,0 +1,301 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+from .image_cache import ImageCacheEntry
+
+
+class DiskImageCache:
+    """
+    Keeps downloaded images in a directory, so that they are available after
+    the application restarts. Images are stored in files named by the SHA-256
+    hash of their content, so an image published under several URLs is only
+    stored once, and an index file maps each URL to its image and cache
+    validators. When the total size of the images exceeds the limit, the
+    least recently used URLs are removed, along with any images no longer
+    referred to.
+
+    The index file is written after every MAX_UNSAVED_CHANGES changes, and
+    by L{flush}, rather than after every change. If the application stops
+    without calling L{flush}, the most recent changes are lost, and any
+    images they added are deleted when the cache is next loaded.
+    """
+    INDEX_FILENAME = "index.json"
+
+    # The number of URLs added or removed before the index file is written.
+    MAX_UNSAVED_CHANGES = 32
+
+    def __init__(self, dirname, max_size = 100 * 1024 * 1024):
+        """
+        @param dirname: The directory in which to store the images. This is
+        created if it doesn't exist.
+
+        @param max_size: The maximum total size of the stored images, in
+        bytes.
+        """
+        self._dirname = dirname
+        self._max_size = max_size
+        self._lock = threading.Lock()
+
+        # Map of URL to (hash, expires, etag, last_modified), from least to
+        # most recently used.
+        self._index = collections.OrderedDict()
+
+        # Map of hash to image size, for all stored images.
+        self._sizes = {}
+        self._size = 0
+
+        # Map of hash to the number of URLs in the index referring to it.
+        self._ref_counts = {}
+
+        # Whether the index has changed, including the order of use, since
+        # the index file was written, and the number of URLs added or
+        # removed since then.
+        self._index_modified = False
+        self._unsaved_changes = 0
+
+        os.makedirs(self._dirname, exist_ok = True)
+        self._load_index()
+
+    def get(self, url):
+        """
+        Return an L{ImageCacheEntry} for the given URL, or None if no image is
+        stored for it.
+        """
+        with self._lock:
+            item = self._index.get(url)
+
+            if item is None:
+                return None
+
+            content_hash, expires, etag, last_modified = item
+            body = self._read_image(content_hash)
+
+            if body is None:
+                self._remove(url)
+                return None
+
+            self._index.move_to_end(url)
+            self._index_modified = True
+
+        return ImageCacheEntry(url,
+                               body,
+                               expires,
+                               etag = etag,
+                               last_modified = last_modified)
+
+    def put(self, entry):
+        """
+        Store an L{ImageCacheEntry}, replacing any image stored for its URL.
+        """
+        if len(entry.body) > self._max_size:
+            self.remove(entry.url)
+            return
+
+        content_hash = hashlib.sha256(entry.body).hexdigest()
+
+        with self._lock:
+            if content_hash not in self._sizes:
+                if not self._write_image(content_hash, entry.body):
+                    return
+
+                self._sizes[content_hash] = len(entry.body)
+                self._size += len(entry.body)
+
+            previous_item = self._index.pop(entry.url, None)
+
+            self._index[entry.url] = (content_hash,
+                                      entry.expires,
+                                      entry.etag,
+                                      entry.last_modified)
+
+            self._ref_counts[content_hash] = self._ref_counts.get(content_hash, 0) + 1
+
+            if previous_item is not None:
+                self._release_image(previous_item[0])
+
+            while self._size > self._max_size:
+                url, item = self._index.popitem(last = False)
+                self._release_image(item[0])
+
+            self._index_changed()
+
+    def remove(self, url):
+        with self._lock:
+            self._remove(url)
+
+    def _remove(self, url):
+        item = self._index.pop(url, None)
+
+        if item is not None:
+            self._release_image(item[0])
+            self._index_changed()
+
+    def _index_changed(self):
+        self._index_modified = True
+        self._unsaved_changes += 1
+
+        if self._unsaved_changes >= self.MAX_UNSAVED_CHANGES:
+            self._save_index()
+
+    def flush(self):
+        """
+        Write the index file, if it has changed since it was last written.
+        This should be called before the application exits.
+        """
+        with self._lock:
+            if self._index_modified:
+                self._save_index()
+
+    def get_size(self):
+        """
+        Return the total size of the stored images, in bytes.
+        """
+        return self._size
+
+    def __len__(self):
+        return len(self._index)
+
+    def _get_image_pathname(self, content_hash):
+        return os.path.join(self._dirname, content_hash)
+
+    def _read_image(self, content_hash):
+        try:
+            with open(self._get_image_pathname(content_hash), "rb") as f:
+                body = f.read()
+        except OSError as e:
+            self.log("Couldn't read cached image %s: %s" % (content_hash, e))
+            return None
+
+        # Check that the file hasn't been truncated or corrupted.
+        if hashlib.sha256(body).hexdigest() != content_hash:
+            self.log("Cached image is corrupt: " + content_hash)
+            return None
+
+        return body
+
+    def _write_image(self, content_hash, body):
+        pathname = self._get_image_pathname(content_hash)
+        temp_pathname = pathname + ".tmp"
+
+        try:
+            with open(temp_pathname, "wb") as f:
+                f.write(body)
+
+            os.replace(temp_pathname, pathname)
+        except OSError as e:
+            logging.warning("Couldn't write cached image to %s: %s" % (pathname, e))
+            return False
+
+        return True
+
+    def _release_image(self, content_hash):
+        """
+        Called when a URL referring to an image is removed from the index.
+        Deletes the image file if no other URL refers to it.
+        """
+        ref_count = self._ref_counts.get(content_hash, 0) - 1
+
+        if ref_count > 0:
+            self._ref_counts[content_hash] = ref_count
+            return
+
+        self._ref_counts.pop(content_hash, None)
+
+        size = self._sizes.pop(content_hash, None)
+
+        if size is None:
+            return
+
+        self._size -= size
+
+        try:
+            os.remove(self._get_image_pathname(content_hash))
+        except OSError as e:
+            self.log("Couldn't delete cached image %s: %s" % (content_hash, e))
+
+    def _load_index(self):
+        pathname = os.path.join(self._dirname, self.INDEX_FILENAME)
+
+        try:
+            with open(pathname, "r") as f:
+                data = json.load(f)
+
+            for url, content_hash, expires, etag, last_modified in data["entries"]:
+                self._index[url] = (content_hash, expires, etag, last_modified)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning("Couldn't load image cache index from %s: %s" % (pathname, e))
+            self._index.clear()
+
+        # Find the sizes of the stored images, and remove any index entries
+        # whose image is missing, and any images not in the index.
+        hashes = set(item[0] for item in self._index.values())
+
+        for filename in os.listdir(self._dirname):
+            # Leave alone any files not created by the cache.
+            if re.match(r"^[0-9a-f]{64}(\.tmp)?$", filename) is None:
+                continue
+
+            file_pathname = os.path.join(self._dirname, filename)
+
+            try:
+                if filename in hashes:
+                    size = os.path.getsize(file_pathname)
+                    self._sizes[filename] = size
+                    self._size += size
+                else:
+                    os.remove(file_pathname)
+            except OSError as e:
+                self.log("Couldn't check cached image %s: %s" % (filename, e))
+
+        for url, item in list(self._index.items()):
+            if item[0] not in self._sizes:
+                del self._index[url]
+            else:
+                self._ref_counts[item[0]] = self._ref_counts.get(item[0], 0) + 1
+
+        while self._size > self._max_size:
+            url, item = self._index.popitem(last = False)
+            self._release_image(item[0])
+
+    def _save_index(self):
+        pathname = os.path.join(self._dirname, self.INDEX_FILENAME)
+        temp_pathname = pathname + ".tmp"
+
+        data = {
+            "entries": [[url, content_hash, expires, etag, last_modified]
+                        for url, (content_hash, expires, etag, last_modified) in self._index.items()]
+        }
+
+        try:
+            with open(temp_pathname, "w") as f:
+                json.dump(data, f)
+
+            os.replace(temp_pathname, pathname)
+            self._index_modified = False
+            self._unsaved_changes = 0
+        except OSError as e:
+            logging.warning("Couldn't save image cache index to %s: %s" % (pathname, e))
+
+    def log(self, message):
+        logging.info(message)
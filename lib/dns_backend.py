@@ -0,0 +1,171 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import random
+import threading
+import time
+
+import dns.exception
+import dns.flags
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.resolver
+import dns.zone
+
+
+class DnsBackend(object):
+    """
+    Base class for the source of answers to DNS queries made by
+    L{DnsResolver}.
+    """
+    def query(self, qname, rdtype, lifetime = None):
+        """
+        Query the DNS and return a dns.resolver.Answer object. Raises
+        dns.resolver.NXDOMAIN or dns.resolver.NoAnswer for negative answers,
+        or another dns.exception.DNSException if the query fails.
+
+        @param qname: The query name, e.g., "0.c221.ce15.ce1.dab.radiodns.org"
+
+        @param rdtype: The query type, e.g., "CNAME" or "SRV"
+
+        @param lifetime: The time limit for the query, in seconds.
+        """
+        raise NotImplementedError("query must be overridden in derived classes")
+
+
+class SystemDnsBackend(DnsBackend):
+    """
+    Makes DNS queries using the system's configured name servers.
+    """
+    def __init__(self):
+        self._resolver = dns.resolver.get_default_resolver()
+
+    def query(self, qname, rdtype, lifetime = None):
+        return self._resolver.query(qname, rdtype, lifetime = lifetime)
+
+
+class ZoneFileDnsBackend(DnsBackend):
+    """
+    Answers DNS queries from zone files, for testing and benchmarking without
+    access to the live DNS. Optionally, a delay can be added to each query,
+    and a proportion of queries made to fail, to simulate network conditions.
+    """
+    def __init__(self, filenames, latency = 0.0, failure_rate = 0.0, seed = None):
+        """
+        @param filenames: A list of zone file names (or file objects). Each
+        zone file must contain an $ORIGIN directive and an SOA record.
+
+        @param latency: The time taken to answer each query, in seconds.
+
+        @param failure_rate: The proportion of queries, from 0.0 to 1.0,
+        that time out.
+
+        @param seed: Seed for the random number generator used to choose
+        which queries fail.
+        """
+        self._zones = []
+
+        for filename in filenames:
+            zone = dns.zone.from_file(filename, relativize = False)
+            self._zones.append(zone)
+
+        # Check the most specific zones first.
+        self._zones.sort(key = lambda zone: len(zone.origin), reverse = True)
+
+        self._latency = latency
+        self._failure_rate = failure_rate
+
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def query(self, qname, rdtype, lifetime = None):
+        if self._latency > 0:
+            time.sleep(self._latency)
+
+        with self._random_lock:
+            failed = self._random.random() < self._failure_rate
+
+        if failed:
+            if lifetime is not None:
+                time.sleep(max(lifetime - self._latency, 0))
+
+            raise dns.exception.Timeout()
+
+        name = dns.name.from_text(qname)
+        rdtype = dns.rdatatype.from_text(rdtype) if isinstance(rdtype, str) else rdtype
+
+        zone = self._find_zone(name)
+
+        if zone is None:
+            raise dns.resolver.NoNameservers()
+
+        request = dns.message.make_query(name, rdtype)
+        response = dns.message.make_response(request)
+        response.flags |= dns.flags.AA
+
+        node = zone.get_node(name)
+        rdataset = None
+
+        if node is not None:
+            rdataset = node.get_rdataset(zone.rdclass, rdtype)
+
+        if rdataset is None:
+            # Negative answer: include the zone's SOA record in the authority
+            # section, from which the negative caching TTL is found.
+            soa_rdataset = zone.find_rdataset(zone.origin, dns.rdatatype.SOA)
+            soa_rrset = response.find_rrset(response.authority,
+                                            zone.origin,
+                                            zone.rdclass,
+                                            dns.rdatatype.SOA,
+                                            create = True)
+            soa_rrset.update(soa_rdataset)
+
+            if not self._name_exists(zone, name):
+                response.set_rcode(dns.rcode.NXDOMAIN)
+                raise dns.resolver.NXDOMAIN(qnames = [name], responses = {name: response})
+            else:
+                raise dns.resolver.NoAnswer(response = response)
+
+        rrset = response.find_rrset(response.answer,
+                                    name,
+                                    zone.rdclass,
+                                    rdtype,
+                                    create = True)
+        rrset.update(rdataset)
+
+        return dns.resolver.Answer(name, rdtype, zone.rdclass, response)
+
+    def _name_exists(self, zone, name):
+        """
+        Return True if the name has any records, or is an empty non-terminal
+        (i.e., has no records but there are names below it).
+        """
+        if zone.get_node(name) is not None:
+            return True
+
+        for node_name in zone.keys():
+            if node_name.is_subdomain(name):
+                return True
+
+        return False
+
+    def _find_zone(self, name):
+        for zone in self._zones:
+            if name.is_subdomain(zone.origin):
+                return zone
+
+        return None
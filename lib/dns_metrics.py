@@ -0,0 +1,206 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import json
+import logging
+import threading
+import time
+
+
+# Upper bounds of the latency histogram buckets, in seconds. The last bucket
+# counts queries that took longer than the largest bound.
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+
+class DnsQueryRecord:
+    def __init__(self,
+                 qname = None,
+                 rdtype = None,
+                 duration = None,
+                 outcome = None,
+                 answer_count = None,
+                 cache_hit = None,
+                 time = None):
+        """
+        @param qname: The query name.
+
+        @param rdtype: The query type, e.g., "CNAME" or "SRV".
+
+        @param duration: The time taken to answer the query, in seconds.
+
+        @param outcome: "NOERROR" if the query was answered, otherwise the
+        name of the exception class, e.g., "NXDOMAIN", "NoAnswer", or
+        "LifetimeTimeout".
+
+        @param answer_count: The number of records in the answer.
+
+        @param cache_hit: True if the query was answered from the cache.
+
+        @param time: The time at which the query was made.
+        """
+        self.qname = qname
+        self.rdtype = rdtype
+        self.duration = duration
+        self.outcome = outcome
+        self.answer_count = answer_count
+        self.cache_hit = cache_hit
+        self.time = time
+
+
+class DnsQueryStats:
+    """
+    Totals and a latency histogram for the queries of one record type.
+    Queries answered from the cache are counted, but not included in the
+    latency histogram.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.cache_hits = 0
+        self.outcomes = collections.Counter()
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+    def add(self, record):
+        self.queries += 1
+        self.outcomes[record.outcome] += 1
+
+        if record.cache_hit:
+            self.cache_hits += 1
+        else:
+            self.histogram[self._get_bucket(record.duration)] += 1
+            self.total_duration += record.duration
+            self.max_duration = max(self.max_duration, record.duration)
+
+    def get_mean_duration(self):
+        network_queries = self.queries - self.cache_hits
+
+        if network_queries > 0:
+            return self.total_duration / network_queries
+        else:
+            return None
+
+    def _get_bucket(self, duration):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                return i
+
+        return len(LATENCY_BUCKETS)
+
+    def to_dict(self):
+        return {
+            "queries": self.queries,
+            "cache_hits": self.cache_hits,
+            "outcomes": dict(self.outcomes),
+            "mean_duration": self.get_mean_duration(),
+            "max_duration": self.max_duration,
+            "histogram": {
+                "bounds": LATENCY_BUCKETS,
+                "counts": self.histogram
+            }
+        }
+
+
+class DnsMetrics:
+    """
+    Collects the timing and outcome of each DNS query made by L{DnsResolver}.
+    Totals and latency histograms are kept for each record type, and details
+    of the most recent queries are kept individually.
+    """
+    def __init__(self, max_records = 1000):
+        """
+        @param max_records: The number of recent queries to keep details of.
+        """
+        self._records = collections.deque(maxlen = max_records)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, qname, rdtype, duration, outcome, answer_count, cache_hit):
+        """
+        Record the result of a query. See L{DnsQueryRecord}.
+        """
+        record = DnsQueryRecord(qname = qname,
+                                rdtype = rdtype,
+                                duration = duration,
+                                outcome = outcome,
+                                answer_count = answer_count,
+                                cache_hit = cache_hit,
+                                time = time.time())
+
+        with self._lock:
+            self._records.append(record)
+
+            stats = self._stats.get(rdtype)
+
+            if stats is None:
+                stats = DnsQueryStats()
+                self._stats[rdtype] = stats
+
+            stats.add(record)
+
+    def get_records(self):
+        """
+        Return a list of L{DnsQueryRecord} objects for the most recent queries.
+        """
+        with self._lock:
+            return list(self._records)
+
+    def get_stats(self, rdtype):
+        """
+        Return the L{DnsQueryStats} object for the given record type, or None
+        if no queries of that type have been made.
+        """
+        return self._stats.get(rdtype)
+
+    def get_summary(self):
+        """
+        Return a list of strings summarising the queries of each record type.
+        """
+        lines = []
+
+        with self._lock:
+            for rdtype in sorted(self._stats):
+                stats = self._stats[rdtype]
+                mean_duration = stats.get_mean_duration()
+
+                if mean_duration is not None:
+                    latency = "mean %.1f ms, max %.1f ms" % (mean_duration * 1000,
+                                                             stats.max_duration * 1000)
+                else:
+                    latency = "no network queries"
+
+                outcomes = ", ".join("%s %d" % (outcome, count)
+                                     for outcome, count in sorted(stats.outcomes.items()))
+
+                lines.append("%s: %d queries, %d from cache, %s (%s)" %
+                             (rdtype, stats.queries, stats.cache_hits, latency, outcomes))
+
+        return lines
+
+    def save(self, filename):
+        """
+        Write the totals, histograms, and recent queries to a JSON file.
+        """
+        with self._lock:
+            data = {
+                "stats": dict((rdtype, stats.to_dict()) for rdtype, stats in self._stats.items()),
+                "queries": [vars(record) for record in self._records]
+            }
+
+        try:
+            with open(filename, "w") as f:
+                json.dump(data, f, indent = 2)
+        except OSError as e:
+            logging.warning("Couldn't save DNS metrics to %s: %s" % (filename, e))
@@ -12,9 +12,19 @@
 # implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
+import collections
+import dns.rdatatype
 import dns.resolver
+import json
 import logging
+import os
+import random
 import socket
+import threading
+import time
+
+from .dns_backend import SystemDnsBackend
+from .dns_metrics import DnsMetrics
 
 
 class ServiceRecord:
@@ -33,24 +43,263 @@ class ServiceRecord:
         self.weight = weight
 
 
+# Names that always refer to the local host.
+LOOPBACK_NAMES = frozenset(["localhost", "127.0.0.1", "::1"])
+
+
+def order_services(services, rng = random):
+    """
+    Return a list of ServiceRecord objects sorted into the order in which
+    connections should be attempted, as described in RFC 2782: by ascending
+    priority, and within each priority, by weighted random selection.
+    """
+    def get_priority(service):
+        return service.priority if service.priority is not None else 0
+
+    def get_weight(service):
+        return service.weight if service.weight is not None else 0
+
+    ordered = []
+
+    for priority in sorted(set(get_priority(service) for service in services)):
+        # RFC 2782 places zero-weight records first, so that they have a small
+        # chance of being selected before any others.
+        remaining = [service for service in services if get_priority(service) == priority]
+        remaining.sort(key = lambda service: get_weight(service) != 0)
+
+        while len(remaining) > 0:
+            total_weight = sum(get_weight(service) for service in remaining)
+            selection = rng.randint(0, total_weight)
+            running_sum = 0
+
+            for i, service in enumerate(remaining):
+                running_sum += get_weight(service)
+
+                if running_sum >= selection:
+                    ordered.append(remaining.pop(i))
+                    break
+
+    return ordered
+
+
+class DnsCacheEntry:
+    def __init__(self, value, expires, ttl, hits = 0):
+        self.value = value
+        self.expires = expires
+        self.ttl = ttl
+        self.hits = hits
+
+
+class DnsCache:
+    """
+    A size-bounded, least-recently-used cache of DNS query results. Each entry
+    expires when the TTL of the DNS answer it was created from runs out.
+    """
+    def __init__(self, max_size = 1000, clock = time.time):
+        """
+        @param max_size: The maximum number of entries to hold. When full, the
+        least recently used entry is evicted.
+
+        @param clock: Function returning the current time, in seconds.
+        """
+        self._max_size = max_size
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, count_miss = True):
+        """
+        Return the cached value for the given key, or None if there is no
+        entry or the entry has expired.
+
+        @param count_miss: Whether to count a miss if there is no entry. If
+        False, the caller should call L{record_miss} if the value isn't found
+        elsewhere either.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry.expires <= self._clock():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                if count_miss:
+                    self._misses += 1
+
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            entry.hits += 1
+            return entry.value
+
+    def record_miss(self):
+        with self._lock:
+            self._misses += 1
+
+    def put(self, key, value, ttl):
+        """
+        Add a value to the cache, to expire after ttl seconds.
+        """
+        self.put_expiring(key, value, self._clock() + ttl)
+
+    def put_expiring(self, key, value, expires):
+        """
+        Add a value to the cache, to expire at the given time. If the key is
+        already present, the new entry inherits half of its access count, so
+        that popularity decays over successive refreshes.
+        """
+        now = self._clock()
+
+        if expires <= now:
+            return
+
+        with self._lock:
+            hits = 0
+
+            previous_entry = self._entries.get(key)
+
+            if previous_entry is not None:
+                hits = previous_entry.hits // 2
+
+            self._entries[key] = DnsCacheEntry(value, expires, expires - now, hits)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last = False)
+
+    def get_entries(self):
+        """
+        Return a list of (key, value, expires) tuples for all unexpired
+        entries, from least to most recently used.
+        """
+        now = self._clock()
+
+        with self._lock:
+            return [(key, entry.value, entry.expires)
+                    for key, entry in self._entries.items()
+                    if entry.expires > now]
+
+    def get_expiring(self, fraction, min_window, min_hits):
+        """
+        Return a list of the keys of entries that will expire soon, and that
+        have been accessed at least min_hits times. An entry expires soon if
+        its remaining time is less than the given fraction of its TTL, or
+        less than min_window seconds.
+        """
+        now = self._clock()
+
+        with self._lock:
+            return [key for key, entry in self._entries.items()
+                    if entry.hits >= min_hits
+                    and entry.expires - now <= max(entry.ttl * fraction, min_window)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_hits(self):
+        return self._hits
+
+    def get_misses(self):
+        return self._misses
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DnsPrefetcher(threading.Thread):
+    """
+    A worker thread that periodically re-queries popular cached answers
+    shortly before they expire, so that lookups of frequently used stations
+    are always served from the cache.
+    """
+    def __init__(self, dns_resolver, interval = 5.0, fraction = 0.1, min_hits = 2):
+        """
+        @param dns_resolver: The L{DnsResolver} whose cache to refresh.
+
+        @param interval: The time between checks for expiring answers, in
+        seconds.
+
+        @param fraction: Answers are refreshed when this fraction of their
+        TTL remains.
+
+        @param min_hits: The number of times an answer must have been used
+        before it is refreshed.
+        """
+        threading.Thread.__init__(self, name = "dns-prefetch", daemon = True)
+
+        self._dns_resolver = dns_resolver
+        self._interval = interval
+        self._fraction = fraction
+        self._min_hits = min_hits
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self._interval):
+            self._dns_resolver.prefetch(self._fraction,
+                                        self._interval * 2,
+                                        self._min_hits)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
 class DnsResolver:
     """
-    A simple wrapper for the dns.resolver.Resolver class.
+    Looks up RadioDNS CNAME and SRV records. Answers are cached for the
+    duration of their TTL. Negative answers (NXDOMAIN and NoAnswer)
+    are cached separately, as described in RFC 2308.
     """
-    def __init__(self):
-        self._resolver = dns.resolver.get_default_resolver()
+    def __init__(self,
+                 cache_size = 1000,
+                 negative_cache_size = 1000,
+                 lifetime = None,
+                 backend = None,
+                 clock = time.time):
+        """
+        @param cache_size: The maximum number of answers to cache.
 
-        # List of all host names (unqualified, fully-qualified, and IP
+        @param negative_cache_size: The maximum number of negative answers
+        to cache.
+
+        @param lifetime: The time limit for each query, in seconds, or None
+        to use the system resolver's default.
+
+        @param backend: The L{DnsBackend} used to make queries. By default,
+        queries are sent to the system's configured name servers.
+
+        @param clock: Function returning the current time, in seconds, used
+        to expire cached answers.
+        """
+        if backend is None:
+            backend = SystemDnsBackend()
+
+        self._backend = backend
+        self._lifetime = lifetime
+        self._cache = DnsCache(cache_size, clock)
+        self._negative_cache = DnsCache(negative_cache_size, clock)
+        self._metrics = DnsMetrics()
+
+        # Set of all host names (unqualified, fully-qualified, and IP
         # addresses) that refer to the local host (both loopback interface
         # and external interfaces). This is used for determining
         # preferred targets.
-        self._localhost_names = [
-            "localhost",
-            "127.0.0.1",
-            socket.gethostbyname(socket.gethostname()),
-            socket.gethostname(),
-            socket.getfqdn(socket.gethostname())
-        ]
+        #
+        # Looking up the host's own names can be slow on machines with slow
+        # reverse DNS, so this is done on a background thread, and is_local()
+        # only waits for it if the host isn't a literal loopback name.
+        self._localhost_names = set(LOOPBACK_NAMES)
+        self._localhost_names_ready = threading.Event()
+
+        thread = threading.Thread(target = self._find_localhost_names,
+                                  name = "localhost-names",
+                                  daemon = True)
+        thread.start()
 
     def get_cname(self, host):
         """
@@ -62,23 +311,44 @@ class DnsResolver:
             # Don't perform DNS lookup for localhost.
             cname = host
         else:
-            self.log("Resolving host: " + host)
+            start_time = time.monotonic()
 
-            try:
-                ans = self._resolver.query(host, 'CNAME')
+            cname, negative_answer = self._get_cached((host, 'CNAME'))
+
+            if cname is not None:
+                self.log("Resolved host from cache: " + host)
+                self._record_cache_hit(host, 'CNAME', start_time, "NOERROR", 1)
+            elif negative_answer is not None:
+                self.log("Unknown host (cached): " + host)
+                self._record_cache_hit(host, 'CNAME', start_time, negative_answer, 0)
+            else:
+                cname = self._query_cname(host)
 
-                if len(ans.rrset.items) == 1:
-                    # Remove last (blank) field from host name.
-                    labels = ans[0].target.labels[0:-1]
-                    labels = map(lambda s: str(s, 'utf-8'), labels)
-                    cname = '.'.join(labels)
+        return cname
+
+    def _query_cname(self, host):
+        cname = None
 
-            except dns.resolver.NoAnswer as e:
-                self.log("No answer")
-            except dns.resolver.NXDOMAIN as e:
-                pass
-            except dns.exception.DNSException as e:
-                self.log("Exception: " + str(type(e)))
+        self.log("Resolving host: " + host)
+
+        try:
+            ans = self._query(host, 'CNAME')
+
+            if len(ans.rrset.items) == 1:
+                # Remove last (blank) field from host name.
+                labels = ans[0].target.labels[0:-1]
+                labels = map(lambda s: str(s, 'utf-8'), labels)
+                cname = '.'.join(labels)
+
+                self._cache.put((host, 'CNAME'), cname, ans.rrset.ttl)
+
+        except dns.resolver.NoAnswer as e:
+            self.log("No answer")
+            self._put_negative((host, 'CNAME'), e)
+        except dns.resolver.NXDOMAIN as e:
+            self._put_negative((host, 'CNAME'), e)
+        except dns.exception.DNSException as e:
+            self.log("Exception: " + str(type(e)))
 
         return cname
 
@@ -87,26 +357,82 @@ class DnsResolver:
         Return a list of ServiceRecord objects for the DNS SRV records on the
         given host.
         """
-        ans = None
-
         # Form service record query: _radiovis._tcp at example.com
         # becomes _radiovis._tcp.example.com
         query = '.'.join([srv_record, host_name])
 
+        start_time = time.monotonic()
+
+        records, negative_answer = self._get_cached((query, 'SRV'))
+
+        if records is not None:
+            self.log("Querying from cache: " + query)
+            self._record_cache_hit(query, 'SRV', start_time, "NOERROR", len(records))
+        elif negative_answer is not None:
+            self.log("No services (cached): " + query)
+            self._record_cache_hit(query, 'SRV', start_time, negative_answer, 0)
+            records = []
+        else:
+            records = self._query_services(query)
+
+        services = []
+
+        if len(records) > 0:
+            for port, priority, target, weight in records:
+                self.log("Found: " + target + ", port " + str(port))
+
+                service_record = ServiceRecord(name = service_name,
+                                               query = query,
+                                               port = port,
+                                               priority = priority,
+                                               target = target,
+                                               weight = weight)
+                services.append(service_record)
+        else:
+            self.log("No services")
+
+        return services
+
+    def _get_cached(self, key):
+        """
+        Look up a query in the cache and then the negative cache. Returns a
+        tuple of the cached value and the cached negative answer, both None
+        if neither cache has an entry. Only then is a miss counted against
+        the cache, so that negative cache hits aren't also counted as misses.
+        """
+        value = self._cache.get(key, count_miss = False)
+
+        if value is not None:
+            return (value, None)
+
+        negative_answer = self._negative_cache.get(key)
+
+        if negative_answer is None:
+            self._cache.record_miss()
+
+        return (None, negative_answer)
+
+    def _query_services(self, query):
+        """
+        Return a list of (port, priority, target, weight) tuples for the DNS
+        SRV records found by the given query.
+        """
+        ans = None
+        records = []
+
         self.log("Querying: " + query)
 
         try:
-            ans = self._resolver.query(query, 'SRV')
+            ans = self._query(query, 'SRV')
 
         except dns.resolver.NoAnswer as e:
             self.log("No answer")
+            self._put_negative((query, 'SRV'), e)
         except dns.resolver.NXDOMAIN as e:
-            pass
+            self._put_negative((query, 'SRV'), e)
         except dns.exception.DNSException as e:
             self.log("Exception: " + str(type(e)))
 
-        services = []
-
         if ans is not None and len(ans) > 0:
             for record in ans:
                 # Remove last (blank) field from hostname then create
@@ -115,21 +441,177 @@ class DnsResolver:
                 target = map(lambda s: str(s, 'utf-8'), target)
                 target = ".".join(target)
 
-                self.log("Found: " + target + ", port " + str(record.port))
+                records.append((record.port, record.priority, target, record.weight))
 
-                service_record = ServiceRecord(name = service_name,
-                                               query = query,
-                                               port = record.port,
-                                               priority = record.priority,
-                                               target = target,
-                                               weight = record.weight)
-                services.append(service_record)
-        else:
-            self.log("No services")
+            self._cache.put((query, 'SRV'), records, ans.rrset.ttl)
 
-        return services
+        return records
+
+    def _query(self, qname, rdtype):
+        """
+        Make a query using the backend, and record its timing and outcome.
+        """
+        start_time = time.monotonic()
+        outcome = "NOERROR"
+        answer_count = 0
+
+        try:
+            ans = self._backend.query(qname, rdtype, lifetime = self._lifetime)
+            answer_count = len(ans)
+            return ans
+        except dns.exception.DNSException as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            self._metrics.record(qname,
+                                 rdtype,
+                                 time.monotonic() - start_time,
+                                 outcome,
+                                 answer_count,
+                                 cache_hit = False)
+
+    def _record_cache_hit(self, qname, rdtype, start_time, outcome, answer_count):
+        self._metrics.record(qname,
+                             rdtype,
+                             time.monotonic() - start_time,
+                             outcome,
+                             answer_count,
+                             cache_hit = True)
+
+    def _put_negative(self, key, exception):
+        """
+        Cache a negative answer, given the NXDOMAIN or NoAnswer exception
+        raised by the resolver.
+        """
+        ttl = self._get_negative_ttl(exception)
+
+        if ttl is not None:
+            self._negative_cache.put(key, type(exception).__name__, ttl)
+
+    def _get_negative_ttl(self, exception):
+        """
+        Return the TTL for a negative answer: the lesser of the TTL of the SOA
+        record in the authority section of the response, and the SOA MINIMUM
+        field (RFC 2308, section 5). Returns None if the response has no SOA
+        record, in which case the answer should not be cached.
+        """
+        try:
+            if isinstance(exception, dns.resolver.NXDOMAIN):
+                responses = list(exception.responses().values())
+            else:
+                responses = [exception.response()]
+        except (KeyError, AttributeError):
+            return None
+
+        for response in responses:
+            for rrset in response.authority:
+                if rrset.rdtype == dns.rdatatype.SOA and len(rrset) > 0:
+                    return min(rrset.ttl, rrset[0].minimum)
+
+        return None
+
+    def prefetch(self, fraction, min_window, min_hits):
+        """
+        Re-query any cached answers that will expire soon and have been used
+        at least min_hits times. See L{DnsCache.get_expiring}.
+        """
+        for name, rdtype in self._cache.get_expiring(fraction, min_window, min_hits):
+            self.log("Refreshing: " + name)
+
+            if rdtype == 'CNAME':
+                self._query_cname(name)
+            elif rdtype == 'SRV':
+                self._query_services(name)
+
+    def load_cache(self, filename):
+        """
+        Load cached answers previously saved by L{save_cache}. Answers that
+        have expired since they were saved are ignored.
+        """
+        try:
+            with open(filename, "r") as f:
+                data = json.load(f)
+
+            for name, rdtype, value, expires in data["answers"]:
+                if rdtype == 'SRV':
+                    value = [tuple(record) for record in value]
+
+                self._cache.put_expiring((name, rdtype), value, expires)
+
+            for name, rdtype, value, expires in data["negative_answers"]:
+                self._negative_cache.put_expiring((name, rdtype), value, expires)
+
+            self.log("Loaded DNS cache: %d answers, %d negative answers" %
+                     (len(self._cache), len(self._negative_cache)))
+
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning("Couldn't load DNS cache from %s: %s" % (filename, e))
+
+    def save_cache(self, filename):
+        """
+        Save the cached answers, with their expiry times, to a file.
+        """
+        data = {
+            "answers": [[name, rdtype, value, expires]
+                        for (name, rdtype), value, expires in self._cache.get_entries()],
+
+            "negative_answers": [[name, rdtype, value, expires]
+                                 for (name, rdtype), value, expires in self._negative_cache.get_entries()]
+        }
+
+        # Write to a temporary file first, so that an existing cache file is
+        # not left truncated if writing fails.
+        temp_filename = filename + ".tmp"
+
+        try:
+            with open(temp_filename, "w") as f:
+                json.dump(data, f)
+
+            os.replace(temp_filename, filename)
+
+        except OSError as e:
+            logging.warning("Couldn't save DNS cache to %s: %s" % (filename, e))
+
+    def get_cache(self):
+        """
+        Return the L{DnsCache} object holding resolved answers.
+        """
+        return self._cache
+
+    def get_metrics(self):
+        """
+        Return the L{DnsMetrics} object holding query timings and outcomes.
+        """
+        return self._metrics
+
+    def get_negative_cache(self):
+        """
+        Return the L{DnsCache} object holding negative (NXDOMAIN and NoAnswer)
+        answers.
+        """
+        return self._negative_cache
+
+    def _find_localhost_names(self):
+        try:
+            hostname = socket.gethostname()
+            names = [hostname, socket.getfqdn(hostname)]
+
+            try:
+                names.append(socket.gethostbyname(hostname))
+            except OSError:
+                pass # The host name may not resolve to an address.
+
+            self._localhost_names.update(names)
+        finally:
+            self._localhost_names_ready.set()
 
     def is_local(self, host):
+        if host in LOOPBACK_NAMES:
+            return True
+
+        self._localhost_names_ready.wait()
         return host in self._localhost_names
 
     def log(self, message):
@@ -0,0 +1,115 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import concurrent.futures
+import logging
+
+
+class FleetResult:
+    """
+    The result of resolving one radio station against one RadioDNS domain.
+    """
+    def __init__(self,
+                 station = None,
+                 domain = None,
+                 hostname = None,
+                 cname = None,
+                 services = None):
+        self.station = station
+        self.domain = domain
+        self.hostname = hostname
+        self.cname = cname
+        self.services = services if services is not None else []
+
+
+class FleetResolver:
+    """
+    Resolves the CNAME and RadioDNS services for every radio station in a
+    list, against every RadioDNS domain, running a bounded number of
+    resolutions concurrently.
+    """
+    def __init__(self, dns_resolver, radiodns_services, concurrency = 32):
+        """
+        @param dns_resolver: The L{DnsResolver} object used to make queries.
+
+        @param radiodns_services: The RadioDNS services to look up
+        (L{RadioDnsService} objects).
+
+        @param concurrency: The maximum number of stations to resolve at
+        the same time.
+        """
+        if concurrency < 1:
+            raise ValueError("Invalid concurrency")
+
+        self._dns = dns_resolver
+        self._radiodns_services = list(radiodns_services)
+        self._concurrency = concurrency
+
+    def resolve(self, radio_stations, radiodns_domains):
+        """
+        Resolve each of the radio stations against each of the RadioDNS
+        domains. This is a generator, which yields L{FleetResult} objects in
+        the order the resolutions complete.
+        """
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers = self._concurrency,
+            thread_name_prefix = "fleet")
+
+        pending = set()
+
+        try:
+            for domain in list(radiodns_domains):
+                for station in list(radio_stations):
+                    future = executor.submit(self._resolve_station, station, domain)
+                    pending.add(future)
+
+                    # Limit the number of queued jobs, so that results are
+                    # yielded while the remaining jobs are being submitted.
+                    if len(pending) >= self._concurrency * 2:
+                        done, pending = concurrent.futures.wait(
+                            pending,
+                            return_when = concurrent.futures.FIRST_COMPLETED)
+
+                        for completed in done:
+                            yield completed.result()
+
+            for future in concurrent.futures.as_completed(pending):
+                yield future.result()
+        finally:
+            executor.shutdown(wait = True, cancel_futures = True)
+
+    def _resolve_station(self, station, domain):
+        hostname = station.get_hostname(domain)
+
+        result = FleetResult(station = station,
+                             domain = domain,
+                             hostname = hostname)
+
+        try:
+            result.cname = self._dns.get_cname(hostname)
+
+            if result.cname is not None:
+                for service in self._radiodns_services:
+                    services = self._dns.get_services(service.get_record(),
+                                                      result.cname,
+                                                      service.get_name())
+
+                    result.services.extend(services)
+        except Exception as e:
+            self.log("Error resolving %s: %s" % (hostname, e))
+
+        return result
+
+    def log(self, message):
+        logging.info(message)
@@ -0,0 +1,1134 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import concurrent.futures
+import logging
+import queue
+import re
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+import zlib
+
+from .image_cache import get_freshness_lifetime
+
+
+class HttpError(Exception):
+    """
+    Raised when an HTTP response can't be read.
+    """
+    pass
+
+
+class HttpTimeout(HttpError):
+    """
+    Raised when a request doesn't complete within its time limits.
+    """
+    pass
+
+
+class HttpConnectionClosed(HttpError):
+    """
+    Raised when the server closes the connection before responding to a
+    request, as happens when a server closes an idle connection just as it is
+    reused.
+    """
+    pass
+
+
+class HttpCancelled(HttpError):
+    """
+    Raised when a request is cancelled.
+    """
+    pass
+
+
+class HttpRequestContext:
+    """
+    The time limits for a request, and a means of cancelling it. While a
+    request is in progress, it can be cancelled from another thread, which
+    closes its connection so that the request stops straight away.
+    """
+    def __init__(self, connect_timeout = 5.0, first_byte_timeout = 10.0, total_timeout = 30.0):
+        """
+        @param connect_timeout: The time limit for establishing each
+        connection (including the TLS handshake), in seconds.
+
+        @param first_byte_timeout: The time limit for the server to start
+        responding after each request is sent, in seconds.
+
+        @param total_timeout: The time limit for the whole request, including
+        any redirects, in seconds.
+        """
+        self.connect_timeout = connect_timeout
+        self.first_byte_timeout = first_byte_timeout
+        self.total_timeout = total_timeout
+
+        self.cancelled = False
+        self.timed_out = False
+
+        self._deadline = None
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._deadline = time.monotonic() + self.total_timeout
+
+    def get_remaining_time(self):
+        """
+        Return the time remaining before the request times out, in seconds.
+        """
+        return max(self._deadline - time.monotonic(), 0)
+
+    def check(self):
+        """
+        Raise an exception if the request has been cancelled or has timed
+        out.
+        """
+        if self.cancelled:
+            raise HttpCancelled("Request cancelled")
+
+        if self.timed_out or self.get_remaining_time() == 0:
+            raise HttpTimeout("Request timed out")
+
+    def set_connection(self, connection):
+        """
+        Set the connection being used for the request, or None once the
+        request has completed. Returns False if the request was cancelled
+        or timed out while using the previous connection, which must then
+        not be reused.
+        """
+        with self._lock:
+            aborted = self.cancelled or self.timed_out
+
+            if connection is not None and aborted:
+                connection.abort()
+
+            self._connection = connection
+            return not aborted
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            self._abort()
+
+    def expire(self):
+        """
+        Called when the total time limit has passed.
+        """
+        with self._lock:
+            self.timed_out = True
+            self._abort()
+
+    def _abort(self):
+        if self._connection is not None:
+            self._connection.abort()
+
+
+class HttpResponse:
+    def __init__(self, status = None, headers = None, body = None, url = None):
+        """
+        @param status: The HTTP status code.
+
+        @param headers: A dict of response headers, with lower-case names.
+
+        @param body: The response body, as bytes.
+
+        @param url: The URL the response was received from, after following
+        any redirects.
+        """
+        self.status = status
+        self.headers = headers if headers is not None else {}
+        self.body = body
+        self.url = url
+
+
+class HttpConnection:
+    """
+    A persistent HTTP/1.1 connection to a server, optionally over TLS.
+    """
+    # Limit on the length of the status line and each header line.
+    MAX_LINE_LENGTH = 8192
+
+    # Size of each read when the body length isn't known in advance.
+    READ_SIZE = 65536
+
+    def __init__(self,
+                 host,
+                 port,
+                 timeout = 30.0,
+                 ssl_context = None,
+                 tls_session = None,
+                 tunnel = None):
+        """
+        @param host: The server's host name, or the proxy server's if tunnel
+        is given.
+
+        @param port: The server's port, or the proxy server's if tunnel is
+        given.
+
+        @param ssl_context: An ssl.SSLContext for making a TLS connection, or
+        None for a plain connection.
+
+        @param tls_session: An ssl.SSLSession from an earlier connection to
+        the same server, to resume, or None.
+
+        @param tunnel: A (host, port) tuple of the server to connect to
+        through an HTTP proxy server using the CONNECT method, or None.
+        """
+        self._sock = socket.create_connection((host, port), timeout)
+
+        try:
+            if tunnel is not None:
+                self._connect_tunnel(*tunnel)
+                host = tunnel[0]
+
+            if ssl_context is not None:
+                self._sock = ssl_context.wrap_socket(self._sock,
+                                                     server_hostname = host,
+                                                     session = tls_session)
+        except Exception:
+            self._sock.close()
+            raise
+
+        self._reader = self._sock.makefile("rb")
+        self.last_used = time.monotonic()
+        self.reusable = False
+
+    def _connect_tunnel(self, host, port):
+        request = "CONNECT %s:%d HTTP/1.1\r\n" % (host, port)
+        request += "Host: %s:%d\r\n" % (host, port)
+        request += "\r\n"
+
+        self._sock.sendall(request.encode("utf-8"))
+
+        # Read the proxy server's response a byte at a time, so that nothing
+        # sent by the server after the tunnel is established is consumed.
+        response = b""
+
+        while not response.endswith(b"\r\n\r\n"):
+            data = self._sock.recv(1)
+
+            if len(data) == 0:
+                raise HttpError("Connection closed by proxy server")
+
+            response += data
+
+            if len(response) > self.MAX_LINE_LENGTH:
+                raise HttpError("Proxy server response too long")
+
+        status_line = response.split(b"\r\n", 1)[0].decode("iso-8859-1")
+        match = re.match(r"^HTTP/\d+\.\d+ (\d{3})", status_line)
+
+        if match is None or match.group(1) != "200":
+            raise HttpError("Proxy server refused tunnel: " + status_line)
+
+    def get_tls_session(self):
+        """
+        Return the connection's ssl.SSLSession, or None if the connection is
+        not using TLS.
+        """
+        return getattr(self._sock, "session", None)
+
+    def is_tls_session_reused(self):
+        return getattr(self._sock, "session_reused", False)
+
+    def request(self,
+                path,
+                host_header,
+                headers = None,
+                max_body_size = None,
+                first_byte_timeout = None,
+                read_timeout = None):
+        """
+        Send a GET request and return an HttpResponse object. After this
+        returns, the connection's reusable attribute indicates whether it can
+        be used for another request.
+
+        @param max_body_size: The maximum size of the response body, in bytes,
+        or None for no limit. Raises HttpError if the body is larger.
+
+        @param first_byte_timeout: The time limit for the server to start
+        responding, in seconds, or None for no limit.
+
+        @param read_timeout: The time limit for each read of the response
+        body, in seconds, or None for no limit.
+        """
+        request = "GET %s HTTP/1.1\r\n" % path
+        request += "Host: %s\r\n" % host_header
+        request += "User-Agent: RadioVISDemo\r\n"
+        request += "Accept: */*\r\n"
+        request += "Accept-Encoding: gzip\r\n"
+
+        if headers is not None:
+            for name, value in headers.items():
+                request += "%s: %s\r\n" % (name, value)
+
+        request += "\r\n"
+
+        self.reusable = False
+        self._sock.settimeout(first_byte_timeout)
+
+        try:
+            self._sock.sendall(request.encode("utf-8"))
+            version, status = self._read_status_line()
+        except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError) as e:
+            raise HttpConnectionClosed("Connection closed by server: %s" % e)
+
+        self._sock.settimeout(read_timeout)
+        response_headers = self._read_headers()
+
+        response = HttpResponse(status = status, headers = response_headers)
+
+        connection = response_headers.get("connection", "").lower()
+        keep_alive = (version == "1.1" and connection != "close") or connection == "keep-alive"
+
+        if status == 204 or status == 304 or 100 <= status <= 199:
+            response.body = b""
+            self.reusable = keep_alive
+        elif "transfer-encoding" in response_headers:
+            if response_headers["transfer-encoding"].lower() != "chunked":
+                raise HttpError("Unsupported transfer encoding: " + response_headers["transfer-encoding"])
+
+            response.body = self._read_chunked_body(max_body_size)
+            self.reusable = keep_alive
+        elif "content-length" in response_headers:
+            content_length = self._get_content_length(response_headers)
+
+            # Give up before reading anything if the body is too large.
+            if max_body_size is not None and content_length > max_body_size:
+                raise HttpError("Response too large: %d bytes" % content_length)
+
+            response.body = self._read_body(content_length)
+            self.reusable = keep_alive
+        else:
+            # The end of the body is marked by the server closing the
+            # connection.
+            response.body = self._read_until_close(max_body_size)
+
+        content_encoding = response_headers.get("content-encoding", "identity").lower()
+
+        if content_encoding in ("gzip", "x-gzip"):
+            response.body = self._decompress(response.body, max_body_size)
+        elif content_encoding != "identity":
+            raise HttpError("Unsupported content encoding: " + content_encoding)
+
+        self.last_used = time.monotonic()
+
+        return response
+
+    def _read_line(self):
+        line = self._reader.readline(self.MAX_LINE_LENGTH + 1)
+
+        if len(line) == 0:
+            raise HttpError("Connection closed by server")
+
+        if len(line) > self.MAX_LINE_LENGTH:
+            raise HttpError("Response header line too long")
+
+        return line.rstrip(b"\r\n").decode("iso-8859-1")
+
+    def _read_status_line(self):
+        line = self._reader.readline(self.MAX_LINE_LENGTH + 1)
+
+        if len(line) == 0:
+            raise HttpConnectionClosed("Connection closed by server")
+
+        if len(line) > self.MAX_LINE_LENGTH:
+            raise HttpError("Response header line too long")
+
+        line = line.rstrip(b"\r\n").decode("iso-8859-1")
+        match = re.match(r"^HTTP/(\d+\.\d+) (\d{3})", line)
+
+        if match is None:
+            raise HttpError("Invalid status line: " + line)
+
+        return match.group(1), int(match.group(2))
+
+    def _read_headers(self):
+        headers = {}
+
+        while True:
+            line = self._read_line()
+
+            if len(line) == 0:
+                break
+
+            name, separator, value = line.partition(":")
+
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+
+        return headers
+
+    def _get_content_length(self, headers):
+        try:
+            content_length = int(headers["content-length"])
+        except ValueError:
+            raise HttpError("Invalid Content-Length: " + headers["content-length"])
+
+        if content_length < 0:
+            raise HttpError("Invalid Content-Length: " + headers["content-length"])
+
+        return content_length
+
+    def _read_body(self, length):
+        """
+        Read a body of known length into a buffer allocated up front.
+        """
+        body = bytearray(length)
+        view = memoryview(body)
+        position = 0
+
+        while position < length:
+            count = self._reader.readinto(view[position:])
+
+            if count == 0:
+                raise HttpError("Connection closed before end of response")
+
+            position += count
+
+        return bytes(body)
+
+    def _read_chunked_body(self, max_body_size):
+        body = bytearray()
+
+        while True:
+            line = self._read_line()
+
+            # Ignore any chunk extensions.
+            size = line.split(";", 1)[0].strip()
+
+            try:
+                chunk_size = int(size, 16)
+            except ValueError:
+                raise HttpError("Invalid chunk size: " + line)
+
+            if chunk_size < 0:
+                raise HttpError("Invalid chunk size: " + line)
+
+            if chunk_size == 0:
+                break
+
+            if max_body_size is not None and len(body) + chunk_size > max_body_size:
+                raise HttpError("Response too large: over %d bytes" % max_body_size)
+
+            body += self._read_body(chunk_size)
+
+            # Each chunk is followed by CRLF.
+            if self._read_line() != "":
+                raise HttpError("Invalid chunk terminator")
+
+        # Skip any trailer fields.
+        self._read_headers()
+
+        return bytes(body)
+
+    def _decompress(self, data, max_body_size):
+        # Limit the decompressed size, so that a small, highly compressed
+        # body can't use a large amount of memory.
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        try:
+            if max_body_size is not None:
+                body = decompressor.decompress(data, max_body_size + 1)
+            else:
+                body = decompressor.decompress(data)
+        except zlib.error as e:
+            raise HttpError("Invalid gzip data: %s" % e)
+
+        if max_body_size is not None and len(body) > max_body_size:
+            raise HttpError("Response too large: over %d bytes" % max_body_size)
+
+        return body
+
+    def _read_until_close(self, max_body_size):
+        body = bytearray()
+        buffer = bytearray(self.READ_SIZE)
+        view = memoryview(buffer)
+
+        while True:
+            count = self._reader.readinto(buffer)
+
+            if count == 0:
+                break
+
+            if max_body_size is not None and len(body) + count > max_body_size:
+                raise HttpError("Response too large: over %d bytes" % max_body_size)
+
+            body += view[:count]
+
+        return bytes(body)
+
+    def abort(self):
+        """
+        Stop a request in progress on another thread, by shutting down the
+        connection. Any blocked read returns straight away.
+        """
+        self.reusable = False
+
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+
+class HttpConnectionPool:
+    """
+    Keeps idle HTTP connections open, so that they can be reused for later
+    requests to the same server.
+    """
+    def __init__(self, max_idle_per_host = 4, idle_timeout = 30.0):
+        """
+        @param max_idle_per_host: The maximum number of idle connections to
+        keep for each server.
+
+        @param idle_timeout: The time after which idle connections are
+        closed, in seconds.
+        """
+        self._max_idle_per_host = max_idle_per_host
+        self._idle_timeout = idle_timeout
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return an idle connection for the given (host, port) key, or None if
+        there are none.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            connections = self._connections.get(key, [])
+
+            while len(connections) > 0:
+                connection = connections.pop()
+
+                if now - connection.last_used < self._idle_timeout:
+                    return connection
+
+                connection.close()
+
+        return None
+
+    def put(self, key, connection):
+        """
+        Return a connection to the pool once a request has completed.
+        """
+        with self._lock:
+            connections = self._connections.setdefault(key, [])
+
+            if len(connections) < self._max_idle_per_host:
+                connections.append(connection)
+                connection = None
+
+        if connection is not None:
+            connection.close()
+
+    def close_all(self):
+        with self._lock:
+            for connections in self._connections.values():
+                for connection in connections:
+                    connection.close()
+
+            self._connections.clear()
+
+
+class HttpClient:
+    """
+    Makes HTTP and HTTPS GET requests, reusing connections from an
+    HttpConnectionPool. Redirects are followed, and permanent redirects (and
+    temporary ones that the server allows to be cached) are remembered, so
+    that later requests go straight to the new location. TLS sessions are
+    kept for each server, so that new connections can resume them.
+    """
+    # HTTP status codes for redirects.
+    REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+    # Redirects that apply to all future requests.
+    PERMANENT_REDIRECT_STATUSES = (301, 308)
+
+    def __init__(self,
+                 pool = None,
+                 max_body_size = None,
+                 max_redirects = 5,
+                 ssl_context = None,
+                 max_redirect_cache_size = 256):
+        """
+        @param pool: The L{HttpConnectionPool} to use, or None to create one.
+
+        @param max_body_size: The maximum size of response bodies, in bytes,
+        or None for no limit.
+
+        @param max_redirects: The maximum number of redirects to follow for
+        each request.
+
+        @param ssl_context: The ssl.SSLContext used for HTTPS connections, or
+        None to use the default settings.
+
+        @param max_redirect_cache_size: The maximum number of redirects to
+        remember.
+        """
+        self._pool = pool if pool is not None else HttpConnectionPool()
+        self._max_body_size = max_body_size
+        self._max_redirects = max_redirects
+
+        if ssl_context is None:
+            ssl_context = ssl.create_default_context()
+
+        self._ssl_context = ssl_context
+
+        # Map of (host, port) to the most recent TLS session with that server.
+        self._tls_sessions = {}
+
+        # Map of URL to (location, expires) for remembered redirects, where
+        # expires is None for permanent redirects.
+        self._redirects = collections.OrderedDict()
+        self._max_redirect_cache_size = max_redirect_cache_size
+
+        self._lock = threading.Lock()
+
+    def get(self, url, proxy_settings = None, headers = None, context = None):
+        """
+        Request a URL and return an HttpResponse object, following any
+        redirects. Raises HttpError or OSError if the request fails,
+        HttpTimeout if it takes too long, or HttpCancelled if it is cancelled.
+
+        @param context: An L{HttpRequestContext} giving the time limits for
+        the request, and allowing it to be cancelled, or None to use the
+        default time limits.
+        """
+        if context is None:
+            context = HttpRequestContext()
+
+        context.start()
+
+        # Stop the request when the total time limit is reached, even if the
+        # server is still sending data.
+        timer = threading.Timer(context.total_timeout, context.expire)
+        timer.daemon = True
+        timer.start()
+
+        try:
+            return self._get_with_redirects(url, proxy_settings, headers, context)
+        except (OSError, HttpError) as e:
+            # The exception raised when a connection is closed by cancel() or
+            # expire() depends on what the connection was doing.
+            if context.cancelled:
+                raise HttpCancelled("Request cancelled: " + url) from e
+
+            if context.timed_out or isinstance(e, socket.timeout):
+                raise HttpTimeout("Request timed out: " + url) from e
+
+            raise
+        finally:
+            timer.cancel()
+
+    def _get_with_redirects(self, url, proxy_settings, headers, context):
+        redirect_count = 0
+        url = self._get_redirect(url)
+
+        while True:
+            response = self._get(url, proxy_settings, headers, context)
+
+            if response.status not in self.REDIRECT_STATUSES or "location" not in response.headers:
+                return response
+
+            redirect_count += 1
+
+            if redirect_count > self._max_redirects:
+                raise HttpError("Too many redirects: " + url)
+
+            location = urllib.parse.urljoin(url, response.headers["location"])
+            self.log("Redirected from %s to %s" % (url, location))
+
+            self._put_redirect(url, location, response)
+            url = location
+
+    def _get_redirect(self, url):
+        """
+        Return the URL to request in place of the given one, by following
+        remembered redirects.
+        """
+        now = time.time()
+
+        with self._lock:
+            for i in range(self._max_redirects):
+                redirect = self._redirects.get(url)
+
+                if redirect is None:
+                    break
+
+                location, expires = redirect
+
+                if expires is not None and expires <= now:
+                    del self._redirects[url]
+                    break
+
+                self._redirects.move_to_end(url)
+                url = location
+
+        return url
+
+    def _put_redirect(self, url, location, response):
+        if response.status in self.PERMANENT_REDIRECT_STATUSES:
+            expires = None
+        else:
+            lifetime = get_freshness_lifetime(response.headers)
+
+            if not lifetime:
+                return
+
+            expires = time.time() + lifetime
+
+        with self._lock:
+            self._redirects[url] = (location, expires)
+            self._redirects.move_to_end(url)
+
+            while len(self._redirects) > self._max_redirect_cache_size:
+                self._redirects.popitem(last = False)
+
+    def _get(self, url, proxy_settings, headers, context):
+        url_components = urllib.parse.urlparse(url)
+        scheme = url_components.scheme
+
+        if scheme == "http":
+            default_port = 80
+        elif scheme == "https":
+            default_port = 443
+        else:
+            raise HttpError("Unsupported URL scheme: " + scheme)
+
+        host = url_components.hostname
+
+        if host is None:
+            raise HttpError("Invalid URL: " + url)
+
+        try:
+            port = url_components.port if url_components.port is not None else default_port
+        except ValueError:
+            raise HttpError("Invalid URL: " + url)
+
+        host_header = host if port == default_port else "%s:%d" % (host, port)
+
+        path = url_components.path or "/"
+
+        if url_components.query:
+            path += "?" + url_components.query
+
+        if proxy_settings is None:
+            address = (host, port)
+            tunnel = None
+        elif scheme == "https":
+            # Tunnel the TLS connection through the proxy server.
+            address = (proxy_settings.get_proxy_host(), proxy_settings.get_proxy_port())
+            tunnel = (host, port)
+        else:
+            # Send the full URL to the proxy server.
+            address = (proxy_settings.get_proxy_host(), proxy_settings.get_proxy_port())
+            tunnel = None
+            path = url
+
+        key = (scheme, address, tunnel)
+
+        context.check()
+        connection = self._pool.get(key)
+
+        if connection is not None:
+            try:
+                response = self._request(key, connection, path, host_header, headers, context)
+                response.url = url
+                return response
+            except HttpConnectionClosed:
+                context.check()
+
+                # The server closed the idle connection without reading the
+                # request, so retry on a new connection. Other errors, such as
+                # timeouts, are raised straight away, as the server may have
+                # received the request.
+                self.log("Retrying on new connection: " + url)
+
+        connect_timeout = min(context.connect_timeout, context.get_remaining_time())
+
+        if scheme == "https":
+            with self._lock:
+                tls_session = self._tls_sessions.get((host, port))
+
+            connection = HttpConnection(address[0],
+                                        address[1],
+                                        timeout = connect_timeout,
+                                        ssl_context = self._ssl_context,
+                                        tls_session = tls_session,
+                                        tunnel = tunnel)
+
+            if connection.is_tls_session_reused():
+                self.log("Resumed TLS session with %s port %d" % (host, port))
+        else:
+            connection = HttpConnection(address[0],
+                                        address[1],
+                                        timeout = connect_timeout,
+                                        tunnel = tunnel)
+
+        response = self._request(key, connection, path, host_header, headers, context)
+        response.url = url
+        return response
+
+    def _request(self, key, connection, path, host_header, headers, context):
+        context.set_connection(connection)
+
+        try:
+            remaining_time = context.get_remaining_time()
+
+            response = connection.request(path,
+                                          host_header,
+                                          headers,
+                                          self._max_body_size,
+                                          first_byte_timeout = min(context.first_byte_timeout, remaining_time),
+                                          read_timeout = remaining_time)
+        except Exception:
+            context.set_connection(None)
+            connection.close()
+            raise
+
+        if not context.set_connection(None):
+            connection.reusable = False
+
+        # With TLS 1.3, the session ticket may only be received after the
+        # handshake, so the session is saved once a response has been read.
+        tls_session = connection.get_tls_session()
+
+        if tls_session is not None:
+            tls_host, tls_port = key[2] if key[2] is not None else key[1]
+
+            with self._lock:
+                self._tls_sessions[(tls_host, tls_port)] = tls_session
+
+        if connection.reusable:
+            self._pool.put(key, connection)
+        else:
+            connection.close()
+
+        return response
+
+    def close(self):
+        self._pool.close_all()
+
+    def log(self, message):
+        logging.info(message)
+
+
+class DownloadJob:
+    """
+    A download of one URL, and the requests waiting for it.
+    """
+    def __init__(self, url, proxy_settings, context):
+        """
+        @param context: The L{HttpRequestContext} for the download.
+        """
+        self.url = url
+        self.proxy_settings = proxy_settings
+        self.context = context
+
+        # List of (request_id, key, callback) tuples for the requests for
+        # this URL.
+        self.requests = []
+
+
+class HttpClientThread(threading.Thread):
+    """
+    Downloads images on worker threads, and passes the data to the client's
+    http_received_data() method. Several downloads may be in progress at once.
+
+    Each request has a key, identifying where the image is to be shown (e.g.,
+    the station). Only the most recently requested image for each key is
+    delivered: a newer request supersedes any earlier request for the same
+    key, and a superseded download is cancelled. Requests for a URL that is
+    already being downloaded share the one download.
+
+    Each download has time limits for connecting, for the server to start
+    responding, and in total, so that a slow server can't hold up later
+    images.
+    """
+    def __init__(self,
+                 client,
+                 max_downloads = 4,
+                 image_cache = None,
+                 max_image_size = 10 * 1024 * 1024,
+                 connect_timeout = 5.0,
+                 first_byte_timeout = 10.0,
+                 total_timeout = 30.0):
+        """
+        @param client: The object to notify when a download completes.
+
+        @param max_downloads: The maximum number of concurrent downloads.
+
+        @param image_cache: An L{ImageCache} object for keeping downloaded
+        images, or None to disable caching.
+
+        @param max_image_size: The maximum size of an image, in bytes.
+        Downloads of larger images are abandoned.
+
+        @param connect_timeout: The time limit for connecting to a server, in
+        seconds.
+
+        @param first_byte_timeout: The time limit for a server to start
+        responding to a request, in seconds.
+
+        @param total_timeout: The time limit for each download, in seconds.
+        """
+        threading.Thread.__init__(self, name = "http")
+        self._client = client
+        self._queue = queue.Queue()
+        self._http_client = HttpClient(max_body_size = max_image_size)
+        self._image_cache = image_cache
+
+        self._connect_timeout = connect_timeout
+        self._first_byte_timeout = first_byte_timeout
+        self._total_timeout = total_timeout
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers = max_downloads,
+            thread_name_prefix = "http")
+
+        self._lock = threading.Lock()
+        self._request_count = 0
+
+        # Map of key to the request_id of the latest request for that key.
+        self._latest_requests = {}
+
+        # Map of URL to the DownloadJob for downloads not yet completed.
+        self._jobs = {}
+
+    def request(self, url, proxy_settings = None, key = None, callback = None):
+        """
+        Request a URL to be downloaded.
+
+        @param key: Identifies where the image is to be shown. The image is
+        only delivered if no other image has been requested for the same key
+        since.
+
+        @param callback: A function to pass the image data to, or None to
+        pass it to the client's http_received_data() method.
+        """
+        # The request becomes the latest for its key straight away, rather
+        # than when the worker thread takes it from the queue, so that a
+        # later call to cancel() applies to it.
+        with self._lock:
+            self._request_count += 1
+            request_id = self._request_count
+            self._latest_requests[key] = request_id
+
+            job = self._jobs.get(url)
+
+            if job is not None:
+                # Share the download already in progress.
+                self.log("Already requested URL: " + url)
+                job.requests.append((request_id, key, callback))
+
+            # Stop any downloads this request supersedes.
+            self._cancel_unwanted_jobs()
+
+        if job is None:
+            self._queue.put((request_id, url, proxy_settings, key, callback))
+
+    def run(self):
+        while True:
+            # Wait for an item to appear in the queue.
+            item = self._queue.get()
+
+            # If the item is None, this is the signal to exit the thread.
+            if item is None:
+                break
+
+            request_id, url, proxy_settings, key, callback = item
+            new_job = None
+
+            with self._lock:
+                if self._latest_requests.get(key) != request_id:
+                    self.log("Skipping superseded URL: " + url)
+                    continue
+
+                job = self._jobs.get(url)
+
+                if job is not None:
+                    self.log("Already requested URL: " + url)
+                else:
+                    context = HttpRequestContext(connect_timeout = self._connect_timeout,
+                                                 first_byte_timeout = self._first_byte_timeout,
+                                                 total_timeout = self._total_timeout)
+
+                    job = DownloadJob(url, proxy_settings, context)
+                    self._jobs[url] = job
+                    new_job = job
+
+                job.requests.append((request_id, key, callback))
+
+            if new_job is not None:
+                self._executor.submit(self._run_job, new_job)
+
+    def cancel(self, key = None):
+        """
+        Cancel all requests for the given key, so that no further images are
+        delivered for it.
+        """
+        with self._lock:
+            self._latest_requests.pop(key, None)
+            self._cancel_unwanted_jobs()
+
+    def _cancel_unwanted_jobs(self):
+        """
+        Cancel downloads that no request still wants. Must be called with the
+        lock held.
+        """
+        for url, job in list(self._jobs.items()):
+            if not self._is_wanted(job):
+                self.log("Cancelling superseded URL: " + url)
+                job.context.cancel()
+
+                # Later requests for the URL need a new download.
+                del self._jobs[url]
+
+    def stop(self):
+        # Queueing None notifies the worker thread to exit.
+        self._queue.put(None)
+        self.join()
+
+        with self._lock:
+            self._latest_requests.clear()
+            self._cancel_unwanted_jobs()
+
+        self._executor.shutdown(wait = True)
+        self._http_client.close()
+
+    def _is_wanted(self, job):
+        """
+        Return True if any of the job's requests is the latest for its key.
+        Must be called with the lock held.
+        """
+        return len(self._get_wanted_requests(job)) > 0
+
+    def _get_wanted_requests(self, job):
+        return [(request_id, key, callback) for request_id, key, callback in job.requests
+                if self._latest_requests.get(key) == request_id]
+
+    def _run_job(self, job):
+        if job.context.cancelled:
+            self.log("Skipping superseded URL: " + job.url)
+            return
+
+        body = None
+
+        try:
+            body = self._download(job.url, job.proxy_settings, job.context)
+        finally:
+            with self._lock:
+                if self._jobs.get(job.url) is job:
+                    del self._jobs[job.url]
+
+                if body is not None:
+                    self._deliver(job, body)
+                else:
+                    self._forget_requests(job)
+
+    def _forget_requests(self, job):
+        """
+        Remove the keys of a failed download's wanted requests, as nothing
+        will be delivered for them. Must be called with the lock held.
+        """
+        for request_id, key, callback in self._get_wanted_requests(job):
+            del self._latest_requests[key]
+
+    def _deliver(self, job, body):
+        """
+        Pass the downloaded image to the client, if it is still wanted. Must
+        be called with the lock held, so that a newer image can't be
+        delivered at the same time.
+        """
+        callbacks = []
+
+        for request_id, key, callback in self._get_wanted_requests(job):
+            # Now that the latest request for the key has been delivered, any
+            # other downloads for it are unwanted, so the key can be removed.
+            del self._latest_requests[key]
+
+            if callback is None:
+                callback = self._client.http_received_data
+
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+        if len(callbacks) == 0:
+            self.log("Discarding superseded URL: " + job.url)
+
+        for callback in callbacks:
+            callback(body)
+
+    def _download(self, url, proxy_settings, context):
+        """
+        Download an image, using the cache if possible. Returns the image
+        data, or None if it couldn't be downloaded.
+        """
+        headers = None
+        entry = None
+
+        if self._image_cache is not None:
+            entry = self._image_cache.get(url)
+
+            if entry is not None:
+                if self._image_cache.is_fresh(entry):
+                    self.log("Using cached image: " + url)
+                    return entry.body
+
+                headers = entry.get_conditional_headers()
+
+        self.log("Requesting URL: " + url)
+
+        try:
+            response = self._http_client.get(url, proxy_settings, headers, context)
+        except HttpCancelled:
+            self.log("Cancelled request: " + url)
+            return None
+        except (OSError, HttpError) as e:
+            self.log("Error requesting %s: %s" % (url, e))
+
+            # Show the stale image rather than nothing.
+            if entry is not None:
+                self.log("Using stale cached image: " + url)
+                return entry.body
+
+            return None
+
+        self.log("Response: HTTP status %d" % response.status)
+
+        if response.status == 304 and entry is not None:
+            self.log("Cached image not modified: " + url)
+            self._image_cache.update(url, response.headers)
+            return entry.body
+        elif response.status >= 200 and response.status <= 299:
+            if self._image_cache is not None and response.status == 200:
+                self._image_cache.put(url, response.body, response.headers)
+
+            return response.body
+        else:
+            return None
+
+    def log(self, message):
+        logging.info(message)
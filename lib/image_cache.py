@@ -0,0 +1,319 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import email.utils
+import threading
+import time
+
+
+# Upper limit on the heuristic freshness lifetime given to responses with a
+# Last-Modified header but no explicit expiry time (RFC 7234 section 4.2.2).
+MAX_HEURISTIC_LIFETIME = 24 * 60 * 60
+
+
+def parse_cache_control(value):
+    """
+    Parse a Cache-Control header value into a dict of directive names (in
+    lower case) and values. Directives without a value map to None.
+    """
+    directives = {}
+
+    for directive in value.split(","):
+        name, separator, argument = directive.partition("=")
+        name = name.strip().lower()
+
+        if name:
+            directives[name] = argument.strip().strip('"') if separator else None
+
+    return directives
+
+
+def parse_http_date(value):
+    """
+    Return the time given by an HTTP date header value, in seconds since the
+    epoch, or None if the value is not a valid date.
+    """
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def get_freshness_lifetime(headers):
+    """
+    Return the time for which a response may be used without revalidation,
+    in seconds, from its Cache-Control, Expires, and Last-Modified headers.
+    Returns None if the response must not be stored.
+
+    @param headers: A dict of response headers, with lower-case names.
+    """
+    cache_control = parse_cache_control(headers.get("cache-control", ""))
+
+    if "no-store" in cache_control:
+        return None
+
+    if "no-cache" in cache_control:
+        return 0
+
+    if "max-age" in cache_control:
+        try:
+            max_age = int(cache_control["max-age"])
+        except ValueError:
+            return 0
+
+        age = 0
+
+        try:
+            age = int(headers.get("age", "0"))
+        except ValueError:
+            pass
+
+        return max(max_age - age, 0)
+
+    date = parse_http_date(headers.get("date"))
+
+    if "expires" in headers:
+        expires = parse_http_date(headers["expires"])
+
+        if expires is None or date is None:
+            return 0
+
+        return max(expires - date, 0)
+
+    last_modified = parse_http_date(headers.get("last-modified"))
+
+    if last_modified is not None and date is not None:
+        return min(max((date - last_modified) / 10, 0), MAX_HEURISTIC_LIFETIME)
+
+    return 0
+
+
+class ImageCacheEntry:
+    def __init__(self, url, body, expires, etag = None, last_modified = None):
+        """
+        @param url: The image URL.
+
+        @param body: The image data, as bytes.
+
+        @param expires: The time after which the entry must be revalidated
+        before use, in seconds since the epoch.
+
+        @param etag: The response's ETag header, or None.
+
+        @param last_modified: The response's Last-Modified header, or None.
+        """
+        self.url = url
+        self.body = body
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def get_size(self):
+        return len(self.body)
+
+    def has_validator(self):
+        return self.etag is not None or self.last_modified is not None
+
+    def get_conditional_headers(self):
+        """
+        Return a dict of request headers for revalidating the entry.
+        """
+        headers = {}
+
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class ImageCache:
+    """
+    A least-recently-used cache of downloaded images, keyed by URL and bounded
+    by the total size of the images. Entries are kept with their validators
+    (ETag and Last-Modified) and expiry time, following the response's
+    Cache-Control or Expires headers, so that stale entries can be
+    revalidated with a conditional request.
+
+    Optionally, a L{DiskImageCache} can be used to keep images between runs.
+    Images are written to it when added, and it is checked for images not
+    held in memory.
+    """
+    def __init__(self, max_size = 32 * 1024 * 1024, clock = time.time, disk_cache = None):
+        """
+        @param max_size: The maximum total size of the cached images, in
+        bytes. When full, the least recently used entries are evicted.
+
+        @param clock: Function returning the current time, in seconds.
+
+        @param disk_cache: A L{DiskImageCache} object, or None.
+        """
+        self._max_size = max_size
+        self._clock = clock
+        self._disk_cache = disk_cache
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, url):
+        """
+        Return the L{ImageCacheEntry} for the given URL, or None if there is
+        no entry. The entry may be stale: use L{is_fresh} to check.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+
+            if entry is not None:
+                self._entries.move_to_end(url)
+                self._hits += 1
+                return entry
+
+        if self._disk_cache is not None:
+            entry = self._disk_cache.get(url)
+
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+
+            if entry.get_size() <= self._max_size:
+                self._insert(entry)
+
+            return entry
+
+    def is_fresh(self, entry):
+        """
+        Return True if the entry can be used without revalidation.
+        """
+        return entry.expires > self._clock()
+
+    def put(self, url, body, headers):
+        """
+        Add an image to the cache from a successful response. Returns the new
+        L{ImageCacheEntry}, or None if the response must not be stored.
+
+        @param headers: A dict of response headers, with lower-case names.
+        """
+        lifetime = get_freshness_lifetime(headers)
+
+        if lifetime is None:
+            self.remove(url)
+            return None
+
+        entry = ImageCacheEntry(url,
+                                body,
+                                self._clock() + lifetime,
+                                etag = headers.get("etag"),
+                                last_modified = headers.get("last-modified"))
+
+        # A response that can neither be used while fresh nor revalidated
+        # would never be served from the cache.
+        if lifetime == 0 and not entry.has_validator():
+            self.remove(url)
+            return None
+
+        if self._disk_cache is not None:
+            self._disk_cache.put(entry)
+
+        with self._lock:
+            if entry.get_size() <= self._max_size:
+                self._insert(entry)
+            else:
+                self._remove(url)
+
+        return entry
+
+    def _insert(self, entry):
+        self._remove(entry.url)
+
+        self._entries[entry.url] = entry
+        self._size += entry.get_size()
+
+        while self._size > self._max_size:
+            evicted_url, evicted_entry = self._entries.popitem(last = False)
+            self._size -= evicted_entry.get_size()
+
+    def update(self, url, headers):
+        """
+        Update an entry from a 304 Not Modified response to a conditional
+        request. Returns the updated L{ImageCacheEntry}, or None if there is
+        no entry for the URL.
+
+        @param headers: A dict of response headers, with lower-case names.
+        """
+        entry = self.get(url)
+
+        if entry is None:
+            return None
+
+        # Headers not present in the 304 response are kept from the stored
+        # response.
+        merged_headers = {}
+
+        if entry.etag is not None:
+            merged_headers["etag"] = entry.etag
+
+        if entry.last_modified is not None:
+            merged_headers["last-modified"] = entry.last_modified
+
+        merged_headers.update(headers)
+
+        return self.put(url, entry.body, merged_headers)
+
+    def remove(self, url):
+        with self._lock:
+            self._remove(url)
+
+        if self._disk_cache is not None:
+            self._disk_cache.remove(url)
+
+    def _remove(self, url):
+        entry = self._entries.pop(url, None)
+
+        if entry is not None:
+            self._size -= entry.get_size()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def flush(self):
+        """
+        Write any pending changes to the disk cache.
+        """
+        if self._disk_cache is not None:
+            self._disk_cache.flush()
+
+    def get_size(self):
+        """
+        Return the total size of the cached images, in bytes.
+        """
+        return self._size
+
+    def get_hits(self):
+        return self._hits
+
+    def get_misses(self):
+        return self._misses
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,206 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import io
+import logging
+import threading
+import wx
+
+from .decoded_image_cache import DecodedImageCache, get_image_key, get_scaled_size
+
+
+class DecodedImage:
+    """
+    An image decoded and scaled to the display size, as raw pixel data ready
+    to be turned into a wx.Bitmap.
+    """
+    def __init__(self, key, width, height, data, has_alpha):
+        """
+        @param key: The image's cache key, from L{get_image_key}.
+
+        @param data: The pixel data, as bytes: RGBA if has_alpha is True,
+        otherwise RGB.
+        """
+        self.key = key
+        self.width = width
+        self.height = height
+        self.data = data
+        self.has_alpha = has_alpha
+
+    def create_bitmap(self):
+        """
+        Return a new wx.Bitmap of the image. This must be called on the GUI
+        thread, which should also own the bitmap, as decoded images are
+        shared with the decoder thread.
+        """
+        if self.has_alpha:
+            return wx.Bitmap.FromBufferRGBA(self.width, self.height, self.data)
+        else:
+            return wx.Bitmap.FromBuffer(self.width, self.height, self.data)
+
+
+class ImageDecoderThread(threading.Thread):
+    """
+    Decodes images (PNG, JPEG, GIF, or other formats) and scales them to the
+    display size on a worker thread, so that large images don't hold up the
+    GUI thread. Results are passed to the listener's image_decoded() method,
+    on the worker thread.
+
+    If images arrive faster than they can be decoded, only the most recent
+    is decoded. Decoded images are cached, so that repeated slides aren't
+    decoded again, and images due to be shown later can be decoded in
+    advance using L{prefetch}.
+    """
+    # The maximum number of images waiting to be decoded in advance.
+    MAX_PREFETCH = 8
+
+    def __init__(self, listener, width = 320, height = 240, cache = None):
+        """
+        @param listener: The object to notify when an image is decoded.
+
+        @param width: The display width, in pixels.
+
+        @param height: The display height, in pixels.
+
+        @param cache: The L{DecodedImageCache} to use, or None to create one.
+        """
+        threading.Thread.__init__(self, name = "image-decoder", daemon = True)
+
+        self._listener = listener
+        self._width = width
+        self._height = height
+
+        self._cache = cache if cache is not None else DecodedImageCache()
+
+        self._condition = threading.Condition()
+        self._pending = None
+        self._prefetch_queue = collections.deque(maxlen = self.MAX_PREFETCH)
+        self._stopped = False
+
+    def decode(self, image_data):
+        """
+        Request an image to be decoded. This replaces any image still waiting
+        to be decoded.
+        """
+        with self._condition:
+            if self._pending is not None:
+                logging.info("Skipping image replaced before decoding")
+
+            self._pending = image_data
+            self._condition.notify()
+
+    def prefetch(self, image_data):
+        """
+        Request an image to be decoded in advance and cached, without being
+        shown. Images to be shown are decoded first.
+        """
+        with self._condition:
+            self._prefetch_queue.append(image_data)
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while (self._pending is None and
+                       len(self._prefetch_queue) == 0 and
+                       not self._stopped):
+                    self._condition.wait()
+
+                if self._stopped:
+                    return
+
+                if self._pending is not None:
+                    image_data = self._pending
+                    self._pending = None
+                    show = True
+                else:
+                    image_data = self._prefetch_queue.popleft()
+                    show = False
+
+            decoded_image = self.get_decoded_image(image_data)
+
+            if decoded_image is not None and show:
+                self._listener.image_decoded(decoded_image)
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+        self.join()
+
+    def get_decoded_image(self, image_data):
+        """
+        Return a L{DecodedImage} object for the image, from the cache if
+        possible, or None if the image can't be decoded.
+        """
+        key = get_image_key(image_data, self._width, self._height)
+        decoded_image = self._cache.get(key)
+
+        if decoded_image is None:
+            decoded_image = self.decode_image(image_data, key)
+
+            if decoded_image is not None:
+                self._cache.put(key, decoded_image)
+
+        return decoded_image
+
+    def decode_image(self, image_data, key):
+        """
+        Decode an image and scale it to fit the display size, centred on a
+        white background. Returns a L{DecodedImage} object with the given
+        cache key, or None if the image can't be decoded.
+        """
+        # Don't show error message boxes for invalid images, as this isn't
+        # the GUI thread.
+        no_log = wx.LogNull()
+
+        image = wx.Image(io.BytesIO(image_data))
+
+        del no_log
+
+        if not image.IsOk():
+            logging.warning("Couldn't create image")
+            return None
+
+        width, height = get_scaled_size(image.GetWidth(),
+                                        image.GetHeight(),
+                                        self._width,
+                                        self._height)
+
+        if (width, height) != (image.GetWidth(), image.GetHeight()):
+            image = image.Scale(width, height, wx.IMAGE_QUALITY_HIGH)
+
+        if (width, height) != (self._width, self._height):
+            # Centre the image in the display area.
+            image.Resize((self._width, self._height),
+                         ((self._width - width) // 2, (self._height - height) // 2),
+                         255, 255, 255)
+
+        rgb_data = bytes(image.GetData())
+
+        if not image.HasAlpha():
+            return DecodedImage(key, self._width, self._height, rgb_data, False)
+
+        # Interleave the separate colour and alpha planes into RGBA data.
+        alpha_data = bytes(image.GetAlpha())
+
+        rgba_data = bytearray(self._width * self._height * 4)
+        rgba_data[0::4] = rgb_data[0::3]
+        rgba_data[1::4] = rgb_data[1::3]
+        rgba_data[2::4] = rgb_data[2::3]
+        rgba_data[3::4] = alpha_data
+
+        return DecodedImage(key, self._width, self._height, bytes(rgba_data), True)
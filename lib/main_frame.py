@@ -12,12 +12,13 @@
 # implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
-import io
+import collections
 import logging
 import threading
 import wx
 
 from .dns_resolver import ServiceRecord
+from .image_decoder import ImageDecoderThread
 
 
 class RadioStationAdapter:
@@ -115,6 +116,27 @@ class LogMessageEvent(wx.PyCommandEvent):
         return self._message
 
 
+myEVT_STOMP_FRAME = wx.NewEventType()
+EVT_STOMP_FRAME = wx.PyEventBinder(myEVT_STOMP_FRAME, 1)
+
+class StompFrameLogEvent(wx.PyCommandEvent):
+    """
+    Event to append a received Stomp frame to the message list.
+    """
+    def __init__(self, etype, eid, frame_event):
+        """
+        Create the event object.
+        """
+        wx.PyCommandEvent.__init__(self, etype, eid)
+        self._frame_event = frame_event
+
+    def get_frame_event(self):
+        """
+        Return the FrameEvent object from the event.
+        """
+        return self._frame_event
+
+
 myEVT_RADIOVIS_TEXT = wx.NewEventType()
 EVT_RADIOVIS_TEXT = wx.PyEventBinder(myEVT_RADIOVIS_TEXT, 1)
 
@@ -169,24 +191,52 @@ myEVT_RECEIVED_IMAGE = wx.NewEventType()
 EVT_RECEIVED_IMAGE = wx.PyEventBinder(myEVT_RECEIVED_IMAGE, 1)
 
 class ReceivedImageEvent(wx.PyCommandEvent):
-    def __init__(self, etype, eid, image_data):
+    def __init__(self, etype, eid, decoded_image):
         """
         Create the event object.
         """
         wx.PyCommandEvent.__init__(self, etype, eid)
-        self._image_data = image_data
+        self._decoded_image = decoded_image
 
-    def get_image_data(self):
+    def get_decoded_image(self):
         """
-        Return the raw image data from the event.
+        Return the DecodedImage object from the event.
         """
-        return self._image_data
+        return self._decoded_image
+
+
+myEVT_CONNECT_FAILED = wx.NewEventType()
+EVT_CONNECT_FAILED = wx.PyEventBinder(myEVT_CONNECT_FAILED, 1)
+
+class ConnectFailedEvent(wx.PyCommandEvent):
+    """
+    Event to report that a RadioVIS connection couldn't be made.
+    """
+    def __init__(self, etype, eid, message):
+        """
+        Create the event object.
+        """
+        wx.PyCommandEvent.__init__(self, etype, eid)
+        self._message = message
+
+    def get_message(self):
+        """
+        Return the message string from the event.
+        """
+        return self._message
 
 
 class MainFrame(wx.Frame):
     """
     Application main window class.
     """
+    # Size of the area in which images are shown, in pixels.
+    IMAGE_WIDTH = 320
+    IMAGE_HEIGHT = 240
+
+    # The number of bitmaps kept for images that may be shown again.
+    MAX_BITMAPS = 8
+
     def __init__(
         self, parent, id, title, pos = wx.DefaultPosition,
         size = wx.DefaultSize, style = wx.DEFAULT_FRAME_STYLE):
@@ -196,6 +246,11 @@ class MainFrame(wx.Frame):
         self._connection_manager = None
         self._services = []
 
+        # Map of image key to wx.Bitmap, from least to most recently shown.
+        # Bitmaps are only created and destroyed on the GUI thread, so this
+        # is kept separate from the decoder's cache.
+        self._bitmaps = collections.OrderedDict()
+
         self._init_logging()
 
         self._default_width = 400
@@ -245,6 +300,12 @@ class MainFrame(wx.Frame):
 
         self._init_message_handlers()
 
+        # Decode images on a worker thread, to keep the GUI responsive.
+        self._image_decoder = ImageDecoderThread(self,
+                                                 width = self.IMAGE_WIDTH,
+                                                 height = self.IMAGE_HEIGHT)
+        self._image_decoder.start()
+
     def _init_domain_controls(self, parent, sizer):
         self._domain_static = wx.StaticText(parent = parent,
                                               id = wx.ID_ANY,
@@ -357,6 +418,16 @@ class MainFrame(wx.Frame):
 
         self._proxy_stomp_button.Disable()
 
+        self._auto_select_button = wx.CheckBox(parent = parent,
+                                               id = wx.ID_ANY,
+                                               label = "Select RadioVIS server automatically")
+
+        self._log_frames_button = wx.CheckBox(parent = parent,
+                                              id = wx.ID_ANY,
+                                              label = "Show Stomp frames in log")
+
+        self.Bind(wx.EVT_CHECKBOX, self.OnLogFramesCheckBox, self._log_frames_button)
+
         connect_sizer = wx.BoxSizer(wx.HORIZONTAL)
         connect_sizer.Add(connect_button, flag = wx.ALIGN_TOP)
         connect_sizer.AddSpacer(10)
@@ -364,6 +435,8 @@ class MainFrame(wx.Frame):
         checkbox_sizer = wx.GridSizer(cols = 1, vgap = 4, hgap = 0)
         checkbox_sizer.Add(self._proxy_http_button)
         checkbox_sizer.Add(self._proxy_stomp_button)
+        checkbox_sizer.Add(self._auto_select_button)
+        checkbox_sizer.Add(self._log_frames_button)
 
         connect_sizer.Add(checkbox_sizer, flag = wx.ALIGN_CENTER_VERTICAL)
 
@@ -404,7 +477,7 @@ class MainFrame(wx.Frame):
         # TODO: the +4 here is to allow for the sunken border (2 pixels on each side).
         self._image_static_bitmap = wx.StaticBitmap(parent = parent,
                                                     id = wx.ID_ANY,
-                                                    size = (320 + 4, 240 + 4),
+                                                    size = (self.IMAGE_WIDTH + 4, self.IMAGE_HEIGHT + 4),
                                                     style = wx.ST_NO_AUTORESIZE | wx.BORDER_SUNKEN)
 
         sizer.Add(self._image_static)
@@ -451,9 +524,11 @@ class MainFrame(wx.Frame):
 
     def _init_message_handlers(self):
         self.Bind(EVT_LOG_MESSAGE, self.OnLogMessage)
+        self.Bind(EVT_STOMP_FRAME, self.OnStompFrame)
         self.Bind(EVT_RADIOVIS_TEXT, self.OnRadioVisText)
         self.Bind(EVT_RADIOVIS_SHOW, self.OnRadioVisShow)
         self.Bind(EVT_RECEIVED_IMAGE, self.OnReceivedImage)
+        self.Bind(EVT_CONNECT_FAILED, self.OnConnectFailed)
         self.Bind(wx.EVT_CLOSE, self.OnClose)
         self._domain_combobox.Bind(wx.EVT_COMBOBOX, self.OnDomainComboBoxSelChanged)
 
@@ -582,13 +657,11 @@ class MainFrame(wx.Frame):
         proxy_http  = self._proxy_http_button.IsChecked()
         proxy_stomp = self._proxy_stomp_button.IsChecked()
 
-        if service is not None and host_index != wx.NOT_FOUND:
+        if self._auto_select_button.IsChecked():
+            self._connect_auto(item, station, proxy_http, proxy_stomp)
+        elif service is not None and host_index != wx.NOT_FOUND:
             if service.name == "RadioVIS":
-                # Reset Image URL, Link URL, and Text fields when connecting to a new service
-                self._image_url_text.SetValue("")
-                self._link_url_text.SetValue("")
-                self._text_text.SetValue("")
-                self._image_static_bitmap.SetBitmap(wx.NullBitmap)
+                self._clear_radiovis_fields()
 
                 # Connect.
                 self._append_log("Connect to: " + service.target)
@@ -606,12 +679,63 @@ class MainFrame(wx.Frame):
             else:
                 self._message_box("This radio station has no services available")
 
+    def _connect_auto(self, item, station, proxy_http, proxy_stomp):
+        """
+        Connect to one of the station's RadioVIS services, chosen by SRV
+        record priority and weight.
+        """
+        services = [service for service in self._services if service.name == "RadioVIS"]
+
+        if len(services) > 0:
+            self._clear_radiovis_fields()
+
+            self._append_log("Connect to RadioVIS service for: " + item.get_hostname())
+
+            self._connection_manager.enable_http_proxy(proxy_http)
+
+            # Trying the servers can take several seconds, so do this on a
+            # worker thread to keep the GUI responsive.
+            thread = threading.Thread(target = self._connect_auto_thread,
+                                      args = (services, station, proxy_stomp),
+                                      name = "connect",
+                                      daemon = True)
+            thread.start()
+        else:
+            self._message_box("This radio station has no RadioVIS service available")
+
+    def _connect_auto_thread(self, services, station, proxy_stomp):
+        """
+        This function is called in the context of a worker thread, so post a
+        message to the GUI thread if none of the servers are available.
+        """
+        if not self._connection_manager.connect_radiovis_auto(services, station, proxy_stomp):
+            evt = ConnectFailedEvent(myEVT_CONNECT_FAILED, -1,
+                                     "None of the RadioVIS servers are available, retrying")
+            wx.PostEvent(self, evt)
+
+    def OnConnectFailed(self, event):
+        """
+        Handler for the EVT_CONNECT_FAILED event.
+        """
+        self._message_box(event.get_message())
+
+    def _clear_radiovis_fields(self):
+        """
+        Reset Image URL, Link URL, and Text fields when connecting to a new
+        service.
+        """
+        self._image_url_text.SetValue("")
+        self._link_url_text.SetValue("")
+        self._text_text.SetValue("")
+        self._image_static_bitmap.SetBitmap(wx.NullBitmap)
+
     def OnClose(self, event):
         """
         Handler for the wx.EVT_CLOSE event.
         """
         self._connection_manager.shutdown()
         self._connection_manager.remove_listener(self)
+        self._image_decoder.stop()
         self.Destroy()
 
     def log(self, message):
@@ -625,12 +749,30 @@ class MainFrame(wx.Frame):
         else:
             self._post_log_message(message)
 
-    def stomp_message(self, message):
+    def OnLogFramesCheckBox(self, event):
+        """
+        Event handler for the "Show Stomp frames in log" check box. Frames are
+        only passed to the GUI while this is checked.
+        """
+        if self._log_frames_button.IsChecked():
+            self._connection_manager.add_frame_listener(self)
+        else:
+            self._connection_manager.remove_frame_listener(self)
+
+    def stomp_frame(self, frame_event):
         """
         This function is called in the context of the stomp worker thread,
-        so post a message to the GUI thread.
+        so post a message to the GUI thread. The frame is formatted there.
         """
-        self._post_log_message(message)
+        evt = StompFrameLogEvent(myEVT_STOMP_FRAME, -1, frame_event)
+        wx.PostEvent(self, evt)
+
+    def OnStompFrame(self, evt):
+        """
+        Handler for the EVT_STOMP_FRAME event.
+        """
+        for line in evt.get_frame_event().format():
+            self._append_log(line)
 
     def _post_log_message(self, message):
         evt = LogMessageEvent(myEVT_LOG_MESSAGE, -1, message)
@@ -676,34 +818,52 @@ class MainFrame(wx.Frame):
             self._image_url_text.SetValue(image_url)
 
     def radiovis_image(self, image_data):
-        evt = ReceivedImageEvent(myEVT_RECEIVED_IMAGE, -1, image_data)
+        """
+        This function is called in the context of an HTTP worker thread.
+        The image is passed to the decoder thread, rather than decoded on the
+        GUI thread.
+        """
+        self._image_decoder.decode(image_data)
+
+    def radiovis_image_prefetched(self, image_data):
+        """
+        This function is called in the context of an HTTP worker thread,
+        when an image to be shown later has been downloaded, so that it can
+        be decoded in advance.
+        """
+        self._image_decoder.prefetch(image_data)
+
+    def image_decoded(self, decoded_image):
+        """
+        This function is called in the context of the image decoder thread,
+        so post a message to the GUI thread.
+        """
+        evt = ReceivedImageEvent(myEVT_RECEIVED_IMAGE, -1, decoded_image)
         wx.PostEvent(self, evt)
 
     def OnReceivedImage(self, event):
         """
         Handler for the EVT_RECEIVED_IMAGE event.
         """
-        image_data = event.get_image_data()
-
-        bitmap = self.create_bitmap(image_data)
+        decoded_image = event.get_decoded_image()
 
-        if bitmap is not None:
-            self._image_static_bitmap.SetBitmap(bitmap)
+        self._image_static_bitmap.SetBitmap(self._get_bitmap(decoded_image))
 
-    def create_bitmap(self, image_data):
+    def _get_bitmap(self, decoded_image):
         """
-        Create and return a wx.Bitmap object from image data, which may be
-        PNG, JPG, GIF, or other format.
+        Return a wx.Bitmap of a decoded image, reusing the bitmap from when
+        it was last shown if possible.
         """
-        stream = io.BytesIO(image_data)
+        bitmap = self._bitmaps.get(decoded_image.key)
 
-        bitmap = None
+        if bitmap is None:
+            bitmap = decoded_image.create_bitmap()
+            self._bitmaps[decoded_image.key] = bitmap
 
-        image = wx.Image(stream)
-        if image.IsOk():
-            bitmap = wx.Bitmap(image)
+            while len(self._bitmaps) > self.MAX_BITMAPS:
+                self._bitmaps.popitem(last = False)
         else:
-            logging.warning("Couldn't create image")
+            self._bitmaps.move_to_end(decoded_image.key)
 
         return bitmap
 
@@ -36,12 +36,18 @@ class RadioStation(object):
     def set_domain(self, domain):
         self._domain = domain
 
-    def get_hostname(self):
+    def get_hostname(self, domain = None):
         """
         Return the fully-qualified domain name (FQDN) for the radio station.
+
+        @param domain: The RadioDNS domain to use, instead of the one given
+        by L{set_domain}.
         """
+        if domain is None:
+            domain = self._domain
+
         query = self._get_query()
-        query.extend([self._tx_system, self._domain])
+        query.extend([self._tx_system, domain])
         return ".".join(query)
 
     def get_text_topic(self):
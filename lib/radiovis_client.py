@@ -12,43 +12,135 @@
 # implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
-import re
+import datetime
+import itertools
+import logging
+import random
+import threading
 
 import stomp
 
+from .radiovis_parser import ShowMessage, TextMessage, format_trigger_time, parse_message
+
+
+def get_reconnect_delay(attempt, initial_delay = 1.0, max_delay = 60.0, rng = random):
+    """
+    Return the time to wait before an attempt to reconnect, in seconds. The
+    delay doubles with each attempt, up to max_delay, and a random part of it
+    is taken, so that clients disconnected at the same time (e.g., by a
+    server restart) don't all reconnect at once.
+
+    @param attempt: The number of attempts already made since the connection
+    was lost.
+    """
+    # Limit the exponent, to avoid overflow.
+    delay = min(max_delay, initial_delay * (2 ** min(attempt, 32)))
+
+    return rng.uniform(delay / 2, delay)
+
+
+class FrameEvent:
+    """
+    A Stomp frame received by a L{RadioVisClient}, or a change in the state
+    of its connection, for logging. The frame is only formatted as text when
+    L{format} is called.
+    """
+    __slots__ = ("event_type", "frame")
+
+    def __init__(self, event_type, frame = None):
+        """
+        @param event_type: A description of the event, e.g., "MESSAGE" or
+        "lost connection".
+
+        @param frame: The stomp.utils.Frame object received, or None.
+        """
+        self.event_type = event_type
+        self.frame = frame
+
+    def format(self):
+        """
+        Return a list of lines of text describing the event: the event type,
+        followed by each of the frame's headers and its body, if any.
+        """
+        lines = [self.event_type]
+
+        if self.frame is not None:
+            if self.frame.headers is not None:
+                for name, value in self.frame.headers.items():
+                    lines.append("%s: %s" % (name, value))
+
+            if len(self.frame.body) > 0:
+                lines.append(self.frame.body)
+
+        return lines
+
 
 class RadioVisClient(stomp.ConnectionListener):
+    """
+    A Stomp client for RadioVIS messages. A single connection can subscribe
+    to the text and image topics of any number of stations: each received
+    MESSAGE frame is passed to the handler subscribed to its destination.
+
+    The client uses STOMP 1.2, with heart-beats in both directions, so that
+    a server that stops responding is noticed within a few seconds. If the
+    connection is lost, the client reconnects, waiting for an increasing
+    time between attempts, and subscribes again to all its topics.
+    """
     def __init__(self,
                  host = 'localhost',
                  port = 61613,
                  proxy_settings = None,
                  user = None,
-                 passcode = None):
+                 passcode = None,
+                 heartbeat_interval = 5.0,
+                 reconnect = True,
+                 initial_reconnect_delay = 1.0,
+                 max_reconnect_delay = 60.0):
+        """
+        @param heartbeat_interval: The interval at which heart-beats are sent
+        to, and requested from, the server, in seconds. The connection is
+        considered lost if nothing arrives from the server for 1.5 times the
+        interval agreed with it.
 
-        stomp.ConnectionListener.__init__(self)
+        @param reconnect: Whether to reconnect automatically if the
+        connection is lost.
+
+        @param initial_reconnect_delay: The maximum time to wait before the
+        first attempt to reconnect, in seconds.
 
+        @param max_reconnect_delay: The maximum time to wait between attempts
+        to reconnect, in seconds.
+        """
+        stomp.ConnectionListener.__init__(self)
 
         self._listeners = []
 
-        self._connection = stomp.Connection10(host_and_ports = [(host, port)])
+        # Objects to pass received frames to, for logging. The list is
+        # replaced rather than modified, so that the receiver thread can use
+        # it without locking.
+        self._frame_listeners = []
+
+        heartbeat_ms = int(heartbeat_interval * 1000)
+
+        self._connection = stomp.Connection12(host_and_ports = [(host, port)],
+                                              heartbeats = (heartbeat_ms, heartbeat_ms))
         self._connection.set_listener('', self)
 
-        self._text_topic = None
-        self._image_topic = None
+        self._reconnect = reconnect
+        self._initial_reconnect_delay = initial_reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._reconnect_thread = None
+        self._stopped = threading.Event()
 
-        self._text_regex = re.compile(r"""
-                                      ^TEXT   # "TEXT" at start of line
-                                      \s+     # some whitespace
-                                      (.*)    # the text message
-                                      """,
-                                      re.VERBOSE | re.IGNORECASE)
+        # Map of destination to (subscription id, handler), for every topic
+        # subscribed to. A handler of None stands for the client's listeners.
+        # The subscriptions are made again whenever the client reconnects.
+        self._subscriptions = {}
+        self._subscription_ids = itertools.count(1)
 
-        self._show_regex = re.compile(r"""
-                                      ^SHOW   # "SHOW" at start of line
-                                      \s+     # some whitespace
-                                      (.*)    # the URL of the image to show
-                                      """,
-                                      re.VERBOSE | re.IGNORECASE)
+        # Protects the subscriptions and connection state.
+        self._subscriptions_lock = threading.Lock()
+        self._connected = False
 
     def add_listener(self, listener):
         self._listeners.append(listener)
@@ -56,16 +148,107 @@ class RadioVisClient(stomp.ConnectionListener):
     def remove_listener(self, listener):
         self._listeners.remove(listener)
 
+    def add_frame_listener(self, listener):
+        """
+        Register an object whose stomp_frame() method is called with a
+        L{FrameEvent} for each frame received, and when the connection is
+        lost. Frame events are only created while there are frame
+        listeners.
+        """
+        self._frame_listeners = self._frame_listeners + [listener]
+
+    def remove_frame_listener(self, listener):
+        frame_listeners = list(self._frame_listeners)
+        frame_listeners.remove(listener)
+        self._frame_listeners = frame_listeners
+
     def start(self, text_topic = None, image_topic = None):
-        self._text_topic = text_topic
-        self._image_topic = image_topic
+        """
+        Connect to the server, subscribing to the given topics on behalf of
+        the client's listeners. Further topics can be subscribed to using
+        L{subscribe}.
+
+        Raises an exception if the connection can't be made. If the client
+        reconnects automatically, it then keeps trying in the background
+        until connected, or until L{stop} is called.
+        """
+        if text_topic is not None:
+            self.subscribe(text_topic)
+
+        if image_topic is not None:
+            self.subscribe(image_topic)
 
-        self._connection.connect(wait = True)
+        try:
+            self._connection.connect(wait = True)
+        except Exception:
+            self._start_reconnecting()
+            raise
 
     def stop(self):
-        self._connection.disconnect()
+        """
+        Close the connection, and stop any attempt to reconnect.
+        """
+        self._stopped.set()
+
+        try:
+            self._connection.disconnect()
+        except stomp.exception.NotConnectedException:
+            pass # ignore if no longer connected
+
         self._connection.transport.stop()
 
+    def subscribe(self, destination, handler = None):
+        """
+        Subscribe to a topic. If the client isn't connected yet, the
+        subscription is made once it is.
+
+        @param destination: The topic, e.g., "/topic/fm/ce1/c586/09580/text".
+
+        @param handler: The object whose radiovis_text() and radiovis_show()
+        methods are called for TEXT and SHOW messages received from the
+        topic, or None to notify the client's listeners. If the topic is
+        already subscribed to, this replaces its handler.
+        """
+        with self._subscriptions_lock:
+            if destination in self._subscriptions:
+                subscription_id, previous_handler = self._subscriptions[destination]
+                self._subscriptions[destination] = (subscription_id, handler)
+                return
+
+            subscription_id = str(next(self._subscription_ids))
+            self._subscriptions[destination] = (subscription_id, handler)
+
+            if self._connected:
+                self._send_subscribe(destination, subscription_id)
+
+    def unsubscribe(self, destination):
+        """
+        Unsubscribe from a topic. Messages from the topic that arrive
+        afterwards are ignored.
+        """
+        with self._subscriptions_lock:
+            subscription = self._subscriptions.pop(destination, None)
+
+            if subscription is not None and self._connected:
+                subscription_id, handler = subscription
+                self._connection.unsubscribe(id = subscription_id)
+
+    def is_connected(self):
+        with self._subscriptions_lock:
+            return self._connected
+
+    def get_subscriptions(self):
+        """
+        Return a list of the topics subscribed to.
+        """
+        with self._subscriptions_lock:
+            return list(self._subscriptions.keys())
+
+    def _send_subscribe(self, destination, subscription_id):
+        self._connection.subscribe(destination = destination,
+                                   id = subscription_id,
+                                   ack = 'auto')
+
     def on_connected(self, frame):
         """
         Once connected, subscribe to the message queues for TEXT and SHOW
@@ -73,56 +256,107 @@ class RadioVisClient(stomp.ConnectionListener):
         """
         self.notify("CONNECTED", frame)
 
-        if self._text_topic is not None:
-            self._connection.subscribe(destination = self._text_topic, ack = 'auto')
+        with self._subscriptions_lock:
+            self._connected = True
 
-        if self._image_topic is not None:
-            self._connection.subscribe(destination = self._image_topic, ack = 'auto')
+            for destination, (subscription_id, handler) in self._subscriptions.items():
+                self._send_subscribe(destination, subscription_id)
 
     def on_disconnected(self):
+        with self._subscriptions_lock:
+            self._connected = False
+
         self.notify("lost connection")
+        self._start_reconnecting()
 
-    def on_message(self, frame):
+    def on_heartbeat_timeout(self):
+        with self._subscriptions_lock:
+            self._connected = False
+
+        self.notify("heart-beat timeout")
+        self._start_reconnecting()
+
+    def _start_reconnecting(self):
+        if not self._reconnect or self._stopped.is_set():
+            return
+
+        with self._subscriptions_lock:
+            if self._reconnect_thread is not None:
+                return # Already reconnecting.
+
+            self._reconnect_thread = threading.Thread(target = self._reconnect_loop,
+                                                      name = "radiovis-reconnect",
+                                                      daemon = True)
+            self._reconnect_thread.start()
+
+    def _reconnect_loop(self):
         """
-        Handler for received MESSAGE frames. Parse the message body
-        to extract TEXT and SHOW RadioVIS messages.
+        Try to reconnect until connected, or until the client is stopped.
+        Runs on its own thread, as on_disconnected() is called on the
+        connection's receiver thread.
         """
-        self.notify("MESSAGE", frame)
+        attempt = 0
 
-        lines = frame.body.split('\n')
+        while True:
+            delay = get_reconnect_delay(attempt,
+                                        self._initial_reconnect_delay,
+                                        self._max_reconnect_delay)
 
-        for line in lines:
-            # Remove leading and trailing whitespace.
-            line = line.strip()
+            self.log("Reconnecting to RadioVIS server in %.1f s" % delay)
 
-            # Check for TEXT message.
-            match = self._text_regex.match(line)
+            if not self._stopped.wait(delay):
+                try:
+                    self._connection.connect(wait = True)
+                except Exception as e:
+                    self.log("Couldn't reconnect to RadioVIS server: %s" % e)
+
+            with self._subscriptions_lock:
+                # If the connection is lost again after this, on_disconnected()
+                # starts another thread.
+                if self._connected or self._stopped.is_set():
+                    self._reconnect_thread = None
+                    break
+
+            attempt += 1
+
+        if self._stopped.is_set() and self.is_connected():
+            # Stopped while connecting.
+            self.disconnect(None)
+
+    def on_message(self, frame):
+        """
+        Handler for received MESSAGE frames. Parse the message body
+        to extract TEXT and SHOW RadioVIS messages, and pass them to the
+        handler subscribed to the frame's destination.
+        """
+        self.notify("MESSAGE", frame)
 
-            if match:
-                # TODO: text should be no more than 128 characters.
-                text = match.group(1)
-                self.notify_text(text)
-            else:
-                # Check for SHOW message.
-                match = self._show_regex.match(line)
+        destination = frame.headers.get('destination')
 
-                if match:
-                    url = match.group(1)
+        with self._subscriptions_lock:
+            subscription = self._subscriptions.get(destination)
 
-                    if 'link' in frame.headers:
-                        link = frame.headers['link']
-                    else:
-                        link = None
+        if subscription is None:
+            self.log("Ignoring message for unsubscribed destination: %s" % destination)
+            return
 
-                    if 'trigger-time' in frame.headers:
-                        # TODO: Parse date_time and construct a datetime object.
-                        date_time = frame.headers['trigger-time']
-                    else:
-                        date_time = None
+        subscription_id, handler = subscription
 
-                    self.notify_show(url, link, date_time)
+        for message in parse_message(frame.body, frame.headers):
+            if isinstance(message, TextMessage):
+                if handler is not None:
+                    handler.radiovis_text(message.text)
+                else:
+                    self.notify_text(message.text)
+            elif isinstance(message, ShowMessage):
+                if handler is not None:
+                    handler.radiovis_show(message.image_url,
+                                          message.link_url,
+                                          message.trigger_time)
                 else:
-                    pass
+                    self.notify_show(message.image_url,
+                                     message.link_url,
+                                     message.trigger_time)
 
     def on_receipt(self, frame):
         self.notify("RECEIPT", frame)
@@ -136,20 +370,22 @@ class RadioVisClient(stomp.ConnectionListener):
     def disconnect(self, args):
         try:
             self._connection.disconnect()
-        except stomp.NotConnectedException:
+        except stomp.exception.NotConnectedException:
             pass # ignore if no longer connected
 
-    def notify(self, message, frame = None):
-        for listener in self._listeners:
-            listener.stomp_message(message)
+    def notify(self, event_type, frame = None):
+        """
+        Pass a L{FrameEvent} to the frame listeners, if there are any.
+        """
+        frame_listeners = self._frame_listeners
 
-            if frame is not None:
-                if frame.headers is not None:
-                    for header in frame.headers:
-                        listener.stomp_message("%s: %s" % (header, frame.headers[header]))
+        if len(frame_listeners) == 0:
+            return
 
-                if len(frame.body) > 0:
-                    listener.stomp_message(frame.body)
+        event = FrameEvent(event_type, frame)
+
+        for listener in frame_listeners:
+            listener.stomp_frame(event)
 
     def notify_text(self, text):
         """
@@ -186,7 +422,12 @@ class RadioVisClient(stomp.ConnectionListener):
 
         if date_time is None:
             headers['trigger-time'] = 'NOW'
+        elif isinstance(date_time, datetime.datetime):
+            headers['trigger-time'] = format_trigger_time(date_time)
         else:
             headers['trigger-time'] = date_time
 
         self._connection.send(destination = topic, message = message, headers = headers)
+
+    def log(self, message):
+        logging.info(message)
@@ -0,0 +1,247 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import logging
+import threading
+import time
+
+from .radiovis_client import RadioVisClient
+
+
+def get_proxy_key(proxy_settings):
+    """
+    Return a hashable value identifying a proxy server, or None for a direct
+    connection.
+    """
+    if proxy_settings is None:
+        return None
+
+    return (proxy_settings.get_proxy_type(),
+            proxy_settings.get_proxy_host(),
+            proxy_settings.get_proxy_port())
+
+
+class PooledClient:
+    def __init__(self, client):
+        self.client = client
+        self.users = 0
+        self.last_used = None
+
+
+class RadioVisConnectionPool:
+    """
+    Keeps RadioVIS (Stomp) connections open after use, keyed by server host
+    and port and the proxy server used, if any, so that changing to another station on the same server only
+    needs the topics to be unsubscribed and subscribed, rather than a new
+    connection.
+
+    Connections no longer in use are closed after the idle timeout, or when
+    there are more than max_connections open, starting with the least
+    recently used. Connections in use are never closed by the pool.
+    """
+    def __init__(self,
+                 max_connections = 4,
+                 idle_timeout = 300.0,
+                 scheduler = None,
+                 client_factory = RadioVisClient,
+                 clock = time.monotonic):
+        """
+        @param max_connections: The maximum number of connections to keep
+        open, including those in use.
+
+        @param idle_timeout: The time after which connections not in use are
+        closed, in seconds.
+
+        @param scheduler: A L{Scheduler} used to close idle connections when
+        they time out, or None to only close them on the next call to
+        L{acquire} or L{release}.
+
+        @param client_factory: Function taking (host, port, proxy_settings)
+        and returning a L{RadioVisClient} object.
+
+        @param clock: Function returning the current time, in seconds.
+        """
+        self._max_connections = max_connections
+        self._idle_timeout = idle_timeout
+        self._scheduler = scheduler
+        self._client_factory = client_factory
+        self._clock = clock
+
+        # Map of (host, port, proxy key) to PooledClient object, from least
+        # to most recently used.
+        self._clients = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, host, port, proxy_settings = None, retry = True):
+        """
+        Return a L{RadioVisClient} for the given server, reusing an open
+        connection if there is one. The client must be passed to L{release}
+        when no longer needed.
+
+        @param retry: If a new connection can't be made, whether to return the
+        client anyway, which keeps trying to connect in the background and
+        makes its subscriptions once connected. Otherwise an exception is
+        raised.
+        """
+        key = (host, port, get_proxy_key(proxy_settings))
+        closed_clients = []
+
+        with self._lock:
+            pooled_client = self._clients.get(key)
+
+            if (pooled_client is not None and
+                pooled_client.users == 0 and
+                not pooled_client.client.is_connected()):
+                # The server closed the connection while it was idle.
+                del self._clients[key]
+                closed_clients.append(pooled_client.client)
+                pooled_client = None
+
+            if pooled_client is not None:
+                self.log("Reusing RadioVIS connection: %s port %d" % (host, port))
+                pooled_client.users += 1
+                self._clients.move_to_end(key)
+                max_connections = self._max_connections
+            else:
+                # Make room for the new connection.
+                max_connections = self._max_connections - 1
+
+            closed_clients.extend(self._remove_idle_clients(max_connections))
+
+        self._stop_clients(closed_clients)
+
+        if pooled_client is not None:
+            if not retry and not pooled_client.client.is_connected():
+                # Another user is waiting for the client to reconnect.
+                self.release(pooled_client.client)
+                raise ConnectionError("Not connected: %s port %d" % (host, port))
+
+            return pooled_client.client
+
+        client = self._client_factory(host, port, proxy_settings)
+
+        try:
+            client.start()
+        except Exception as e:
+            if not retry:
+                # Stop the client trying to reconnect, as it isn't in the pool.
+                self._stop_clients([client])
+                raise
+
+            logging.warning("Couldn't connect to RadioVIS server %s port %d, retrying: %s" % (host, port, e))
+
+        with self._lock:
+            existing_client = self._clients.get(key)
+
+            if existing_client is not None:
+                # Another thread connected to the same server in the meantime.
+                existing_client.users += 1
+                closed_clients = [client]
+                client = existing_client.client
+            else:
+                pooled_client = PooledClient(client)
+                pooled_client.users = 1
+                self._clients[key] = pooled_client
+                closed_clients = []
+
+        self._stop_clients(closed_clients)
+
+        return client
+
+    def release(self, client):
+        """
+        Return a client obtained from L{acquire}. It is kept open, for reuse,
+        until it times out or is needed to make room for another connection.
+        """
+        with self._lock:
+            for key, pooled_client in self._clients.items():
+                if pooled_client.client is client:
+                    break
+            else:
+                key, pooled_client = None, None
+
+            if pooled_client is not None:
+                pooled_client.users -= 1
+
+                if pooled_client.users == 0:
+                    pooled_client.last_used = self._clock()
+                    self._clients.move_to_end(key)
+
+            closed_clients = self._remove_idle_clients(self._max_connections)
+
+        if pooled_client is None:
+            # Not from this pool, or already closed.
+            closed_clients.append(client)
+
+        self._stop_clients(closed_clients)
+
+        if (pooled_client is not None and
+            pooled_client.users == 0 and
+            self._scheduler is not None):
+            self._scheduler.schedule(time.time() + self._idle_timeout, self.close_idle)
+
+    def close_idle(self):
+        """
+        Close connections that have been idle for longer than the idle
+        timeout.
+        """
+        with self._lock:
+            closed_clients = self._remove_idle_clients(self._max_connections)
+
+        self._stop_clients(closed_clients)
+
+    def close_all(self):
+        with self._lock:
+            closed_clients = [pooled_client.client for pooled_client in self._clients.values()]
+            self._clients.clear()
+
+        self._stop_clients(closed_clients)
+
+    def get_connection_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def _remove_idle_clients(self, max_connections):
+        """
+        Remove idle clients that have timed out, and then the least recently
+        used idle clients until there are no more than max_connections.
+        Returns a list of the removed clients, to be stopped once the lock is
+        released.
+        """
+        now = self._clock()
+        removed_clients = []
+
+        for key, pooled_client in list(self._clients.items()):
+            if pooled_client.users > 0:
+                continue
+
+            if (now - pooled_client.last_used >= self._idle_timeout or
+                len(self._clients) > max_connections):
+                del self._clients[key]
+                removed_clients.append(pooled_client.client)
+
+        return removed_clients
+
+    def _stop_clients(self, clients):
+        for client in clients:
+            self.log("Closing RadioVIS connection")
+
+            try:
+                client.stop()
+            except Exception as e:
+                self.log("Error closing RadioVIS connection: %s" % e)
+
+    def log(self, message):
+        logging.info(message)
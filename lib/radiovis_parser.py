@@ -0,0 +1,198 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import datetime
+import logging
+
+
+# The maximum length of the text in a TEXT message, in characters.
+MAX_TEXT_LENGTH = 128
+
+
+def parse_trigger_time(value):
+    """
+    Parse the value of a SHOW message's trigger-time header, which is either
+    "NOW" or an ISO 8601 date and time, e.g., "2026-10-17T09:30:00Z". Times
+    without a time zone are taken to be in UTC.
+
+    Returns a timezone-aware datetime object, or None if the image should be
+    shown immediately (i.e., the value is "NOW" or can't be parsed).
+    """
+    value = value.strip()
+
+    if value.upper() == "NOW":
+        return None
+
+    # datetime.fromisoformat() doesn't accept the "Z" suffix in Python
+    # versions before 3.11.
+    if value.endswith("Z") or value.endswith("z"):
+        value = value[:-1] + "+00:00"
+
+    try:
+        date_time = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        logging.warning("Invalid trigger-time: " + value)
+        return None
+
+    if date_time.tzinfo is None:
+        date_time = date_time.replace(tzinfo = datetime.timezone.utc)
+
+    return date_time
+
+
+def format_trigger_time(date_time):
+    """
+    Format a datetime object as a trigger-time header value, in UTC. Naive
+    datetime objects are taken to be in UTC.
+    """
+    if date_time.tzinfo is not None:
+        date_time = date_time.astimezone(datetime.timezone.utc)
+
+    return date_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class TextMessage:
+    """
+    A RadioVIS TEXT message.
+    """
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class ShowMessage:
+    """
+    A RadioVIS SHOW message. The trigger time is parsed from the frame's
+    trigger-time header when it is first used, rather than when the message
+    is parsed.
+    """
+    __slots__ = ("image_url", "link_url", "trigger_time_header", "_trigger_time")
+
+    def __init__(self, image_url, link_url = None, trigger_time_header = None):
+        """
+        @param image_url: The URL of the image to show.
+
+        @param link_url: The URL of a web page related to the image, or None.
+
+        @param trigger_time_header: The value of the frame's trigger-time
+        header, or None.
+        """
+        self.image_url = image_url
+        self.link_url = link_url
+        self.trigger_time_header = trigger_time_header
+        self._trigger_time = _NOT_PARSED
+
+    @property
+    def trigger_time(self):
+        """
+        The time at which to show the image, as a datetime object, or None to
+        show it immediately.
+        """
+        if self._trigger_time is _NOT_PARSED:
+            if self.trigger_time_header is None:
+                self._trigger_time = None
+            else:
+                self._trigger_time = parse_trigger_time(self.trigger_time_header)
+
+        return self._trigger_time
+
+
+# Marks a trigger time that hasn't been parsed yet.
+_NOT_PARSED = object()
+
+
+class UnknownMessage:
+    """
+    A line of a message body that isn't a TEXT or SHOW message.
+    """
+    __slots__ = ("line",)
+
+    def __init__(self, line):
+        self.line = line
+
+
+def parse_message(body, headers = None):
+    """
+    Parse the body of a RadioVIS MESSAGE frame, in a single pass. Returns a
+    list of L{TextMessage}, L{ShowMessage} and L{UnknownMessage} objects, one
+    for each non-blank line of the body, in order.
+
+    Text longer than L{MAX_TEXT_LENGTH} characters is truncated.
+
+    @param body: The frame body, as a string.
+
+    @param headers: The frame headers, as a dict, from which SHOW messages'
+    link and trigger-time are taken, or None.
+    """
+    messages = []
+
+    for line in body.split("\n"):
+        line = line.strip()
+
+        # Messages almost always start with an upper case command and a
+        # single space, so check for that first, and leave other forms to
+        # _parse_line().
+        prefix = line[:5]
+
+        if prefix == "TEXT ":
+            text = line[5:].lstrip()
+
+            if len(text) > MAX_TEXT_LENGTH:
+                text = _truncate_text(text)
+
+            messages.append(TextMessage(text))
+        elif prefix == "SHOW ":
+            messages.append(_create_show_message(line[5:].lstrip(), headers))
+        elif line:
+            messages.append(_parse_line(line, headers))
+
+    return messages
+
+
+def _parse_line(line, headers):
+    """
+    Parse a non-blank line of a message body, whose command may be in any
+    case, and followed by any whitespace.
+    """
+    # Whitespace at the end of the line has already been removed, so a
+    # command followed by whitespace must have an argument.
+    command = line[:4].upper()
+
+    if line[4:5].isspace():
+        if command == "TEXT":
+            return _create_text_message(line[5:].lstrip())
+        elif command == "SHOW":
+            return _create_show_message(line[5:].lstrip(), headers)
+
+    return UnknownMessage(line)
+
+
+def _create_text_message(text):
+    if len(text) > MAX_TEXT_LENGTH:
+        text = _truncate_text(text)
+
+    return TextMessage(text)
+
+
+def _truncate_text(text):
+    logging.warning("Truncating TEXT message longer than %d characters" % MAX_TEXT_LENGTH)
+    return text[:MAX_TEXT_LENGTH]
+
+
+def _create_show_message(image_url, headers):
+    if headers is None:
+        return ShowMessage(image_url)
+
+    return ShowMessage(image_url, headers.get("link"), headers.get("trigger-time"))
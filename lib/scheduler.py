@@ -0,0 +1,116 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class ScheduledEvent:
+    def __init__(self, when, callback, args):
+        """
+        @param when: The time at which to call the callback, in seconds since
+        the epoch.
+        """
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class Scheduler(threading.Thread):
+    """
+    A worker thread that calls functions at given times. Pending events are
+    kept in a heap ordered by time, so the thread only wakes when the
+    earliest event is due, or when an earlier event is added.
+    """
+    def __init__(self, clock = time.time):
+        """
+        @param clock: Function returning the current time, in seconds.
+        """
+        threading.Thread.__init__(self, name = "scheduler", daemon = True)
+
+        self._clock = clock
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+
+    def schedule(self, when, callback, *args):
+        """
+        Call callback(*args) on the scheduler thread at the given time, in
+        seconds since the epoch. Returns a L{ScheduledEvent} object, which can
+        be passed to L{cancel}.
+        """
+        event = ScheduledEvent(when, callback, args)
+
+        with self._condition:
+            # The sequence number keeps events due at the same time in the
+            # order they were scheduled.
+            heapq.heappush(self._heap, (when, next(self._sequence), event))
+
+            # Wake the thread if this is now the earliest event.
+            if self._heap[0][2] is event:
+                self._condition.notify()
+
+        return event
+
+    def cancel(self, event):
+        """
+        Cancel a scheduled event. Cancelled events are left in the heap, and
+        discarded when they reach the top.
+        """
+        with self._condition:
+            event.cancelled = True
+
+    def get_pending_count(self):
+        with self._condition:
+            return sum(1 for when, sequence, event in self._heap if not event.cancelled)
+
+    def run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopped:
+                        return
+
+                    if len(self._heap) > 0 and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+
+                    if len(self._heap) == 0:
+                        self._condition.wait()
+                        continue
+
+                    wait_time = self._heap[0][0] - self._clock()
+
+                    if wait_time <= 0:
+                        when, sequence, event = heapq.heappop(self._heap)
+                        break
+
+                    self._condition.wait(wait_time)
+
+            try:
+                event.callback(*event.args)
+            except Exception:
+                logging.exception("Error in scheduled event")
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+        self.join()
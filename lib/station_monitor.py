@@ -0,0 +1,156 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import logging
+import threading
+
+from .radiovis_client import RadioVisClient
+
+
+class StationSubscription:
+    """
+    Receives the TEXT and SHOW messages for one station, and passes them on
+    to the monitor's listener along with the station.
+    """
+    def __init__(self, station, listener, broker):
+        """
+        @param broker: The (host, port) of the RadioVIS server.
+        """
+        self.station = station
+        self.broker = broker
+        self.text_topic = station.get_text_topic()
+        self.image_topic = station.get_image_topic()
+        self._listener = listener
+
+    def radiovis_text(self, text):
+        self._listener.station_text(self.station, text)
+
+    def radiovis_show(self, image_url, link_url, date_time):
+        self._listener.station_show(self.station, image_url, link_url, date_time)
+
+
+class StationMonitor:
+    """
+    Follows the RadioVIS messages of many stations at once. Stations served
+    by the same RadioVIS server share a single Stomp connection, which is
+    subscribed to the text and image topics of each of them, so the number of
+    connections depends on the number of servers rather than stations.
+
+    The listener's station_text(station, text) and station_show(station,
+    image_url, link_url, date_time) methods are called for each message, on
+    the connection's receiver thread.
+    """
+    def __init__(self, listener, proxy_settings = None, client_factory = RadioVisClient):
+        """
+        @param listener: The object to notify of received messages.
+
+        @param proxy_settings: The L{ProxySettings} to connect through, or
+        None.
+
+        @param client_factory: Function taking (host, port, proxy_settings)
+        and returning a L{RadioVisClient} object.
+        """
+        self._listener = listener
+        self._proxy_settings = proxy_settings
+        self._client_factory = client_factory
+
+        # Map of (host, port) to RadioVisClient object.
+        self._clients = {}
+
+        # Map of station to StationSubscription object.
+        self._subscriptions = {}
+
+        self._lock = threading.Lock()
+
+    def add_station(self, host, port, station):
+        """
+        Start following a station's messages from the RadioVIS server at the
+        given host and port, connecting to the server if there isn't already
+        a connection to it.
+        """
+        self.remove_station(station)
+
+        broker = (host, port)
+        subscription = StationSubscription(station, self._listener, broker)
+
+        with self._lock:
+            client = self._clients.get(broker)
+            new_client = client is None
+
+            if new_client:
+                self.log("Connecting to RadioVIS server: %s port %d" % broker)
+                client = self._client_factory(host, port, self._proxy_settings)
+                self._clients[broker] = client
+
+            self._subscriptions[station] = subscription
+
+            client.subscribe(subscription.text_topic, subscription)
+            client.subscribe(subscription.image_topic, subscription)
+
+        if new_client:
+            try:
+                client.start()
+            except Exception as e:
+                logging.warning("Couldn't connect to RadioVIS server %s port %d: %s" % (host, port, e))
+
+    def remove_station(self, station):
+        """
+        Stop following a station's messages. The connection to its server is
+        closed if no other stations use it.
+        """
+        with self._lock:
+            subscription = self._subscriptions.pop(station, None)
+
+            if subscription is None:
+                return
+
+            client = self._clients[subscription.broker]
+            client.unsubscribe(subscription.text_topic)
+            client.unsubscribe(subscription.image_topic)
+
+            if len(client.get_subscriptions()) > 0:
+                return
+
+            del self._clients[subscription.broker]
+
+        self._stop_client(client)
+
+    def stop(self):
+        """
+        Close all connections.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._subscriptions.clear()
+
+        for client in clients:
+            self._stop_client(client)
+
+    def get_station_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def get_connection_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def _stop_client(self, client):
+        try:
+            client.stop()
+        except Exception as e:
+            self.log("Error closing RadioVIS connection: %s" % e)
+
+    def log(self, message):
+        logging.info(message)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Follow the RadioVIS messages of every radio station in the config files that
+has a RadioVIS service, and write them as CSV to stdout. Stations served by
+the same RadioVIS server share a single connection.
+"""
+
+import argparse
+import csv
+import datetime
+import logging
+import os.path
+import sys
+import threading
+import time
+
+from lib.dns_backend import ZoneFileDnsBackend
+from lib.dns_resolver import DnsResolver, order_services
+from lib.fleet_resolver import FleetResolver
+from lib.radio_station_list import RadioStationList
+from lib.radiodns_domain import RadioDnsDomainList
+from lib.radiodns_service import RadioDnsServiceList
+from lib.station_monitor import StationMonitor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description = __doc__)
+
+    parser.add_argument("--config-dir",
+                        default = "conf",
+                        help = "directory containing the config files (default: %(default)s)")
+
+    parser.add_argument("--concurrency",
+                        type = int,
+                        default = 32,
+                        help = "number of stations to resolve at once (default: %(default)s)")
+
+    parser.add_argument("--timeout",
+                        type = float,
+                        default = 5.0,
+                        help = "time limit for each DNS query, in seconds (default: %(default)s)")
+
+    parser.add_argument("--zone-file",
+                        metavar = "FILENAME",
+                        action = "append",
+                        help = "answer DNS queries from a zone file, for offline testing (may be repeated)")
+
+    parser.add_argument("--duration",
+                        type = float,
+                        metavar = "SECONDS",
+                        help = "stop after this time (default: run until interrupted)")
+
+    parser.add_argument("--verbose",
+                        action = "store_true",
+                        help = "log each DNS query and Stomp connection")
+
+    return parser.parse_args()
+
+
+class MessageWriter:
+    """
+    Writes the messages received by a L{StationMonitor} as CSV rows.
+    """
+    def __init__(self, writer):
+        self._writer = writer
+        self._lock = threading.Lock()
+
+    def station_text(self, station, text):
+        self._write_row(station, "TEXT", text, "", "")
+
+    def station_show(self, station, image_url, link_url, date_time):
+        trigger_time = date_time.isoformat() if date_time is not None else "NOW"
+
+        self._write_row(station, "SHOW", image_url, link_url or "", trigger_time)
+
+    def _write_row(self, station, message_type, value, link_url, trigger_time):
+        received_time = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+        # Messages for stations on different servers arrive on different
+        # threads.
+        with self._lock:
+            self._writer.writerow([received_time,
+                                   station.get_name(),
+                                   message_type,
+                                   value,
+                                   link_url,
+                                   trigger_time])
+            sys.stdout.flush()
+
+
+def main():
+    args = parse_args()
+
+    logging.basicConfig(level = logging.INFO if args.verbose else logging.WARNING,
+                        stream = sys.stderr)
+
+    radio_stations = RadioStationList(
+        os.path.join(args.config_dir, "radio_stations.xml"))
+
+    radiodns_domains = RadioDnsDomainList(
+        os.path.join(args.config_dir, "radiodns_domains.xml"))
+
+    radiodns_services = RadioDnsServiceList(
+        os.path.join(args.config_dir, "radiodns_services.xml"))
+
+    radiovis_services = [service for service in radiodns_services
+                         if service.get_name() == "RadioVIS"]
+
+    dns_backend = None
+
+    if args.zone_file:
+        dns_backend = ZoneFileDnsBackend(args.zone_file)
+
+    dns_resolver = DnsResolver(lifetime = args.timeout, backend = dns_backend)
+
+    fleet_resolver = FleetResolver(dns_resolver,
+                                   radiovis_services,
+                                   concurrency = args.concurrency)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["received", "name", "type", "value", "link", "trigger_time"])
+
+    monitor = StationMonitor(MessageWriter(writer))
+
+    try:
+        for result in fleet_resolver.resolve(radio_stations, radiodns_domains):
+            services = order_services(result.services)
+
+            if len(services) == 0:
+                continue
+
+            monitor.add_station(services[0].target, services[0].port, result.station)
+
+        sys.stderr.write("Monitoring %d stations over %d connections\n" %
+                         (monitor.get_station_count(), monitor.get_connection_count()))
+
+        if args.duration is not None:
+            time.sleep(args.duration)
+        else:
+            while True:
+                time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,7 @@
 Entry point for the RadioVisDemo application.
 """
 
+import argparse
 import logging
 import os.path
 import threading
@@ -25,6 +26,7 @@ import wx
 
 from lib.main_frame import MainFrame
 from lib.connection_manager import ConnectionManager
+from lib.dns_backend import ZoneFileDnsBackend
 from lib.radio_station_list import RadioStationList
 from lib.radiodns_domain import RadioDnsDomainList
 from lib.radiodns_service import RadioDnsServiceList
@@ -37,11 +39,26 @@ class RadioVisDemoApp(wx.App):
     """
     def __init__(
         self, redirect = False, filename = None, useBestVisual = False,
-        clearSigInt = True):
+        clearSigInt = True, dns_cache_filename = None, zone_filenames = None,
+        dns_metrics_filename = None, image_cache_dirname = None,
+        image_cache_size = 100 * 1024 * 1024):
 
         # Directory for config files.
         self._config_dir = "conf"
 
+        # File for keeping DNS answers between runs.
+        self._dns_cache_filename = dns_cache_filename
+
+        # Zone files to answer DNS queries from, instead of the DNS.
+        self._zone_filenames = zone_filenames
+
+        # File for writing DNS query timings and outcomes on exit.
+        self._dns_metrics_filename = dns_metrics_filename
+
+        # Directory for keeping images between runs, and its size limit.
+        self._image_cache_dirname = image_cache_dirname
+        self._image_cache_size = image_cache_size
+
         wx.App.__init__(self, redirect, filename, useBestVisual, clearSigInt)
 
     def OnInit(self):
@@ -72,7 +89,17 @@ class RadioVisDemoApp(wx.App):
         frame.set_radiodns_domains(radiodns_domains)
         frame.set_test_radiovis_services(test_radiovis_services)
 
-        connection_manager = ConnectionManager(radiodns_services)
+        dns_backend = None
+
+        if self._zone_filenames:
+            dns_backend = ZoneFileDnsBackend(self._zone_filenames)
+
+        connection_manager = ConnectionManager(radiodns_services,
+                                               dns_cache_filename = self._dns_cache_filename,
+                                               dns_backend = dns_backend,
+                                               dns_metrics_filename = self._dns_metrics_filename,
+                                               image_cache_dirname = self._image_cache_dirname,
+                                               image_cache_size = self._image_cache_size)
 
         frame.set_connection_manager(connection_manager)
         return True
@@ -83,6 +110,34 @@ class RadioVisDemoApp(wx.App):
         """
         return os.path.join(self._config_dir, filename)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description = "RadioVIS Demo Application")
+
+    parser.add_argument("--dns-cache",
+                        metavar = "FILENAME",
+                        help = "file in which to keep DNS answers between runs")
+
+    parser.add_argument("--zone-file",
+                        metavar = "FILENAME",
+                        action = "append",
+                        help = "answer DNS queries from a zone file, for offline testing (may be repeated)")
+
+    parser.add_argument("--dns-metrics",
+                        metavar = "FILENAME",
+                        help = "file to write DNS query timings and outcomes to on exit")
+
+    parser.add_argument("--image-cache",
+                        metavar = "DIRNAME",
+                        help = "directory in which to keep images between runs")
+
+    parser.add_argument("--image-cache-size",
+                        metavar = "MB",
+                        type = int,
+                        default = 100,
+                        help = "maximum size of the images kept in the image cache directory (default: %(default)s)")
+
+    return parser.parse_args()
+
 def init_logging():
     logger = logging.getLogger() # Get the root logger
     logger.setLevel(logging.DEBUG)
@@ -96,7 +151,13 @@ if __name__ == '__main__':
     thread = threading.current_thread()
     thread.name = "gui" # Allow the GUI thread to be identified.
 
+    args = parse_args()
+
     init_logging()
 
-    app = RadioVisDemoApp()
+    app = RadioVisDemoApp(dns_cache_filename = args.dns_cache,
+                          zone_filenames = args.zone_file,
+                          dns_metrics_filename = args.dns_metrics,
+                          image_cache_dirname = args.image_cache,
+                          image_cache_size = args.image_cache_size * 1024 * 1024)
     app.MainLoop()
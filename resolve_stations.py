@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Resolve the CNAME and RadioDNS services of every radio station in the config
+files, against every RadioDNS domain, and write the results as CSV to stdout.
+"""
+
+import argparse
+import csv
+import logging
+import os.path
+import sys
+import time
+
+from lib.dns_backend import ZoneFileDnsBackend
+from lib.dns_resolver import DnsResolver
+from lib.fleet_resolver import FleetResolver
+from lib.radio_station_list import RadioStationList
+from lib.radiodns_domain import RadioDnsDomainList
+from lib.radiodns_service import RadioDnsServiceList
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description = __doc__)
+
+    parser.add_argument("--config-dir",
+                        default = "conf",
+                        help = "directory containing the config files (default: %(default)s)")
+
+    parser.add_argument("--concurrency",
+                        type = int,
+                        default = 32,
+                        help = "number of stations to resolve at once (default: %(default)s)")
+
+    parser.add_argument("--timeout",
+                        type = float,
+                        default = 5.0,
+                        help = "time limit for each DNS query, in seconds (default: %(default)s)")
+
+    parser.add_argument("--zone-file",
+                        metavar = "FILENAME",
+                        action = "append",
+                        help = "answer DNS queries from a zone file, for offline testing (may be repeated)")
+
+    parser.add_argument("--dns-metrics",
+                        metavar = "FILENAME",
+                        help = "file to write DNS query timings and outcomes to")
+
+    parser.add_argument("--verbose",
+                        action = "store_true",
+                        help = "log each DNS query")
+
+    return parser.parse_args()
+
+def write_result(writer, result):
+    name = result.station.get_name()
+    cname = result.cname if result.cname is not None else ""
+
+    if len(result.services) == 0:
+        writer.writerow([name, result.hostname, cname, "", "", "", "", ""])
+
+    for service in result.services:
+        writer.writerow([name,
+                         result.hostname,
+                         cname,
+                         service.name,
+                         service.target,
+                         service.port,
+                         service.priority,
+                         service.weight])
+
+def main():
+    args = parse_args()
+
+    logging.basicConfig(level = logging.INFO if args.verbose else logging.WARNING,
+                        stream = sys.stderr)
+
+    radio_stations = RadioStationList(
+        os.path.join(args.config_dir, "radio_stations.xml"))
+
+    radiodns_domains = RadioDnsDomainList(
+        os.path.join(args.config_dir, "radiodns_domains.xml"))
+
+    radiodns_services = RadioDnsServiceList(
+        os.path.join(args.config_dir, "radiodns_services.xml"))
+
+    dns_backend = None
+
+    if args.zone_file:
+        dns_backend = ZoneFileDnsBackend(args.zone_file)
+
+    dns_resolver = DnsResolver(lifetime = args.timeout, backend = dns_backend)
+
+    fleet_resolver = FleetResolver(dns_resolver,
+                                   radiodns_services,
+                                   concurrency = args.concurrency)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["name", "hostname", "cname", "service", "target", "port", "priority", "weight"])
+
+    start_time = time.time()
+    count = 0
+
+    for result in fleet_resolver.resolve(radio_stations, radiodns_domains):
+        write_result(writer, result)
+        sys.stdout.flush()
+        count += 1
+
+    elapsed_time = time.time() - start_time
+
+    sys.stderr.write("Resolved %d hostnames in %.2f s\n" % (count, elapsed_time))
+
+    for line in dns_resolver.get_metrics().get_summary():
+        sys.stderr.write(line + "\n")
+
+    if args.dns_metrics is not None:
+        dns_resolver.get_metrics().save(args.dns_metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for ConnectionManager class.
+"""
+
+from lib.connection_manager import ConnectionManager
+from lib.dns_resolver import ServiceRecord
+from lib.fm_radio_station import FmRadioStation
+from lib.radiodns_service import RadioDnsService
+from lib.scheduler import Scheduler
+
+import datetime
+import threading
+import time
+
+class DummyClient:
+    """
+    Stands in for RadioVisClient, without connecting to a server.
+    """
+    def __init__(self):
+        self.handlers = {}
+
+    def subscribe(self, destination, handler = None):
+        self.handlers[destination] = handler
+
+    def unsubscribe(self, destination):
+        self.handlers.pop(destination, None)
+
+class DummyPool:
+    """
+    Stands in for RadioVisConnectionPool, with one client for all servers,
+    apart from unavailable.example.com, which refuses connections unless
+    the client is left retrying.
+    """
+    def __init__(self):
+        self.client = DummyClient()
+        self.acquired = []
+
+    def acquire(self, host, port, proxy_settings = None, retry = True):
+        if host == "unavailable.example.com" and not retry:
+            raise ConnectionRefusedError()
+
+        self.acquired.append((host, port))
+        return self.client
+
+    def release(self, client):
+        pass
+
+    def close_all(self):
+        pass
+
+class DummyHttpClient:
+    """
+    Stands in for HttpClientThread, and records the requests made.
+    """
+    def __init__(self):
+        self.requests = []
+        self.callbacks = {}
+        self.cancelled = []
+
+    def request(self, url, proxy_settings = None, key = None, callback = None):
+        self.requests.append((url, key))
+        self.callbacks[key] = callback
+
+    def cancel(self, key = None):
+        self.cancelled.append(key)
+
+    def stop(self):
+        pass
+
+class ReverseOrderResolver:
+    """
+    Stands in for DnsResolver, answering the SRV queries for the services in
+    the reverse of the order they are listed in.
+    """
+    def __init__(self, records):
+        self.records = records
+        self.answered = dict((record, threading.Event()) for record in records)
+        self.answer_order = []
+        self.lock = threading.Lock()
+
+    def get_services(self, record, cname, name):
+        index = self.records.index(record)
+
+        if index + 1 < len(self.records):
+            # Wait for the next service to be answered first.
+            self.answered[self.records[index + 1]].wait(5.0)
+
+        with self.lock:
+            self.answer_order.append(record)
+
+        self.answered[record].set()
+
+        return ["%s.%s" % (record, cname)]
+
+class FakeClock:
+    def __init__(self):
+        # A whole number of seconds, so that trigger times are exact.
+        self.now = float(int(time.time()))
+
+    def __call__(self):
+        return self.now
+
+class DummyListener:
+    def __init__(self):
+        self.shows = []
+        self.images = []
+        self.prefetched_images = []
+
+    def radiovis_text(self, text):
+        pass
+
+    def radiovis_show(self, image_url, link_url, date_time):
+        self.shows.append(image_url)
+
+    def radiovis_image(self, image_data):
+        self.images.append(image_data)
+
+    def radiovis_image_prefetched(self, image_data):
+        self.prefetched_images.append(image_data)
+
+def advance(scheduler, clock, when):
+    """
+    Move the clock on, and wait for the scheduler to call everything due by
+    then.
+    """
+    clock.now = when
+
+    # The scheduler calls the events that are due in order, ending with this
+    # one, as it is scheduled after any others due at the same time.
+    done = threading.Event()
+    scheduler.schedule(when, done.set)
+
+    # Scheduling an event earlier than all others wakes the scheduler.
+    scheduler.schedule(0, lambda: None)
+
+    assert done.wait(5.0)
+
+def get_trigger_time(when):
+    return datetime.datetime.fromtimestamp(when, datetime.timezone.utc)
+
+def create_station(name, frequency):
+    return FmRadioStation(name, ecc = "e1", pi = "c586", freq = frequency)
+
+def test_ignore_previous_station():
+    connection_manager = ConnectionManager([])
+    connection_manager._http_client.stop()
+    connection_manager._http_client = DummyHttpClient()
+    connection_manager._radiovis_pool = DummyPool()
+
+    try:
+        station_1 = create_station("Station 1", 9580)
+        station_2 = create_station("Station 2", 9730)
+
+        client = connection_manager._radiovis_pool.client
+
+        connection_manager.connect_radiovis("vis.example.com", 61613, station_1, False)
+        handler_1 = client.handlers[station_1.get_image_topic()]
+
+        connection_manager.connect_radiovis("vis.example.com", 61613, station_2, False)
+        handler_2 = client.handlers[station_2.get_image_topic()]
+
+        # A message for the first station handled after changing station.
+        handler_1.radiovis_show("http://example.com/1.png", None, None)
+        handler_2.radiovis_show("http://example.com/2.png", None, None)
+    finally:
+        connection_manager.shutdown()
+
+    assert connection_manager._http_client.requests == [
+        ("http://example.com/2.png", station_2.get_image_topic())]
+
+def test_get_services_order():
+    radiodns_services = [RadioDnsService("RadioVIS", "_radiovis._tcp"),
+                         RadioDnsService("RadioEPG", "_radioepg._tcp"),
+                         RadioDnsService("RadioTAG", "_radiotag._tcp")]
+
+    records = [service.get_record() for service in radiodns_services]
+
+    connection_manager = ConnectionManager(radiodns_services)
+    connection_manager._dns = ReverseOrderResolver(records)
+
+    try:
+        services = connection_manager.get_services("rdns.example.com")
+    finally:
+        connection_manager.shutdown()
+
+    # The services are returned in config order, whatever the order in
+    # which they were answered.
+    assert connection_manager._dns.answer_order == list(reversed(records))
+    assert services == ["_radiovis._tcp.rdns.example.com",
+                        "_radioepg._tcp.rdns.example.com",
+                        "_radiotag._tcp.rdns.example.com"]
+
+def test_connect_radiovis_auto_fallback():
+    connection_manager = ConnectionManager([])
+    connection_manager._http_client.stop()
+    connection_manager._http_client = DummyHttpClient()
+    connection_manager._radiovis_pool = DummyPool()
+
+    services = [ServiceRecord(name = "RadioVIS", target = "unavailable.example.com", port = 61613, priority = 0),
+                ServiceRecord(name = "RadioVIS", target = "vis.example.com", port = 61613, priority = 10)]
+
+    station = create_station("Station 1", 9580)
+
+    try:
+        assert connection_manager.connect_radiovis_auto(services, station, False)
+
+        client = connection_manager._radiovis_pool.client
+        assert station.get_image_topic() in client.handlers
+    finally:
+        connection_manager.shutdown()
+
+    # The Stomp connection to the second server is used, without another
+    # connection being made to it.
+    assert connection_manager._radiovis_pool.acquired == [("vis.example.com", 61613)]
+
+def test_connect_radiovis_auto_unavailable():
+    connection_manager = ConnectionManager([])
+    connection_manager._http_client.stop()
+    connection_manager._http_client = DummyHttpClient()
+    connection_manager._radiovis_pool = DummyPool()
+
+    services = [ServiceRecord(name = "RadioVIS", target = "unavailable.example.com", port = 61613)]
+
+    station = create_station("Station 1", 9580)
+
+    try:
+        assert not connection_manager.connect_radiovis_auto(services, station, False)
+
+        # The client keeps trying to connect, and subscribes once connected.
+        client = connection_manager._radiovis_pool.client
+        assert station.get_image_topic() in client.handlers
+    finally:
+        connection_manager.shutdown()
+
+    assert connection_manager._radiovis_pool.acquired == [("unavailable.example.com", 61613)]
+
+def test_scheduled_show():
+    clock = FakeClock()
+    listener = DummyListener()
+
+    connection_manager = ConnectionManager([])
+    connection_manager._http_client.stop()
+    connection_manager._http_client = DummyHttpClient()
+    connection_manager._radiovis_pool = DummyPool()
+    connection_manager._scheduler.stop()
+    connection_manager._scheduler = Scheduler(clock)
+    connection_manager._scheduler.start()
+    connection_manager.add_listener(listener)
+
+    http_client = connection_manager._http_client
+    scheduler = connection_manager._scheduler
+    start_time = clock.now
+
+    try:
+        station_1 = create_station("Station 1", 9580)
+        station_2 = create_station("Station 2", 9730)
+        image_topic = station_1.get_image_topic()
+
+        connection_manager.connect_radiovis("vis.example.com", 61613, station_1, False)
+        handler = connection_manager._radiovis_pool.client.handlers[image_topic]
+
+        # The image is downloaded 30 seconds before the trigger time.
+        handler.radiovis_show("http://example.com/1.png", None, get_trigger_time(start_time + 60))
+
+        advance(scheduler, clock, start_time + 29)
+        assert http_client.requests == []
+
+        advance(scheduler, clock, start_time + 30)
+        show = http_client.requests[0][1]
+        assert http_client.requests == [("http://example.com/1.png", show)]
+
+        http_client.callbacks[show](b"image 1")
+        assert listener.prefetched_images == [b"image 1"]
+        assert listener.shows == []
+
+        # At the trigger time, the prefetched image is shown.
+        advance(scheduler, clock, start_time + 60)
+        assert listener.shows == ["http://example.com/1.png"]
+        assert listener.images == [b"image 1"]
+        assert http_client.cancelled[-2:] == [image_topic, show]
+
+        # If the prefetch hasn't finished, the image is requested for the
+        # station, sharing the download, before the prefetch is cancelled.
+        handler.radiovis_show("http://example.com/2.png", None, get_trigger_time(start_time + 100))
+        advance(scheduler, clock, start_time + 70)
+        show = http_client.requests[-1][1]
+
+        advance(scheduler, clock, start_time + 100)
+        assert listener.shows[-1] == "http://example.com/2.png"
+        assert http_client.requests[-1] == ("http://example.com/2.png", image_topic)
+        assert http_client.cancelled[-1] == show
+
+        # Shows still waiting are cancelled when the station changes.
+        handler.radiovis_show("http://example.com/3.png", None, get_trigger_time(start_time + 200))
+        advance(scheduler, clock, start_time + 170)
+        show = http_client.requests[-1][1]
+
+        connection_manager.connect_radiovis("vis.example.com", 61613, station_2, False)
+        assert show in http_client.cancelled
+
+        request_count = len(http_client.requests)
+        advance(scheduler, clock, start_time + 200)
+    finally:
+        connection_manager.shutdown()
+
+    assert listener.shows == ["http://example.com/1.png", "http://example.com/2.png"]
+    assert len(http_client.requests) == request_count
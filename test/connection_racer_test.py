@@ -0,0 +1,73 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for ConnectionRacer class.
+"""
+
+from lib.connection_racer import ConnectionRacer
+
+import socket
+
+def get_unused_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def test_ConnectionRacer():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(5)
+    port = server.getsockname()[1]
+
+    try:
+        targets = [("127.0.0.1", get_unused_port()), ("127.0.0.1", port)]
+        winner, sock = ConnectionRacer(attempt_delay = 1.0, timeout = 5.0).race(targets)
+        sock.close()
+    finally:
+        server.close()
+
+    assert winner == ("127.0.0.1", port)
+
+def test_ConnectionRacer_no_server():
+    targets = [("127.0.0.1", get_unused_port())]
+    winner, sock = ConnectionRacer(attempt_delay = 0.1, timeout = 1.0).race(targets)
+
+    assert winner is None
+    assert sock is None
+
+def test_ConnectionRacer_connect():
+    connected = []
+    closed = []
+
+    def connect(target, timeout):
+        if target[0] == "unavailable.example.com":
+            raise ConnectionRefusedError()
+
+        connected.append(target)
+        return "connection to " + target[0]
+
+    racer = ConnectionRacer(attempt_delay = 1.0, timeout = 5.0, connect = connect, close = closed.append)
+
+    targets = [("unavailable.example.com", 61613), ("vis.example.com", 61613)]
+    winner, connection = racer.race(targets)
+
+    # The next server is tried as soon as the first fails, and the winning
+    # connection is returned rather than closed.
+    assert winner == ("vis.example.com", 61613)
+    assert connection == "connection to vis.example.com"
+    assert connected == [("vis.example.com", 61613)]
+    assert closed == []
@@ -0,0 +1,67 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for DecodedImageCache class.
+"""
+
+from lib.decoded_image_cache import DecodedImageCache, get_image_key, get_scaled_size
+
+def test_get_image_key():
+    assert get_image_key(b"image", 320, 240) == get_image_key(bytearray(b"image"), 320, 240)
+    assert get_image_key(b"image", 320, 240) != get_image_key(b"image", 640, 480)
+    assert get_image_key(b"image", 320, 240) != get_image_key(b"other", 320, 240)
+
+def test_get_scaled_size():
+    # Images are scaled down or up to fit, keeping their aspect ratio.
+    assert get_scaled_size(640, 480, 320, 240) == (320, 240)
+    assert get_scaled_size(800, 400, 320, 240) == (320, 160)
+    assert get_scaled_size(300, 600, 320, 240) == (120, 240)
+    assert get_scaled_size(160, 120, 320, 240) == (320, 240)
+
+def test_get_scaled_size_tiny():
+    assert get_scaled_size(1, 1, 320, 240) == (240, 240)
+    assert get_scaled_size(2, 1, 320, 240) == (320, 160)
+
+def test_get_scaled_size_clamped():
+    # Very wide or tall images are at least 1 pixel high or wide.
+    assert get_scaled_size(100000, 1, 320, 240) == (320, 1)
+    assert get_scaled_size(1, 100000, 320, 240) == (1, 240)
+
+def test_DecodedImageCache():
+    cache = DecodedImageCache()
+    key = get_image_key(b"image", 320, 240)
+    decoded_image = object()
+
+    cache.put(key, decoded_image)
+
+    assert cache.get(key) is decoded_image
+    assert cache.get(get_image_key(b"other", 320, 240)) is None
+    assert cache.get_hits() == 1
+    assert cache.get_misses() == 1
+
+def test_DecodedImageCache_lru_eviction():
+    cache = DecodedImageCache(max_entries = 2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    # Use 'a', so that 'b' becomes the least recently used entry.
+    cache.get("a")
+
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
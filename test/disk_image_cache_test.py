@@ -0,0 +1,162 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for DiskImageCache class.
+"""
+
+from lib.disk_image_cache import DiskImageCache
+from lib.image_cache import ImageCache, ImageCacheEntry
+
+import os
+import tempfile
+
+def create_entry(url, body):
+    return ImageCacheEntry(url, body, 2000.0, etag = '"1"')
+
+def get_image_files(dirname):
+    return [filename for filename in os.listdir(dirname) if filename != "index.json"]
+
+def test_DiskImageCache():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache = DiskImageCache(dirname)
+        cache.put(create_entry("http://example.com/1.png", b"image"))
+
+        entry = cache.get("http://example.com/1.png")
+
+        assert entry.body == b"image"
+        assert entry.expires == 2000.0
+        assert entry.etag == '"1"'
+        assert entry.last_modified is None
+        assert cache.get("http://example.com/2.png") is None
+
+def test_DiskImageCache_reload():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache = DiskImageCache(dirname)
+        cache.put(create_entry("http://example.com/1.png", b"image"))
+        cache.flush()
+
+        cache = DiskImageCache(dirname)
+
+        assert len(cache) == 1
+        assert cache.get_size() == 5
+        assert cache.get("http://example.com/1.png").body == b"image"
+
+def test_DiskImageCache_shared_content():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache = DiskImageCache(dirname)
+        cache.put(create_entry("http://example.com/1.png", b"image"))
+        cache.put(create_entry("http://example.org/1.png", b"image"))
+
+        # Identical images are stored once.
+        assert len(cache) == 2
+        assert cache.get_size() == 5
+        assert len(get_image_files(dirname)) == 1
+
+        cache.remove("http://example.com/1.png")
+        assert len(get_image_files(dirname)) == 1
+
+        cache.remove("http://example.org/1.png")
+        assert len(get_image_files(dirname)) == 0
+        assert cache.get_size() == 0
+
+def test_DiskImageCache_lru_eviction():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache = DiskImageCache(dirname, max_size = 10)
+        cache.put(create_entry("a", b"1111"))
+        cache.put(create_entry("b", b"2222"))
+
+        # Use 'a', so that 'b' becomes the least recently used entry.
+        cache.get("a")
+
+        cache.put(create_entry("c", b"3333"))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.get_size() == 8
+        assert len(get_image_files(dirname)) == 2
+
+def test_DiskImageCache_replace_shared_content():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache = DiskImageCache(dirname)
+        cache.put(create_entry("a", b"1111"))
+        cache.put(create_entry("b", b"1111"))
+
+        # The image is still used by 'b'.
+        cache.put(create_entry("a", b"2222"))
+        assert len(get_image_files(dirname)) == 2
+
+        cache.put(create_entry("b", b"2222"))
+        assert len(get_image_files(dirname)) == 1
+        assert cache.get_size() == 4
+
+def test_DiskImageCache_batched_index_writes():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache = DiskImageCache(dirname)
+        index_pathname = os.path.join(dirname, "index.json")
+
+        for i in range(DiskImageCache.MAX_UNSAVED_CHANGES - 1):
+            cache.put(create_entry("http://example.com/%d.png" % i, b"image %d" % i))
+
+        assert not os.path.exists(index_pathname)
+
+        cache.put(create_entry("http://example.com/last.png", b"last"))
+        assert os.path.exists(index_pathname)
+
+        cache.remove("http://example.com/last.png")
+        cache.flush()
+
+        cache = DiskImageCache(dirname)
+
+        assert len(cache) == DiskImageCache.MAX_UNSAVED_CHANGES - 1
+        assert cache.get("http://example.com/last.png") is None
+        assert len(get_image_files(dirname)) == DiskImageCache.MAX_UNSAVED_CHANGES - 1
+
+def test_DiskImageCache_corrupt_image():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache = DiskImageCache(dirname)
+        cache.put(create_entry("http://example.com/1.png", b"image"))
+
+        filename = get_image_files(dirname)[0]
+
+        with open(os.path.join(dirname, filename), "wb") as f:
+            f.write(b"imag")
+
+        assert cache.get("http://example.com/1.png") is None
+        assert len(cache) == 0
+
+def test_DiskImageCache_ignores_other_files():
+    with tempfile.TemporaryDirectory() as dirname:
+        with open(os.path.join(dirname, "other.txt"), "w") as f:
+            f.write("other")
+
+        cache = DiskImageCache(dirname)
+
+        assert len(cache) == 0
+        assert os.path.exists(os.path.join(dirname, "other.txt"))
+
+def test_ImageCache_disk_cache():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache = ImageCache(disk_cache = DiskImageCache(dirname))
+        cache.put("http://example.com/1.png", b"image", {"cache-control": "max-age=60"})
+        cache.flush()
+
+        # A new memory cache should find the image on disk.
+        cache = ImageCache(disk_cache = DiskImageCache(dirname))
+        entry = cache.get("http://example.com/1.png")
+
+        assert entry.body == b"image"
+        assert cache.is_fresh(entry)
+        assert len(cache) == 1
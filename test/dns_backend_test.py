@@ -0,0 +1,71 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for ZoneFileDnsBackend class.
+"""
+
+from lib.dns_backend import ZoneFileDnsBackend
+
+import dns.exception
+import dns.resolver
+import io
+
+from nose.tools import assert_raises
+
+ZONE = """
+$ORIGIN radiodns.org.
+$TTL 3600
+@                   SOA    ns1 hostmaster 1 3600 600 604800 300
+@                   NS     ns1
+ns1                 A      192.0.2.1
+0.c221.ce15.ce1.dab CNAME  rdns.example.com.
+_radiovis._tcp.rdns SRV    0 100 61613 vis.radiodns.org.
+"""
+
+def create_backend(**kwargs):
+    return ZoneFileDnsBackend([io.StringIO(ZONE)], **kwargs)
+
+def test_ZoneFileDnsBackend_cname():
+    backend = create_backend()
+    answer = backend.query('0.c221.ce15.ce1.dab.radiodns.org', 'CNAME')
+
+    assert answer.rrset.ttl == 3600
+    assert str(answer[0].target) == 'rdns.example.com.'
+
+def test_ZoneFileDnsBackend_srv():
+    backend = create_backend()
+    answer = backend.query('_radiovis._tcp.rdns.radiodns.org', 'SRV')
+
+    assert len(answer) == 1
+    assert answer[0].port == 61613
+    assert str(answer[0].target) == 'vis.radiodns.org.'
+
+def test_ZoneFileDnsBackend_nxdomain():
+    backend = create_backend()
+
+    assert_raises(dns.resolver.NXDOMAIN, backend.query, '0.c222.ce15.ce1.dab.radiodns.org', 'CNAME')
+
+def test_ZoneFileDnsBackend_no_answer():
+    backend = create_backend()
+
+    assert_raises(dns.resolver.NoAnswer, backend.query, '0.c221.ce15.ce1.dab.radiodns.org', 'SRV')
+
+    # Names with no records, but with records below them, exist.
+    assert_raises(dns.resolver.NoAnswer, backend.query, 'rdns.radiodns.org', 'SRV')
+
+def test_ZoneFileDnsBackend_failure():
+    backend = create_backend(failure_rate = 1.0)
+
+    assert_raises(dns.exception.Timeout, backend.query, '0.c221.ce15.ce1.dab.radiodns.org', 'CNAME')
@@ -0,0 +1,124 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for DnsCache class.
+"""
+
+from lib.dns_resolver import DnsCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_DnsCache():
+    cache = DnsCache(max_size = 10)
+    cache.put(('example.com', 'CNAME'), 'example.org', 300)
+
+    assert cache.get(('example.com', 'CNAME')) == 'example.org'
+    assert cache.get(('example.net', 'CNAME')) is None
+    assert cache.get_hits() == 1
+    assert cache.get_misses() == 1
+
+def test_DnsCache_expiry():
+    clock = FakeClock()
+    cache = DnsCache(max_size = 10, clock = clock)
+    cache.put(('example.com', 'CNAME'), 'example.org', 300)
+
+    clock.now += 299
+    assert cache.get(('example.com', 'CNAME')) == 'example.org'
+
+    clock.now += 1
+    assert cache.get(('example.com', 'CNAME')) is None
+    assert len(cache) == 0
+
+def test_DnsCache_zero_ttl():
+    cache = DnsCache(max_size = 10)
+    cache.put(('example.com', 'CNAME'), 'example.org', 0)
+
+    assert cache.get(('example.com', 'CNAME')) is None
+
+def test_DnsCache_lru_eviction():
+    cache = DnsCache(max_size = 2)
+    cache.put('a', 1, 300)
+    cache.put('b', 2, 300)
+
+    # Use 'a', so that 'b' becomes the least recently used entry.
+    assert cache.get('a') == 1
+
+    cache.put('c', 3, 300)
+
+    assert len(cache) == 2
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+def test_DnsCache_put_expiring():
+    clock = FakeClock()
+    cache = DnsCache(max_size = 10, clock = clock)
+    cache.put_expiring('a', 1, clock.now + 10)
+    cache.put_expiring('b', 2, clock.now - 10)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+def test_DnsCache_get_entries():
+    clock = FakeClock()
+    cache = DnsCache(max_size = 10, clock = clock)
+    cache.put('a', 1, 10)
+    cache.put('b', 2, 20)
+
+    clock.now += 15
+
+    assert cache.get_entries() == [('b', 2, clock.now + 5)]
+
+def test_DnsCache_get_expiring():
+    clock = FakeClock()
+    cache = DnsCache(max_size = 10, clock = clock)
+    cache.put('popular', 1, 100)
+    cache.put('unpopular', 2, 100)
+
+    cache.get('popular')
+    cache.get('popular')
+    cache.get('unpopular')
+
+    assert cache.get_expiring(0.1, 0, 2) == []
+
+    clock.now += 91
+    assert cache.get_expiring(0.1, 0, 2) == ['popular']
+    assert sorted(cache.get_expiring(0.1, 0, 1)) == ['popular', 'unpopular']
+
+def test_DnsCache_get_expiring_min_window():
+    clock = FakeClock()
+    cache = DnsCache(max_size = 10, clock = clock)
+    cache.put('a', 1, 10)
+    cache.get('a')
+
+    clock.now += 5
+    assert cache.get_expiring(0.1, 0, 1) == []
+    assert cache.get_expiring(0.1, 5, 1) == ['a']
+
+def test_DnsCache_refresh_decays_hits():
+    cache = DnsCache(max_size = 10)
+    cache.put('a', 1, 100)
+
+    for i in range(4):
+        cache.get('a')
+
+    cache.put('a', 1, 100)
+    assert cache.get_expiring(1.0, 0, 2) == ['a']
+    assert cache.get_expiring(1.0, 0, 3) == []
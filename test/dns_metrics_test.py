@@ -0,0 +1,79 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for DnsMetrics class.
+"""
+
+from lib.dns_metrics import DnsMetrics, LATENCY_BUCKETS
+
+import json
+import os
+import tempfile
+
+def create_metrics():
+    metrics = DnsMetrics(max_records = 3)
+    metrics.record('a.radiodns.org', 'CNAME', 0.0008, 'NOERROR', 1, False)
+    metrics.record('b.radiodns.org', 'CNAME', 0.2, 'NXDOMAIN', 0, False)
+    metrics.record('a.radiodns.org', 'CNAME', 0.00001, 'NOERROR', 1, True)
+    metrics.record('_radiovis._tcp.example.com', 'SRV', 10.0, 'LifetimeTimeout', 0, False)
+    return metrics
+
+def test_DnsMetrics_stats():
+    metrics = create_metrics()
+    stats = metrics.get_stats('CNAME')
+
+    assert stats.queries == 3
+    assert stats.cache_hits == 1
+    assert stats.outcomes['NOERROR'] == 2
+    assert stats.outcomes['NXDOMAIN'] == 1
+    assert abs(stats.get_mean_duration() - 0.1004) < 1e-9
+    assert stats.max_duration == 0.2
+
+    # Cache hits are not included in the histogram.
+    assert sum(stats.histogram) == 2
+    assert stats.histogram[0] == 1
+    assert stats.histogram[LATENCY_BUCKETS.index(0.25)] == 1
+
+    srv_stats = metrics.get_stats('SRV')
+    assert srv_stats.histogram[-1] == 1
+
+    assert metrics.get_stats('A') is None
+
+def test_DnsMetrics_records():
+    metrics = create_metrics()
+    records = metrics.get_records()
+
+    assert len(records) == 3
+    assert records[0].qname == 'b.radiodns.org'
+    assert records[1].cache_hit
+    assert records[2].outcome == 'LifetimeTimeout'
+
+def test_DnsMetrics_summary():
+    lines = create_metrics().get_summary()
+
+    assert len(lines) == 2
+    assert lines[0].startswith("CNAME: 3 queries, 1 from cache")
+    assert lines[1].startswith("SRV: 1 queries, 0 from cache")
+
+def test_DnsMetrics_save():
+    with tempfile.TemporaryDirectory() as dirname:
+        filename = os.path.join(dirname, "dns_metrics.json")
+        create_metrics().save(filename)
+
+        with open(filename) as f:
+            data = json.load(f)
+
+    assert data["stats"]["CNAME"]["queries"] == 3
+    assert len(data["queries"]) == 3
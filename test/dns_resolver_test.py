@@ -0,0 +1,286 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for DnsResolver class.
+"""
+
+from lib.dns_backend import DnsBackend, ZoneFileDnsBackend
+from lib.dns_resolver import DnsPrefetcher, DnsResolver, ServiceRecord, order_services
+
+import io
+import os
+import random
+import socket
+import tempfile
+import time
+
+ZONE = """
+$ORIGIN radiodns.org.
+$TTL 3600
+@                   SOA    ns1 hostmaster 1 3600 600 604800 300
+@                   NS     ns1
+ns1                 A      192.0.2.1
+0.c221.ce15.ce1.dab CNAME  rdns.radiodns.org.
+_radiovis._tcp.rdns SRV    0 100 61613 vis.radiodns.org.
+"""
+
+# The SOA record's TTL is lower than its MINIMUM field.
+SHORT_SOA_TTL_ZONE = """
+$ORIGIN radiodns.org.
+$TTL 3600
+@                   60 SOA ns1 hostmaster 1 3600 600 604800 300
+@                   NS     ns1
+ns1                 A      192.0.2.1
+"""
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class CountingDnsBackend(DnsBackend):
+    """
+    Answers queries from a zone file, and counts the queries made.
+    """
+    def __init__(self, zone = ZONE):
+        self._backend = ZoneFileDnsBackend([io.StringIO(zone)])
+        self.count = 0
+
+    def query(self, qname, rdtype, lifetime = None):
+        self.count += 1
+        return self._backend.query(qname, rdtype, lifetime)
+
+def test_DnsResolver_get_cname():
+    backend = CountingDnsBackend()
+    resolver = DnsResolver(backend = backend)
+
+    assert resolver.get_cname('0.c221.ce15.ce1.dab.radiodns.org') == 'rdns.radiodns.org'
+    assert resolver.get_cname('0.c221.ce15.ce1.dab.radiodns.org') == 'rdns.radiodns.org'
+    assert backend.count == 1
+    assert resolver.get_cache().get_hits() == 1
+
+def test_DnsResolver_get_cname_negative():
+    backend = CountingDnsBackend()
+    resolver = DnsResolver(backend = backend)
+
+    assert resolver.get_cname('0.c222.ce15.ce1.dab.radiodns.org') is None
+    assert resolver.get_cname('0.c222.ce15.ce1.dab.radiodns.org') is None
+    assert backend.count == 1
+    assert resolver.get_negative_cache().get_hits() == 1
+
+    # The negative cache hit isn't also counted as a miss.
+    assert resolver.get_cache().get_hits() == 0
+    assert resolver.get_cache().get_misses() == 1
+
+def test_DnsResolver_negative_nxdomain():
+    clock = FakeClock()
+    backend = CountingDnsBackend()
+    resolver = DnsResolver(backend = backend, clock = clock)
+
+    host = '0.c222.ce15.ce1.dab.radiodns.org'
+    assert resolver.get_cname(host) is None
+
+    # Cached for the SOA MINIMUM field, which is lower than the SOA's TTL.
+    assert resolver.get_negative_cache().get_entries() == [
+        ((host, 'CNAME'), 'NXDOMAIN', clock.now + 300)]
+
+    clock.now += 299
+    assert resolver.get_cname(host) is None
+    assert backend.count == 1
+
+    # Queried again once the negative answer has expired.
+    clock.now += 1
+    assert resolver.get_cname(host) is None
+    assert backend.count == 2
+
+def test_DnsResolver_negative_no_answer():
+    clock = FakeClock()
+    backend = CountingDnsBackend()
+    resolver = DnsResolver(backend = backend, clock = clock)
+
+    # The name exists, but has no CNAME record.
+    assert resolver.get_cname('ns1.radiodns.org') is None
+    assert resolver.get_cname('ns1.radiodns.org') is None
+    assert backend.count == 1
+
+    assert resolver.get_negative_cache().get_entries() == [
+        (('ns1.radiodns.org', 'CNAME'), 'NoAnswer', clock.now + 300)]
+
+def test_DnsResolver_negative_soa_ttl():
+    clock = FakeClock()
+    backend = CountingDnsBackend(SHORT_SOA_TTL_ZONE)
+    resolver = DnsResolver(backend = backend, clock = clock)
+
+    assert resolver.get_services('_radiovis._tcp', 'rdns.radiodns.org', 'RadioVIS') == []
+
+    # Cached for the SOA's TTL, which is lower than its MINIMUM field.
+    assert resolver.get_negative_cache().get_entries() == [
+        (('_radiovis._tcp.rdns.radiodns.org', 'SRV'), 'NXDOMAIN', clock.now + 60)]
+
+    clock.now += 60
+    assert resolver.get_services('_radiovis._tcp', 'rdns.radiodns.org', 'RadioVIS') == []
+    assert backend.count == 2
+
+def test_DnsResolver_get_services():
+    backend = CountingDnsBackend()
+    resolver = DnsResolver(backend = backend)
+
+    for i in range(2):
+        services = resolver.get_services('_radiovis._tcp', 'rdns.radiodns.org', 'RadioVIS')
+
+        assert len(services) == 1
+        assert services[0].name == 'RadioVIS'
+        assert services[0].query == '_radiovis._tcp.rdns.radiodns.org'
+        assert services[0].target == 'vis.radiodns.org'
+        assert services[0].port == 61613
+
+    assert resolver.get_services('_radioepg._tcp', 'rdns.radiodns.org', 'RadioEPG') == []
+    assert resolver.get_services('_radioepg._tcp', 'rdns.radiodns.org', 'RadioEPG') == []
+    assert backend.count == 2
+
+def test_DnsResolver_prefetch():
+    clock = FakeClock()
+    backend = CountingDnsBackend()
+    resolver = DnsResolver(backend = backend, clock = clock)
+
+    host = '0.c221.ce15.ce1.dab.radiodns.org'
+    query = '_radiovis._tcp.rdns.radiodns.org'
+
+    # Use the CNAME answer often enough to be refreshed, but the SRV answer
+    # only once.
+    for i in range(3):
+        assert resolver.get_cname(host) == 'rdns.radiodns.org'
+
+    assert len(resolver.get_services('_radiovis._tcp', 'rdns.radiodns.org', 'RadioVIS')) == 1
+    assert backend.count == 2
+
+    # Not refreshed while most of the TTL remains.
+    resolver.prefetch(0.1, 10.0, 2)
+    assert backend.count == 2
+
+    # 300 seconds of the 3600 second TTL remain.
+    clock.now += 3300
+    resolver.prefetch(0.1, 10.0, 2)
+    assert backend.count == 3
+
+    # The original answer would have expired by now, but the refreshed one
+    # is still cached.
+    clock.now += 600
+    assert resolver.get_cname(host) == 'rdns.radiodns.org'
+    assert backend.count == 3
+
+    assert resolver.get_cache().get_entries() == [
+        ((host, 'CNAME'), 'rdns.radiodns.org', 1000.0 + 3300 + 3600)]
+
+def test_DnsPrefetcher():
+    clock = FakeClock()
+    backend = CountingDnsBackend()
+    resolver = DnsResolver(backend = backend, clock = clock)
+
+    host = '0.c221.ce15.ce1.dab.radiodns.org'
+
+    for i in range(3):
+        assert resolver.get_cname(host) == 'rdns.radiodns.org'
+
+    clock.now += 3500
+
+    prefetcher = DnsPrefetcher(resolver, interval = 0.01)
+    prefetcher.start()
+
+    try:
+        deadline = time.monotonic() + 5.0
+
+        while backend.count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        prefetcher.stop()
+
+    assert backend.count >= 2
+
+    # Served from the refreshed answer after the original TTL.
+    clock.now += 200
+    count = backend.count
+    assert resolver.get_cname(host) == 'rdns.radiodns.org'
+    assert backend.count == count
+
+def test_DnsResolver_save_and_load_cache():
+    resolver = DnsResolver()
+    resolver.get_cache().put(('0.c221.ce15.ce1.dab.radiodns.org', 'CNAME'), 'rdns.example.com', 300)
+    resolver.get_cache().put(('_radiovis._tcp.rdns.example.com', 'SRV'), [(61613, 0, 'vis.example.com', 100)], 300)
+    resolver.get_negative_cache().put(('0.c222.ce15.ce1.dab.radiodns.org', 'CNAME'), 'NXDOMAIN', 300)
+
+    with tempfile.TemporaryDirectory() as dirname:
+        filename = os.path.join(dirname, "dns_cache.json")
+        resolver.save_cache(filename)
+
+        resolver = DnsResolver()
+        resolver.load_cache(filename)
+
+    assert resolver.get_cname('0.c221.ce15.ce1.dab.radiodns.org') == 'rdns.example.com'
+    assert resolver.get_cname('0.c222.ce15.ce1.dab.radiodns.org') is None
+    assert resolver.get_negative_cache().get_hits() == 1
+
+    services = resolver.get_services('_radiovis._tcp', 'rdns.example.com', 'RadioVIS')
+
+    assert len(services) == 1
+    assert services[0].name == 'RadioVIS'
+    assert services[0].target == 'vis.example.com'
+    assert services[0].port == 61613
+    assert services[0].priority == 0
+    assert services[0].weight == 100
+
+def test_DnsResolver_load_missing_cache():
+    resolver = DnsResolver()
+    resolver.load_cache(os.path.join(tempfile.gettempdir(), "no-such-dns-cache.json"))
+
+    assert len(resolver.get_cache()) == 0
+
+def test_order_services_priority():
+    services = [ServiceRecord(target = 'c', port = 61613, priority = 20, weight = 0),
+                ServiceRecord(target = 'a', port = 61613, priority = 0, weight = 10),
+                ServiceRecord(target = 'b', port = 61613, priority = 10, weight = 10)]
+
+    ordered = order_services(services, random.Random(1))
+
+    assert [service.target for service in ordered] == ['a', 'b', 'c']
+
+def test_order_services_weight():
+    services = [ServiceRecord(target = 'a', port = 61613, priority = 0, weight = 90),
+                ServiceRecord(target = 'b', port = 61613, priority = 0, weight = 10)]
+
+    rng = random.Random(1)
+    first = [order_services(services, rng)[0].target for i in range(1000)]
+
+    assert 850 < first.count('a') < 950
+
+def test_order_services_no_weight():
+    services = [ServiceRecord(target = 'a', port = 61613),
+                ServiceRecord(target = 'b', port = 61613)]
+
+    ordered = order_services(services, random.Random(1))
+
+    assert sorted(service.target for service in ordered) == ['a', 'b']
+
+def test_DnsResolver_is_local():
+    resolver = DnsResolver(backend = CountingDnsBackend())
+
+    assert resolver.is_local('localhost')
+    assert resolver.is_local('127.0.0.1')
+    assert resolver.is_local(socket.gethostname())
+    assert not resolver.is_local('0.c221.ce15.ce1.dab.radiodns.org')
+
+    assert resolver.get_cname('localhost') == 'localhost'
@@ -0,0 +1,88 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for FleetResolver class.
+"""
+
+from lib.dns_resolver import ServiceRecord
+from lib.fleet_resolver import FleetResolver
+from lib.fm_radio_station import FmRadioStation
+from lib.radiodns_service import RadioDnsService
+
+import threading
+import time
+
+class DummyDnsResolver:
+    """
+    Stands in for DnsResolver, and records the maximum number of
+    concurrent queries.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self.max_active = 0
+
+    def get_cname(self, host):
+        with self._lock:
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+
+        time.sleep(0.01)
+
+        with self._lock:
+            self._active -= 1
+
+        if host.endswith(".radiodns.org"):
+            return "rdns.example.com"
+        else:
+            return None
+
+    def get_services(self, srv_record, host_name, service_name):
+        return [ServiceRecord(name = service_name,
+                              query = srv_record + "." + host_name,
+                              port = 61613,
+                              priority = 0,
+                              target = "vis.example.com",
+                              weight = 100)]
+
+def test_FleetResolver():
+    stations = [FmRadioStation('Station %d' % i, ecc = 'e1', pi = 'c%03d' % i, freq = 9580)
+                for i in range(20)]
+
+    services = [RadioDnsService("RadioVIS", "_radiovis._tcp"),
+                RadioDnsService("RadioEPG", "_radioepg._tcp")]
+
+    dns_resolver = DummyDnsResolver()
+    fleet_resolver = FleetResolver(dns_resolver, services, concurrency = 4)
+
+    results = list(fleet_resolver.resolve(stations, ["radiodns.org", "example.com"]))
+
+    assert len(results) == 40
+    assert dns_resolver.max_active <= 4
+
+    hostnames = set(result.hostname for result in results)
+    assert "09580.c000.ce1.fm.radiodns.org" in hostnames
+    assert "09580.c019.ce1.fm.example.com" in hostnames
+
+    for result in results:
+        if result.domain == "radiodns.org":
+            assert result.cname == "rdns.example.com"
+            assert [s.name for s in result.services] == ["RadioVIS", "RadioEPG"]
+        else:
+            assert result.cname is None
+            assert result.services == []
+
+    # Resolving against other domains must not change the station's domain.
+    assert stations[0].get_hostname() == "09580.c000.ce1.fm.radiodns.org"
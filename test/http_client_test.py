@@ -0,0 +1,698 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for HttpClient and HttpClientThread classes.
+"""
+
+from lib.http_client import HttpCancelled, HttpClient, HttpClientThread, HttpError
+from lib.http_client import HttpRequestContext, HttpTimeout
+from lib.image_cache import ImageCache
+
+import gzip
+import http.server
+import os
+import ssl
+import threading
+import time
+
+from nose.tools import assert_raises
+
+IMAGE_DATA = bytes(range(256)) * 100
+
+
+class ImageRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address, dict(self.headers)))
+
+        if self.path.startswith("/slow/"):
+            # Wait until the test allows the response to be sent.
+            self.server.release.wait(5.0)
+            self.send_body(self.path.encode("utf-8"))
+        elif self.path == "/drip":
+            # Send the body a byte at a time.
+            self.send_response(200)
+            self.send_header("Content-Length", "100")
+            self.end_headers()
+
+            for i in range(100):
+                self.wfile.write(b"x")
+                self.wfile.flush()
+                time.sleep(0.05)
+        elif self.path.startswith("/name/"):
+            self.send_body(self.path.encode("utf-8"))
+        elif self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            for i in range(0, len(IMAGE_DATA), 1000):
+                chunk = IMAGE_DATA[i:i + 1000]
+                self.wfile.write(b"%x;ext=1\r\n%s\r\n" % (len(chunk), chunk))
+
+            self.wfile.write(b"0\r\nTrailer: value\r\n\r\n")
+        elif self.path == "/gzip":
+            body = gzip.compress(IMAGE_DATA)
+
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.startswith("/redirect/"):
+            if self.path == "/redirect/permanent":
+                self.send_response(301)
+                self.send_header("Location", "/name/permanent")
+            elif self.path == "/redirect/temporary":
+                self.send_response(302)
+                self.send_header("Location", "/name/temporary")
+            else:
+                self.send_response(302)
+                self.send_header("Location", self.path)
+
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path == "/etag.png":
+            if self.headers.get("If-None-Match") == '"1"':
+                self.send_response(304)
+                self.send_header("ETag", '"1"')
+                self.end_headers()
+            else:
+                self.send_response(200)
+                self.send_header("ETag", '"1"')
+                self.send_header("Content-Length", str(len(IMAGE_DATA)))
+                self.end_headers()
+                self.wfile.write(IMAGE_DATA)
+        elif self.path == "/max-age.png":
+            self.send_response(200)
+            self.send_header("Cache-Control", "max-age=60")
+            self.send_header("Content-Length", str(len(IMAGE_DATA)))
+            self.end_headers()
+            self.wfile.write(IMAGE_DATA)
+        elif self.path.startswith("/image"):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(IMAGE_DATA)))
+            self.end_headers()
+            self.wfile.write(IMAGE_DATA)
+        elif self.path == "/close":
+            # No Content-Length: the body ends when the connection closes.
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(IMAGE_DATA)
+            self.close_connection = True
+        elif self.path.startswith("/idle-close/"):
+            # Keep-alive response, but close the connection afterwards, as a
+            # server does when an idle connection times out.
+            self.send_body(self.path.encode("utf-8"))
+            self.close_connection = True
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def send_body(self, body):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+CERT_FILENAME = os.path.join(os.path.dirname(__file__), "localhost.pem")
+
+def start_server(use_tls = False):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ImageRequestHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.release = threading.Event()
+    server.scheme = "http"
+
+    # Don't report connections closed by the client part way through a
+    # response.
+    server.handle_error = lambda request, client_address: None
+
+    if use_tls:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(CERT_FILENAME)
+        server.socket = context.wrap_socket(server.socket, server_side = True)
+        server.scheme = "https"
+
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+
+    return server
+
+def get_url(server, path):
+    return "%s://localhost:%d%s" % (server.scheme, server.server_address[1], path)
+
+def test_HttpClient_get():
+    server = start_server()
+    client = HttpClient()
+
+    try:
+        response = client.get(get_url(server, "/image.png?id=1"))
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert response.status == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.body == IMAGE_DATA
+    assert server.requests[0][0] == "/image.png?id=1"
+
+def test_HttpClient_keep_alive():
+    server = start_server()
+    client = HttpClient()
+
+    try:
+        for i in range(3):
+            response = client.get(get_url(server, "/image.png"))
+            assert response.body == IMAGE_DATA
+    finally:
+        client.close()
+        server.shutdown()
+
+    # All requests should have been made on the same connection.
+    client_addresses = set(request[1] for request in server.requests)
+    assert len(server.requests) == 3
+    assert len(client_addresses) == 1
+
+def test_HttpClient_read_until_close():
+    server = start_server()
+    client = HttpClient()
+
+    try:
+        response = client.get(get_url(server, "/close"))
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert response.status == 200
+    assert response.body == IMAGE_DATA
+
+def test_HttpClient_not_found():
+    server = start_server()
+    client = HttpClient()
+
+    try:
+        response = client.get(get_url(server, "/missing.png"))
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert response.status == 404
+    assert response.body == b""
+
+def test_HttpClient_max_body_size():
+    server = start_server()
+    client = HttpClient(max_body_size = len(IMAGE_DATA))
+
+    try:
+        assert client.get(get_url(server, "/image.png")).body == IMAGE_DATA
+        assert client.get(get_url(server, "/close")).body == IMAGE_DATA
+
+        client = HttpClient(max_body_size = len(IMAGE_DATA) - 1)
+
+        # Too large, from the Content-Length header.
+        assert_raises(HttpError, client.get, get_url(server, "/image.png"))
+
+        # Too large, with no Content-Length header.
+        assert_raises(HttpError, client.get, get_url(server, "/close"))
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_HttpClient_chunked():
+    server = start_server()
+    client = HttpClient()
+
+    try:
+        response = client.get(get_url(server, "/chunked"))
+
+        # The connection should be reused after a chunked response.
+        client.get(get_url(server, "/chunked"))
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert response.body == IMAGE_DATA
+    assert len(set(request[1] for request in server.requests)) == 1
+
+def test_HttpClient_gzip():
+    server = start_server()
+    client = HttpClient()
+
+    try:
+        response = client.get(get_url(server, "/gzip"))
+
+        client = HttpClient(max_body_size = len(IMAGE_DATA) - 1)
+        assert_raises(HttpError, client.get, get_url(server, "/gzip"))
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert response.body == IMAGE_DATA
+
+def test_HttpClient_redirect():
+    server = start_server()
+    client = HttpClient()
+
+    try:
+        for i in range(2):
+            response = client.get(get_url(server, "/redirect/permanent"))
+            assert response.body == b"/name/permanent"
+            assert response.url == get_url(server, "/name/permanent")
+
+        for i in range(2):
+            response = client.get(get_url(server, "/redirect/temporary"))
+            assert response.body == b"/name/temporary"
+    finally:
+        client.close()
+        server.shutdown()
+
+    # The permanent redirect should be remembered, and the temporary one
+    # followed each time.
+    assert [request[0] for request in server.requests] == [
+        "/redirect/permanent",
+        "/name/permanent",
+        "/name/permanent",
+        "/redirect/temporary",
+        "/name/temporary",
+        "/redirect/temporary",
+        "/name/temporary"
+    ]
+
+def test_HttpClient_redirect_loop():
+    server = start_server()
+    client = HttpClient(max_redirects = 3)
+
+    try:
+        assert_raises(HttpError, client.get, get_url(server, "/redirect/loop"))
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert len(server.requests) == 4
+
+def test_HttpClient_https():
+    server = start_server(use_tls = True)
+
+    ssl_context = ssl.create_default_context(cafile = CERT_FILENAME)
+    client = HttpClient(ssl_context = ssl_context)
+
+    messages = []
+    client.log = messages.append
+
+    try:
+        response = client.get(get_url(server, "/image.png"))
+        assert response.body == IMAGE_DATA
+
+        # The server closes the connection after this response, so the next
+        # request needs a new connection, which should resume the session.
+        response = client.get(get_url(server, "/close"))
+        assert response.body == IMAGE_DATA
+
+        response = client.get(get_url(server, "/image.png"))
+        assert response.body == IMAGE_DATA
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert len(set(request[1] for request in server.requests)) == 2
+    assert "Resumed TLS session with localhost port %d" % server.server_address[1] in messages
+
+def test_HttpClient_first_byte_timeout():
+    server = start_server()
+    client = HttpClient()
+
+    context = HttpRequestContext(first_byte_timeout = 0.2)
+    start_time = time.monotonic()
+
+    try:
+        assert_raises(HttpTimeout, client.get, get_url(server, "/slow/1"), context = context)
+    finally:
+        server.release.set()
+        client.close()
+        server.shutdown()
+
+    assert time.monotonic() - start_time < 2.0
+
+def test_HttpClient_retry_closed_connection():
+    server = start_server()
+    client = HttpClient()
+
+    try:
+        assert client.get(get_url(server, "/idle-close/1")).body == b"/idle-close/1"
+        time.sleep(0.1)
+
+        # The reused connection was closed by the server, so the request is
+        # retried on a new connection.
+        assert client.get(get_url(server, "/name/2")).body == b"/name/2"
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert [request[0] for request in server.requests] == ["/idle-close/1", "/name/2"]
+
+def test_HttpClient_no_retry_after_timeout():
+    server = start_server()
+    client = HttpClient()
+
+    context = HttpRequestContext(first_byte_timeout = 0.5)
+
+    try:
+        assert client.get(get_url(server, "/name/1")).body == b"/name/1"
+
+        # The server may have received the request, so a timeout on a reused
+        # connection isn't retried.
+        start_time = time.monotonic()
+        assert_raises(HttpTimeout, client.get, get_url(server, "/slow/2"), context = context)
+        elapsed = time.monotonic() - start_time
+    finally:
+        server.release.set()
+        client.close()
+        server.shutdown()
+
+    assert elapsed < 0.9
+    assert [request[0] for request in server.requests] == ["/name/1", "/slow/2"]
+
+def test_HttpClient_total_timeout():
+    server = start_server()
+    client = HttpClient()
+
+    context = HttpRequestContext(total_timeout = 0.5)
+    start_time = time.monotonic()
+
+    try:
+        assert_raises(HttpTimeout, client.get, get_url(server, "/drip"), context = context)
+    finally:
+        client.close()
+        server.shutdown()
+
+    # The server keeps sending data, but the request should stop at the
+    # time limit.
+    assert time.monotonic() - start_time < 2.0
+
+def test_HttpClient_cancel():
+    server = start_server()
+    client = HttpClient()
+
+    context = HttpRequestContext()
+    timer = threading.Timer(0.2, context.cancel)
+    timer.start()
+
+    start_time = time.monotonic()
+
+    try:
+        assert_raises(HttpCancelled, client.get, get_url(server, "/slow/1"), context = context)
+    finally:
+        server.release.set()
+        client.close()
+        server.shutdown()
+
+    assert time.monotonic() - start_time < 2.0
+
+def test_HttpClient_unsupported_scheme():
+    client = HttpClient()
+
+    assert_raises(HttpError, client.get, "ftp://example.com/image.png")
+
+
+class DummyClient:
+    def __init__(self):
+        self.received = []
+        self.event = threading.Event()
+
+    def http_received_data(self, data):
+        self.received.append(data)
+        self.event.set()
+
+
+def test_HttpClientThread():
+    server = start_server()
+    client = DummyClient()
+
+    http_client_thread = HttpClientThread(client)
+    http_client_thread.start()
+
+    try:
+        http_client_thread.request(get_url(server, "/image.png"))
+        assert client.event.wait(5.0)
+    finally:
+        http_client_thread.stop()
+        server.shutdown()
+
+    assert client.received == [IMAGE_DATA]
+
+def request_images(server, image_cache, paths):
+    client = DummyClient()
+
+    http_client_thread = HttpClientThread(client, max_downloads = 1, image_cache = image_cache)
+    http_client_thread.start()
+
+    try:
+        for path in paths:
+            client.event.clear()
+            http_client_thread.request(get_url(server, path))
+            assert client.event.wait(5.0)
+    finally:
+        http_client_thread.stop()
+
+    return client.received
+
+def test_HttpClientThread_cache_fresh():
+    server = start_server()
+    image_cache = ImageCache()
+
+    try:
+        received = request_images(server, image_cache, ["/max-age.png", "/max-age.png"])
+    finally:
+        server.shutdown()
+
+    # The second image should be served from the cache.
+    assert received == [IMAGE_DATA, IMAGE_DATA]
+    assert len(server.requests) == 1
+
+def test_HttpClientThread_cache_revalidate():
+    server = start_server()
+    image_cache = ImageCache()
+
+    try:
+        received = request_images(server, image_cache, ["/etag.png", "/etag.png"])
+    finally:
+        server.shutdown()
+
+    # The second image should be revalidated, and not downloaded again.
+    assert received == [IMAGE_DATA, IMAGE_DATA]
+    assert len(server.requests) == 2
+    assert server.requests[1][2].get("If-None-Match") == '"1"'
+
+def test_HttpClientThread_cache_stale_if_error():
+    server = start_server()
+    image_cache = ImageCache()
+    url = get_url(server, "/etag.png")
+
+    try:
+        request_images(server, image_cache, ["/etag.png"])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # The server has gone, so the cached image should be shown.
+    client = DummyClient()
+    http_client_thread = HttpClientThread(client, image_cache = image_cache)
+    http_client_thread.start()
+
+    try:
+        http_client_thread.request(url)
+        assert client.event.wait(5.0)
+    finally:
+        http_client_thread.stop()
+
+    assert client.received == [IMAGE_DATA]
+
+def wait_for_request(server, path):
+    for i in range(100):
+        if path in [request[0] for request in server.requests]:
+            return True
+
+        time.sleep(0.05)
+
+    return False
+
+def test_HttpClientThread_latest_wins():
+    server = start_server()
+    client = DummyClient()
+
+    http_client_thread = HttpClientThread(client, max_downloads = 1)
+    http_client_thread.start()
+
+    try:
+        http_client_thread.request(get_url(server, "/slow/1"), key = "station")
+        assert wait_for_request(server, "/slow/1")
+
+        # These are queued behind the slow download. The first is superseded
+        # by the second before it starts, so should never be requested.
+        http_client_thread.request(get_url(server, "/name/2"), key = "station")
+        http_client_thread.request(get_url(server, "/name/3"), key = "station")
+        time.sleep(0.2)
+
+        server.release.set()
+        assert client.event.wait(5.0)
+    finally:
+        http_client_thread.stop()
+        server.shutdown()
+
+    assert client.received == [b"/name/3"]
+    assert [request[0] for request in server.requests] == ["/slow/1", "/name/3"]
+
+def test_HttpClientThread_coalesce():
+    server = start_server()
+    client = DummyClient()
+
+    http_client_thread = HttpClientThread(client)
+    http_client_thread.start()
+
+    try:
+        http_client_thread.request(get_url(server, "/slow/1"), key = "station")
+        assert wait_for_request(server, "/slow/1")
+
+        http_client_thread.request(get_url(server, "/slow/1"), key = "station")
+        time.sleep(0.2)
+
+        server.release.set()
+        assert client.event.wait(5.0)
+    finally:
+        http_client_thread.stop()
+        server.shutdown()
+
+    # Both requests should have been served by one download.
+    assert client.received == [b"/slow/1"]
+    assert len(server.requests) == 1
+
+def test_HttpClientThread_cancel():
+    server = start_server()
+    client = DummyClient()
+
+    http_client_thread = HttpClientThread(client)
+    http_client_thread.start()
+
+    try:
+        http_client_thread.request(get_url(server, "/slow/1"), key = "station")
+        assert wait_for_request(server, "/slow/1")
+
+        http_client_thread.cancel("station")
+        server.release.set()
+    finally:
+        http_client_thread.stop()
+        server.shutdown()
+
+    assert client.received == []
+
+def test_HttpClientThread_cancel_in_flight():
+    server = start_server()
+    client = DummyClient()
+
+    http_client_thread = HttpClientThread(client, max_downloads = 1)
+    http_client_thread.start()
+
+    try:
+        http_client_thread.request(get_url(server, "/slow/1"), key = "station")
+        assert wait_for_request(server, "/slow/1")
+
+        # The stalled download should be cancelled, freeing its worker
+        # thread for the newer image.
+        http_client_thread.request(get_url(server, "/name/2"), key = "station")
+        assert client.event.wait(5.0)
+    finally:
+        server.release.set()
+        http_client_thread.stop()
+        server.shutdown()
+
+    assert client.received == [b"/name/2"]
+
+def test_HttpClientThread_callback():
+    server = start_server()
+    client = DummyClient()
+    received = []
+    done = threading.Event()
+
+    def callback(data):
+        received.append(data)
+        done.set()
+
+    http_client_thread = HttpClientThread(client)
+    http_client_thread.start()
+
+    try:
+        http_client_thread.request(get_url(server, "/name/1"), key = "prefetch", callback = callback)
+        assert done.wait(5.0)
+    finally:
+        http_client_thread.stop()
+        server.shutdown()
+
+    assert received == [b"/name/1"]
+    assert client.received == []
+
+def test_HttpClientThread_forget_failed():
+    server = start_server()
+    client = DummyClient()
+
+    http_client_thread = HttpClientThread(client)
+    http_client_thread.start()
+
+    try:
+        http_client_thread.request(get_url(server, "/missing"), key = "prefetch")
+        assert wait_for_request(server, "/missing")
+
+        deadline = time.monotonic() + 5.0
+
+        while len(http_client_thread._jobs) > 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Nothing is left behind for the failed request's key.
+        assert http_client_thread._latest_requests == {}
+    finally:
+        http_client_thread.stop()
+        server.shutdown()
+
+    assert client.received == []
+
+def test_HttpClientThread_cancel_queued():
+    server = start_server()
+    client = DummyClient()
+
+    http_client_thread = HttpClientThread(client)
+
+    try:
+        # The request is still queued when it is cancelled, as the worker
+        # thread hasn't started.
+        http_client_thread.request(get_url(server, "/name/1"), key = "station")
+        http_client_thread.cancel("station")
+
+        http_client_thread.start()
+        http_client_thread.request(get_url(server, "/name/2"), key = "other")
+        assert client.event.wait(5.0)
+    finally:
+        http_client_thread.stop()
+        server.shutdown()
+
+    assert client.received == [b"/name/2"]
+    assert [request[0] for request in server.requests] == ["/name/2"]
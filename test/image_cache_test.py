@@ -0,0 +1,127 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for ImageCache class.
+"""
+
+from lib.image_cache import ImageCache, get_freshness_lifetime
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_get_freshness_lifetime_max_age():
+    assert get_freshness_lifetime({"cache-control": "public, max-age=60"}) == 60
+    assert get_freshness_lifetime({"cache-control": "max-age=60", "age": "20"}) == 40
+
+def test_get_freshness_lifetime_no_store():
+    assert get_freshness_lifetime({"cache-control": "no-store"}) is None
+    assert get_freshness_lifetime({"cache-control": "no-cache, max-age=60"}) == 0
+
+def test_get_freshness_lifetime_expires():
+    headers = {
+        "date": "Mon, 05 Oct 2026 10:00:00 GMT",
+        "expires": "Mon, 05 Oct 2026 10:05:00 GMT"
+    }
+
+    assert get_freshness_lifetime(headers) == 300
+
+    headers["expires"] = "0"
+    assert get_freshness_lifetime(headers) == 0
+
+def test_get_freshness_lifetime_heuristic():
+    headers = {
+        "date": "Mon, 05 Oct 2026 10:00:00 GMT",
+        "last-modified": "Mon, 05 Oct 2026 09:00:00 GMT"
+    }
+
+    assert get_freshness_lifetime(headers) == 360
+    assert get_freshness_lifetime({}) == 0
+
+def test_ImageCache():
+    clock = FakeClock()
+    cache = ImageCache(clock = clock)
+    cache.put("http://example.com/1.png", b"image", {"cache-control": "max-age=60"})
+
+    entry = cache.get("http://example.com/1.png")
+    assert entry.body == b"image"
+    assert cache.is_fresh(entry)
+
+    clock.now += 60
+    assert not cache.is_fresh(entry)
+
+    assert cache.get("http://example.com/2.png") is None
+    assert cache.get_hits() == 1
+    assert cache.get_misses() == 1
+
+def test_ImageCache_not_stored():
+    cache = ImageCache()
+
+    # Not allowed to be stored.
+    cache.put("http://example.com/1.png", b"image", {"cache-control": "no-store"})
+
+    # Can't be used without revalidation, but has no validator.
+    cache.put("http://example.com/2.png", b"image", {})
+
+    assert len(cache) == 0
+
+def test_ImageCache_conditional_headers():
+    cache = ImageCache()
+    entry = cache.put("http://example.com/1.png",
+                      b"image",
+                      {"etag": '"abc"', "last-modified": "Mon, 05 Oct 2026 09:00:00 GMT"})
+
+    assert not cache.is_fresh(entry)
+    assert entry.get_conditional_headers() == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 05 Oct 2026 09:00:00 GMT"
+    }
+
+def test_ImageCache_update():
+    clock = FakeClock()
+    cache = ImageCache(clock = clock)
+    cache.put("http://example.com/1.png", b"image", {"etag": '"abc"', "cache-control": "no-cache"})
+
+    entry = cache.update("http://example.com/1.png", {"cache-control": "max-age=60"})
+
+    assert entry.body == b"image"
+    assert entry.etag == '"abc"'
+    assert cache.is_fresh(entry)
+    assert cache.update("http://example.com/2.png", {}) is None
+
+def test_ImageCache_lru_eviction():
+    cache = ImageCache(max_size = 10)
+    headers = {"cache-control": "max-age=60"}
+
+    cache.put("a", b"1234", headers)
+    cache.put("b", b"1234", headers)
+
+    # Use 'a', so that 'b' becomes the least recently used entry.
+    cache.get("a")
+
+    cache.put("c", b"1234", headers)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.get_size() == 8
+
+    # Too large to be cached.
+    cache.put("d", b"12345678901", headers)
+    assert cache.get("d") is None
+    assert cache.get_size() == 8
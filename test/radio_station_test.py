@@ -35,3 +35,8 @@ def test_RadioStation_set_domain():
     p.set_domain('example.com')
     assert p.get_hostname() == 'test.example.com'
     assert p.get_name() == 'Test'
+
+def test_RadioStation_get_hostname_domain():
+    p = TestRadioStation()
+    assert p.get_hostname('example.com') == 'test.example.com'
+    assert p.get_hostname() == 'test.radiodns.org'
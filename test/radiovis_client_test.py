@@ -0,0 +1,276 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for RadioVisClient class and trigger-time parsing.
+"""
+
+from lib.radiovis_client import FrameEvent, RadioVisClient, get_reconnect_delay
+from lib.radiovis_parser import format_trigger_time, parse_trigger_time
+
+import datetime
+import random
+import stomp.exception
+import stomp.utils
+import threading
+
+from nose.tools import assert_raises
+
+class DummyConnection:
+    """
+    Stands in for a stomp.Connection, and records the frames sent.
+    """
+    def __init__(self):
+        self.sent = []
+        self.transport = self
+
+    def disconnect(self):
+        self.sent.append(("DISCONNECT",))
+
+    def stop(self):
+        pass
+
+    def subscribe(self, destination, id, ack):
+        self.sent.append(("SUBSCRIBE", destination, id))
+
+    def unsubscribe(self, id):
+        self.sent.append(("UNSUBSCRIBE", id))
+
+class DummyHandler:
+    def __init__(self):
+        self.messages = []
+
+    def radiovis_text(self, text):
+        self.messages.append(("TEXT", text))
+
+    def radiovis_show(self, image_url, link_url, date_time):
+        self.messages.append(("SHOW", image_url, link_url, date_time))
+
+def create_client():
+    client = RadioVisClient()
+    client._connection = DummyConnection()
+    return client
+
+def create_frame(destination, body, headers = None):
+    frame_headers = {"destination": destination}
+
+    if headers is not None:
+        frame_headers.update(headers)
+
+    return stomp.utils.Frame("MESSAGE", frame_headers, body)
+
+def test_parse_trigger_time_now():
+    assert parse_trigger_time("NOW") is None
+    assert parse_trigger_time(" now ") is None
+
+def test_parse_trigger_time():
+    expected = datetime.datetime(2026, 10, 17, 9, 30, tzinfo = datetime.timezone.utc)
+
+    assert parse_trigger_time("2026-10-17T09:30:00Z") == expected
+    assert parse_trigger_time("2026-10-17T09:30:00") == expected
+    assert parse_trigger_time("2026-10-17T10:30:00+01:00") == expected
+
+def test_parse_trigger_time_invalid():
+    assert parse_trigger_time("tomorrow") is None
+
+def test_format_trigger_time():
+    date_time = datetime.datetime(2026, 10, 17, 10, 30, tzinfo = datetime.timezone(datetime.timedelta(hours = 1)))
+
+    assert format_trigger_time(date_time) == "2026-10-17T09:30:00Z"
+    assert parse_trigger_time(format_trigger_time(date_time)) == date_time
+
+def test_subscribe_before_connected():
+    client = create_client()
+
+    client.subscribe("/topic/a/text")
+    client.subscribe("/topic/a/image")
+
+    assert client._connection.sent == []
+
+    client.on_connected(stomp.utils.Frame("CONNECTED", {}, ""))
+
+    assert client._connection.sent == [("SUBSCRIBE", "/topic/a/text", "1"),
+                                       ("SUBSCRIBE", "/topic/a/image", "2")]
+
+def test_subscribe_when_connected():
+    client = create_client()
+    client.on_connected(stomp.utils.Frame("CONNECTED", {}, ""))
+
+    client.subscribe("/topic/a/text")
+    client.subscribe("/topic/a/text", DummyHandler())
+    client.unsubscribe("/topic/a/text")
+    client.unsubscribe("/topic/b/text")
+
+    assert client._connection.sent == [("SUBSCRIBE", "/topic/a/text", "1"),
+                                       ("UNSUBSCRIBE", "1")]
+    assert client.get_subscriptions() == []
+
+def test_route_by_destination():
+    client = create_client()
+    handler_a = DummyHandler()
+    handler_b = DummyHandler()
+
+    client.subscribe("/topic/a/text", handler_a)
+    client.subscribe("/topic/a/image", handler_a)
+    client.subscribe("/topic/b/text", handler_b)
+
+    client.on_message(create_frame("/topic/a/text", "TEXT Station A"))
+    client.on_message(create_frame("/topic/b/text", "TEXT Station B"))
+    client.on_message(create_frame("/topic/a/image",
+                                   "SHOW http://example.com/a.png",
+                                   {"link": "http://example.com/"}))
+    client.on_message(create_frame("/topic/c/text", "TEXT Station C"))
+
+    assert handler_a.messages == [("TEXT", "Station A"),
+                                  ("SHOW", "http://example.com/a.png", "http://example.com/", None)]
+    assert handler_b.messages == [("TEXT", "Station B")]
+
+def test_route_to_listeners():
+    client = create_client()
+    listener = DummyHandler()
+    client.add_listener(listener)
+
+    client.subscribe("/topic/a/text")
+    client.on_message(create_frame("/topic/a/text", "TEXT Station A"))
+
+    client.unsubscribe("/topic/a/text")
+    client.on_message(create_frame("/topic/a/text", "TEXT Unsubscribed"))
+
+    assert listener.messages == [("TEXT", "Station A")]
+
+class DummyFrameListener:
+    def __init__(self):
+        self.events = []
+
+    def stomp_frame(self, frame_event):
+        self.events.append(frame_event)
+
+def test_frame_listener():
+    client = create_client()
+    client.subscribe("/topic/a/text", DummyHandler())
+
+    frame_listener = DummyFrameListener()
+    client.add_frame_listener(frame_listener)
+
+    frame = create_frame("/topic/a/text", "TEXT Station A")
+    client.on_message(frame)
+    client.on_disconnected()
+
+    assert len(frame_listener.events) == 2
+    assert frame_listener.events[0].event_type == "MESSAGE"
+    assert frame_listener.events[0].frame is frame
+    assert frame_listener.events[1].event_type == "lost connection"
+
+    client.remove_frame_listener(frame_listener)
+    client.on_message(frame)
+
+    assert len(frame_listener.events) == 2
+
+def test_FrameEvent_format():
+    frame = create_frame("/topic/a/text", "TEXT Station A", {"message-id": "1"})
+
+    assert FrameEvent("MESSAGE", frame).format() == ["MESSAGE",
+                                                     "destination: /topic/a/text",
+                                                     "message-id: 1",
+                                                     "TEXT Station A"]
+
+    assert FrameEvent("lost connection").format() == ["lost connection"]
+
+def test_get_reconnect_delay():
+    rng = random.Random(1)
+
+    for attempt in range(10):
+        delay = get_reconnect_delay(attempt, initial_delay = 1.0, max_delay = 60.0, rng = rng)
+        expected_max = min(60.0, 2 ** attempt)
+
+        assert expected_max / 2 <= delay <= expected_max
+
+    assert 30.0 <= get_reconnect_delay(10000, rng = rng) <= 60.0
+
+class ReconnectingConnection(DummyConnection):
+    """
+    Stands in for a stomp.Connection that fails to connect a number of times
+    before succeeding.
+    """
+    def __init__(self, client, failures):
+        DummyConnection.__init__(self)
+        self.client = client
+        self.failures = failures
+        self.attempts = 0
+        self.connected = threading.Event()
+
+    def connect(self, wait):
+        self.attempts += 1
+
+        if self.attempts <= self.failures:
+            raise stomp.exception.ConnectFailedException()
+
+        self.client.on_connected(stomp.utils.Frame("CONNECTED", {}, ""))
+        self.connected.set()
+
+def test_reconnect():
+    client = RadioVisClient(initial_reconnect_delay = 0.01, max_reconnect_delay = 0.02)
+    connection = ReconnectingConnection(client, failures = 2)
+    client._connection = connection
+
+    client.subscribe("/topic/a/text")
+    client.subscribe("/topic/a/image")
+    client.on_connected(stomp.utils.Frame("CONNECTED", {}, ""))
+    connection.sent = []
+
+    client.on_disconnected()
+
+    assert not client.is_connected()
+    assert connection.connected.wait(5)
+
+    assert client.is_connected()
+    assert connection.attempts == 3
+    assert connection.sent == [("SUBSCRIBE", "/topic/a/text", "1"),
+                               ("SUBSCRIBE", "/topic/a/image", "2")]
+
+def test_reconnect_after_start_fails():
+    client = RadioVisClient(initial_reconnect_delay = 0.01, max_reconnect_delay = 0.02)
+    connection = ReconnectingConnection(client, failures = 2)
+    client._connection = connection
+
+    assert_raises(stomp.exception.ConnectFailedException,
+                  client.start, "/topic/a/text", "/topic/a/image")
+
+    assert connection.connected.wait(5)
+
+    assert client.is_connected()
+    assert connection.attempts == 3
+    assert connection.sent == [("SUBSCRIBE", "/topic/a/text", "1"),
+                               ("SUBSCRIBE", "/topic/a/image", "2")]
+
+def test_no_reconnect_after_start_fails_when_disabled():
+    client = RadioVisClient(reconnect = False, initial_reconnect_delay = 0.01)
+    connection = ReconnectingConnection(client, failures = 1)
+    client._connection = connection
+
+    assert_raises(stomp.exception.ConnectFailedException, client.start)
+
+    assert not connection.connected.wait(0.1)
+    assert connection.attempts == 1
+
+def test_no_reconnect_when_stopped():
+    client = RadioVisClient(initial_reconnect_delay = 0.01)
+    connection = ReconnectingConnection(client, failures = 0)
+    client._connection = connection
+
+    client.stop()
+    client.on_disconnected()
+
+    assert not connection.connected.wait(0.1)
+    assert connection.attempts == 0
@@ -0,0 +1,216 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for RadioVisConnectionPool class.
+"""
+
+from lib.proxy_settings import ProxySettings
+from lib.radiovis_connection_pool import RadioVisConnectionPool
+
+from nose.tools import assert_raises
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class DummyClient:
+    """
+    Stands in for RadioVisClient, without connecting to a server.
+    """
+    def __init__(self, host, port, proxy_settings):
+        self.host = host
+        self.port = port
+        self.connected = False
+        self.stopped = False
+
+    def start(self):
+        if self.host == "unavailable.example.com":
+            raise ConnectionRefusedError()
+
+        self.connected = True
+
+    def stop(self):
+        self.connected = False
+        self.stopped = True
+
+    def is_connected(self):
+        return self.connected
+
+def create_pool(max_connections = 2, idle_timeout = 60.0):
+    clock = FakeClock()
+    pool = RadioVisConnectionPool(max_connections = max_connections,
+                                  idle_timeout = idle_timeout,
+                                  client_factory = DummyClient,
+                                  clock = clock)
+    return pool, clock
+
+def test_reuse():
+    pool, clock = create_pool()
+
+    client_1 = pool.acquire("vis1.example.com", 61613)
+    pool.release(client_1)
+
+    client_2 = pool.acquire("vis1.example.com", 61613)
+
+    assert client_2 is client_1
+    assert not client_1.stopped
+    assert pool.get_connection_count() == 1
+
+    client_3 = pool.acquire("vis1.example.com", 61613)
+
+    assert client_3 is client_1
+
+def test_proxy_settings():
+    pool, clock = create_pool(max_connections = 4)
+
+    direct_client = pool.acquire("vis1.example.com", 61613)
+    proxy_client = pool.acquire("vis1.example.com", 61613, ProxySettings(3, "proxy.example.com", 8080))
+
+    # Connections through a proxy server aren't shared with direct ones.
+    assert proxy_client is not direct_client
+    assert pool.get_connection_count() == 2
+
+    # Equal proxy settings share a connection.
+    client = pool.acquire("vis1.example.com", 61613, ProxySettings(3, "proxy.example.com", 8080))
+    assert client is proxy_client
+
+    client = pool.acquire("vis1.example.com", 61613, ProxySettings(3, "proxy.example.org", 8080))
+    assert client is not proxy_client
+    assert pool.get_connection_count() == 3
+
+def test_idle_timeout():
+    pool, clock = create_pool()
+
+    client_1 = pool.acquire("vis1.example.com", 61613)
+    pool.release(client_1)
+
+    clock.now += 59
+    pool.close_idle()
+
+    assert not client_1.stopped
+
+    clock.now += 1
+    pool.close_idle()
+
+    assert client_1.stopped
+    assert pool.get_connection_count() == 0
+
+    client_2 = pool.acquire("vis1.example.com", 61613)
+
+    assert client_2 is not client_1
+
+def test_in_use_not_closed():
+    pool, clock = create_pool()
+
+    client_1 = pool.acquire("vis1.example.com", 61613)
+
+    clock.now += 3600
+    pool.close_idle()
+
+    assert not client_1.stopped
+
+def test_max_connections():
+    pool, clock = create_pool(max_connections = 2)
+
+    client_1 = pool.acquire("vis1.example.com", 61613)
+    client_2 = pool.acquire("vis2.example.com", 61613)
+    pool.release(client_1)
+    pool.release(client_2)
+
+    # The least recently used idle connection makes room for the new one.
+    client_3 = pool.acquire("vis3.example.com", 61613)
+
+    assert client_1.stopped
+    assert not client_2.stopped
+    assert pool.get_connection_count() == 2
+
+    # Connections in use are kept open, even if over the limit.
+    client_4 = pool.acquire("vis2.example.com", 61613)
+    client_5 = pool.acquire("vis4.example.com", 61613)
+
+    assert client_4 is client_2
+    assert not client_2.stopped and not client_3.stopped
+    assert pool.get_connection_count() == 3
+
+    pool.release(client_3)
+
+    assert client_3.stopped
+    assert pool.get_connection_count() == 2
+
+    pool.close_all()
+
+    assert client_2.stopped and client_5.stopped
+    assert pool.get_connection_count() == 0
+
+def test_closed_by_server():
+    pool, clock = create_pool()
+
+    client_1 = pool.acquire("vis1.example.com", 61613)
+    pool.release(client_1)
+
+    client_1.connected = False
+
+    client_2 = pool.acquire("vis1.example.com", 61613)
+
+    assert client_2 is not client_1
+    assert client_1.stopped
+    assert client_2.connected
+
+def test_connect_failure():
+    clients = []
+
+    def client_factory(host, port, proxy_settings):
+        clients.append(DummyClient(host, port, proxy_settings))
+        return clients[-1]
+
+    pool = RadioVisConnectionPool(client_factory = client_factory, clock = FakeClock())
+
+    assert_raises(ConnectionRefusedError, pool.acquire,
+                  "unavailable.example.com", 61613, retry = False)
+    assert pool.get_connection_count() == 0
+
+    # The client is stopped, so that it doesn't keep trying to reconnect.
+    assert clients[0].stopped
+
+def test_connect_retry():
+    pool, clock = create_pool()
+
+    # The client keeps trying to connect, so it is pooled as if connected.
+    client_1 = pool.acquire("unavailable.example.com", 61613)
+
+    assert not client_1.is_connected()
+    assert not client_1.stopped
+    assert pool.get_connection_count() == 1
+
+    # Others can't use it until it connects, unless they also wait.
+    assert_raises(ConnectionError, pool.acquire,
+                  "unavailable.example.com", 61613, retry = False)
+
+    client_2 = pool.acquire("unavailable.example.com", 61613)
+    assert client_2 is client_1
+
+    pool.release(client_2)
+
+    # The client reconnects.
+    client_1.connected = True
+
+    pool.release(client_1)
+
+    client_3 = pool.acquire("unavailable.example.com", 61613, retry = False)
+    assert client_3 is client_1
+    assert not client_1.stopped
@@ -0,0 +1,81 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for RadioVIS message parsing.
+"""
+
+from lib.radiovis_parser import MAX_TEXT_LENGTH, ShowMessage, TextMessage, UnknownMessage, parse_message
+
+import datetime
+
+def test_parse_text():
+    messages = parse_message("TEXT Now playing: Song\n")
+
+    assert len(messages) == 1
+    assert isinstance(messages[0], TextMessage)
+    assert messages[0].text == "Now playing: Song"
+
+def test_parse_text_whitespace():
+    messages = parse_message("  text \t Now playing  \r\n\n")
+
+    assert len(messages) == 1
+    assert messages[0].text == "Now playing"
+
+def test_parse_text_too_long():
+    messages = parse_message("TEXT " + "x" * 200)
+
+    assert messages[0].text == "x" * MAX_TEXT_LENGTH
+
+def test_parse_show():
+    headers = {"link": "http://example.com/",
+               "trigger-time": "2026-10-17T09:30:00Z"}
+
+    messages = parse_message("SHOW http://example.com/image.png", headers)
+
+    assert len(messages) == 1
+    assert isinstance(messages[0], ShowMessage)
+    assert messages[0].image_url == "http://example.com/image.png"
+    assert messages[0].link_url == "http://example.com/"
+    assert messages[0].trigger_time_header == "2026-10-17T09:30:00Z"
+    assert messages[0].trigger_time == datetime.datetime(2026, 10, 17, 9, 30, tzinfo = datetime.timezone.utc)
+
+def test_parse_show_without_headers():
+    messages = parse_message("show http://example.com/image.png", {"trigger-time": "NOW"})
+
+    assert messages[0].image_url == "http://example.com/image.png"
+    assert messages[0].link_url is None
+    assert messages[0].trigger_time is None
+
+    messages = parse_message("SHOW http://example.com/image.png")
+
+    assert messages[0].link_url is None
+
+def test_parse_show_invalid_trigger_time():
+    messages = parse_message("SHOW\thttp://example.com/image.png", {"trigger-time": "tomorrow"})
+
+    assert messages[0].image_url == "http://example.com/image.png"
+    assert messages[0].trigger_time is None
+
+def test_parse_unknown():
+    messages = parse_message("TEXT\nTEXTNoSpace\nSHOW\nHELLO world\nTEXT Hi")
+
+    assert [type(message) for message in messages] == [UnknownMessage] * 4 + [TextMessage]
+    assert messages[3].line == "HELLO world"
+    assert messages[4].text == "Hi"
+
+def test_slots():
+    message = TextMessage("Hi")
+
+    assert not hasattr(message, "__dict__")
@@ -0,0 +1,89 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for Scheduler class.
+"""
+
+from lib.scheduler import Scheduler
+
+import threading
+import time
+
+def test_Scheduler_order():
+    scheduler = Scheduler()
+    scheduler.start()
+
+    calls = []
+    done = threading.Event()
+
+    now = time.time()
+
+    try:
+        scheduler.schedule(now + 0.3, done.set)
+        scheduler.schedule(now + 0.2, calls.append, "c")
+        scheduler.schedule(now + 0.1, calls.append, "a")
+        scheduler.schedule(now + 0.1, calls.append, "b")
+
+        assert done.wait(5.0)
+    finally:
+        scheduler.stop()
+
+    assert calls == ["a", "b", "c"]
+
+def test_Scheduler_timing():
+    scheduler = Scheduler()
+    scheduler.start()
+
+    called = []
+    done = threading.Event()
+
+    def callback():
+        called.append(time.time())
+        done.set()
+
+    when = time.time() + 0.2
+
+    try:
+        # Schedule a later event first, so that the thread is already
+        # waiting when the earlier one is added.
+        scheduler.schedule(when + 10, callback)
+        scheduler.schedule(when, callback)
+
+        assert done.wait(5.0)
+    finally:
+        scheduler.stop()
+
+    assert abs(called[0] - when) < 0.1
+
+def test_Scheduler_cancel():
+    scheduler = Scheduler()
+    scheduler.start()
+
+    calls = []
+    done = threading.Event()
+
+    now = time.time()
+
+    try:
+        event = scheduler.schedule(now + 0.1, calls.append, "a")
+        scheduler.schedule(now + 0.2, done.set)
+        scheduler.cancel(event)
+
+        assert scheduler.get_pending_count() == 1
+        assert done.wait(5.0)
+    finally:
+        scheduler.stop()
+
+    assert calls == []
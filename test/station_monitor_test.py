@@ -0,0 +1,102 @@
+# Copyright 2026 British Broadcasting Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you
+# may not use this file except in compliance with the License. You may
+# obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Test cases for StationMonitor class.
+"""
+
+from lib.fm_radio_station import FmRadioStation
+from lib.station_monitor import StationMonitor
+
+class DummyClient:
+    """
+    Stands in for RadioVisClient, without connecting to a server.
+    """
+    def __init__(self, host, port, proxy_settings):
+        self.handlers = {}
+        self.started = False
+        self.stopped = False
+
+    def subscribe(self, destination, handler = None):
+        self.handlers[destination] = handler
+
+    def unsubscribe(self, destination):
+        self.handlers.pop(destination, None)
+
+    def get_subscriptions(self):
+        return list(self.handlers.keys())
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+class DummyListener:
+    def __init__(self):
+        self.messages = []
+
+    def station_text(self, station, text):
+        self.messages.append((station.get_name(), text))
+
+    def station_show(self, station, image_url, link_url, date_time):
+        self.messages.append((station.get_name(), image_url))
+
+def create_station(name, frequency):
+    return FmRadioStation(name, ecc = "e1", pi = "c586", freq = frequency)
+
+def test_StationMonitor():
+    clients = []
+
+    def client_factory(host, port, proxy_settings):
+        client = DummyClient(host, port, proxy_settings)
+        clients.append(client)
+        return client
+
+    listener = DummyListener()
+    monitor = StationMonitor(listener, client_factory = client_factory)
+
+    station_1 = create_station("Station 1", 9580)
+    station_2 = create_station("Station 2", 9730)
+    station_3 = create_station("Station 3", 9880)
+
+    monitor.add_station("vis1.example.com", 61613, station_1)
+    monitor.add_station("vis1.example.com", 61613, station_2)
+    monitor.add_station("vis2.example.com", 61613, station_3)
+
+    assert monitor.get_station_count() == 3
+    assert monitor.get_connection_count() == 2
+    assert len(clients[0].handlers) == 4
+    assert clients[0].started and clients[1].started
+
+    clients[0].handlers[station_2.get_text_topic()].radiovis_text("Hello")
+    clients[0].handlers[station_1.get_image_topic()].radiovis_show("http://example.com/1.png", None, None)
+
+    assert listener.messages == [("Station 2", "Hello"),
+                                 ("Station 1", "http://example.com/1.png")]
+
+    monitor.remove_station(station_1)
+
+    assert monitor.get_connection_count() == 2
+    assert not clients[0].stopped
+
+    monitor.remove_station(station_2)
+
+    assert monitor.get_connection_count() == 1
+    assert clients[0].stopped
+
+    monitor.stop()
+
+    assert clients[1].stopped
+    assert monitor.get_connection_count() == 0